@@ -2,9 +2,9 @@
 
 import bpy, os
 from logging import getLogger
-from typing import List, Dict, DefaultDict
+from typing import List, Dict, DefaultDict, Set
 from dataclasses import dataclass, field
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from .. import bl_info
 SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 logger = getLogger("sssekai")
@@ -71,6 +71,7 @@ def lookup_wm_prop(key: str, default=None):
 
 
 from UnityPy import Environment
+from UnityPy.environment import simplify_name
 from UnityPy.files import ObjectReader
 from UnityPy.classes import AnimationClip, Animator
 from .core.types import Hierarchy
@@ -90,8 +91,12 @@ class SSSekaiEnvironmentContainerCachedEnums:
 class SSSekaiEnvironmentContainer:
     # PathID to types
     hierarchies: Dict[int, Hierarchy] = field(default_factory=dict)
-    animators: Dict[int, ObjectReader[Animator]] = field(default_factory=dict)
-    animations: Dict[int, ObjectReader[AnimationClip]] = field(default_factory=dict)
+    # PathID to names. Use `SSSekaiGlobalEnvironment.get_container_object` for the objects themselves
+    animators: Dict[int, str] = field(default_factory=dict)
+    animations: Dict[int, str] = field(default_factory=dict)
+    # PathID to the name of the SerializedFile (CAB) the animators and animations are in.
+    # Hierarchies keep theirs in `Hierarchy.root_file`
+    files: Dict[int, str] = field(default_factory=dict)
     enums: SSSekaiEnvironmentContainerCachedEnums = field(
         default_factory=SSSekaiEnvironmentContainerCachedEnums
     )
@@ -105,21 +110,13 @@ class SSSekaiEnvironmentContainer:
         ]
         self.enums.hierarchies = sorted(self.enums.hierarchies, key=lambda x: x[1])
         self.enums.animators = [
-            (
-                *id_name(
-                    path_id,
-                    animator.read().m_GameObject.read().m_Name,
-                ),
-                "",
-                "DECORATE_ANIMATE",
-                index,
-            )
-            for index, (path_id, animator) in enumerate(self.animators.items())
+            (*id_name(path_id, name), "", "DECORATE_ANIMATE", index)
+            for index, (path_id, name) in enumerate(self.animators.items())
         ]
         self.enums.animators = sorted(self.enums.animators, key=lambda x: x[1])
         self.enums.animations = [
-            (*id_name(path_id, animation.peek_name()), "", "ANIM_DATA", index)
-            for index, (path_id, animation) in enumerate(self.animations.items())
+            (*id_name(path_id, name), "", "ANIM_DATA", index)
+            for index, (path_id, name) in enumerate(self.animations.items())
         ]
         self.enums.animations = sorted(self.enums.animations, key=lambda x: x[1])
 
@@ -130,11 +127,46 @@ class SSSekaiGlobalEnvironment:
     env: Environment = None
     env_path: str = ""
     env_aux_path: str = ""
+    # (SerializedFile name, PathID) to ObjectReader. Built on demand by `get_object`
+    env_objects: Dict[Tuple[str, int], ObjectReader] = field(default_factory=dict)
+    # Files in `env.files` whose objects are in `env_objects` already. See `index_objects`
+    env_indexed: Set[str] = field(default_factory=set)
+    # PathID to the file it's in, for files that aren't loaded yet. See `add_lazy_sources`
+    env_sources: Dict[int, str] = field(default_factory=dict)
+    # Path to (Size, Modified Time in ns) of the files in `env_path` as of when they're loaded.
+    # See `SSSekaiEnvironmentWatcher`
+    env_files: Dict[str, Tuple[int, int]] = field(default_factory=dict)
     # --- Containers
     containers: DefaultDict[str, SSSekaiEnvironmentContainer] = field(
         default_factory=lambda: defaultdict(SSSekaiEnvironmentContainer)
     )
     container_enum: List[Tuple[str, str, str, str, int]] = field(default_factory=list)
+    # Bumped whenever the environment (or anything above) changes. See `versioned_enum_items`
+    env_version: int = 0
+    # --- Resident environments. See `set_env`
+    # (Path, Aux. Path) to environments that were switched away from. Least recently used first
+    env_resident: "OrderedDict[Tuple[str, str], SSSekaiGlobalEnvironment]" = field(
+        default_factory=OrderedDict
+    )
+    # How many environments are kept in `env_resident` at most
+    env_resident_budget: int = 2
+    # --- Loading. See `SSSekaiBlenderLoadEnvironmentOperator`
+    env_loading: bool = False
+    env_loading_cancelled: bool = False
+    env_loading_progress: float = 0
+    env_loading_message: str = ""
+    # --- Catalog. See `SSSekaiBlenderBuildCatalogOperator`
+    catalog_building: bool = False
+    catalog_building_cancelled: bool = False
+    catalog_building_progress: float = 0
+    catalog_building_message: str = ""
+    # Results of the last catalog search. See `SSSekaiBlenderSearchCatalogOperator`
+    catalog_results: list = field(default_factory=list)
+    # Bumped whenever `catalog_results` changes. See `versioned_enum_items`
+    catalog_version: int = 0
+    # (File, PathID, Root Transform PathID) of the result to select once its file is loaded.
+    # See `SSSekaiBlenderLoadCatalogResultOperator`
+    catalog_selection: Tuple[str, int, int] = None
     # --- RLA
     rla_sekai_streaming_live_bundle_path: str = None
     rla_header: dict = field(default_factory=dict)
@@ -144,6 +176,8 @@ class SSSekaiGlobalEnvironment:
     rla_clip_tick_range: tuple = (0, 0)
     rla_clip_charas: set = field(default_factory=set)
     rla_enum_entries: list = None
+    # Bumped whenever any of the RLA states above changes. See `versioned_enum_items`
+    rla_version: int = 0
 
     def rla_get_version(self):
         return (
@@ -158,13 +192,182 @@ class SSSekaiGlobalEnvironment:
     texture_cache: Dict[int, bpy.types.Image] = field(default_factory=dict)
     material_cache: Dict[int, bpy.types.Material] = field(default_factory=dict)
 
+    def get_object(self, path_id: int, file: str) -> ObjectReader:
+        """Finds the ObjectReader with `path_id` in the SerializedFile (CAB) named `file`
+
+        PathIDs are only unique within one SerializedFile. Files added with `add_lazy_sources`
+        are loaded on demand"""
+        key = (file, path_id)
+        if not key in self.env_objects:
+            source = self.env.lazy_cabs.get(simplify_name(file), None)
+            if source:
+                self.env.load_lazy_file(source)
+            self.index_objects()
+        return self.env_objects[key]
+
+    def get_container_object(self, container: str, path_id: int) -> ObjectReader:
+        """Finds the animator or animation with `path_id` in `container`. See `get_object`"""
+        return self.get_object(path_id, self.containers[container].files[path_id])
+
+    def index_objects(self):
+        """Adds the objects of every file in the environment that isn't indexed yet to `env_objects`"""
+        for name, file in list(self.env.files.items()):
+            if name in self.env_indexed:
+                continue
+            self.env_indexed.add(name)
+            pending = [file]
+            while pending:
+                file = pending.pop()
+                if getattr(file, "objects", None):
+                    # Same as `Environment.objects`
+                    if getattr(file, "is_dependency", False):
+                        continue
+                    for path_id, obj in file.objects.items():
+                        self.env_objects[(file.name, path_id)] = obj
+                else:
+                    pending.extend(getattr(file, "files", dict()).values())
+
+    def add_lazy_sources(self, sources: List[Tuple[str, List[str], List[int]]]):
+        """Registers files that are only loaded when they're needed
+
+        Args:
+            sources: [(file path, CAB names, PathIDs of the objects we may ask for), ...]
+        """
+        for path, cabs, path_ids in sources:
+            self.env.add_lazy_file(path, cabs)
+            self.env_sources.update({path_id: path for path_id in path_ids})
+
+    def unload_file(self, path: str) -> Set[int]:
+        """Drops the file at `path` from the environment, whether it's been loaded or not.
+
+        Containers are NOT touched. For ZIP/TAR archives, every member loaded from it is dropped.
+
+        Returns:
+            Set[int]: PathIDs of the objects in the file
+        """
+        if path in self.env.archives:
+            path_ids = set()
+            for member in self.env.archives.pop(path):
+                path_ids |= self.unload_file(os.path.join(path, member))
+            self.env.close_file(path)
+            return path_ids
+        path_ids = {
+            path_id for path_id, source in self.env_sources.items() if source == path
+        }
+        files, pending = [], [self.env.files.pop(path, None)]
+        while pending:
+            file = pending.pop()
+            if file is None:
+                continue
+            files.append(file)
+            path_ids.update(getattr(file, "objects", dict()).keys())
+            pending.extend(getattr(file, "files", dict()).values())
+        for name, cab in list(self.env.cabs.items()):
+            if any(cab is file for file in files):
+                del self.env.cabs[name]
+        for name, source in list(self.env.lazy_cabs.items()):
+            if source == path:
+                del self.env.lazy_cabs[name]
+        self.env.lazy_dependencies.discard(path)
+        self.env_indexed.discard(path)
+        self.env._container_index_built = False
+        for cache in (
+            self.env_sources,
+            self.texture_cache,
+            self.material_cache,
+        ):
+            for path_id in path_ids:
+                cache.pop(path_id, None)
+        for key, obj in list(self.env_objects.items()):
+            if any(obj.assets_file is file for file in files):
+                del self.env_objects[key]
+        self.env.close_file(path)
+        return path_ids
+
+    def set_env(self, other: "SSSekaiGlobalEnvironment"):
+        """Switches over to the environment loaded into `other`, all at once
+
+        The current environment is kept in `env_resident` (see `pop_resident_env`) if the budget allows
+        """
+        key = (self.env_path, self.env_aux_path)
+        if self.env and key != (other.env_path, other.env_aux_path):
+            self.env_resident[key] = self.detach_env()
+            self.evict_resident_envs()
+        self.reset_env()
+        self.env = other.env
+        self.env_path = other.env_path
+        self.env_aux_path = other.env_aux_path
+        self.env_objects = other.env_objects
+        self.env_indexed = other.env_indexed
+        self.env_sources = other.env_sources
+        self.env_files = other.env_files
+        self.containers = other.containers
+        self.container_enum = other.container_enum
+        self.texture_cache = other.texture_cache
+        self.material_cache = other.material_cache
+        self.env_version += 1
+
+    def detach_env(self) -> "SSSekaiGlobalEnvironment":
+        """Moves the current environment, along with its caches, out into a new instance. `self` is left empty
+
+        Its files stay mapped (see `SSSekaiEnvironment.close_file`) until it's evicted. See `evict_resident_envs`
+        """
+        other = SSSekaiGlobalEnvironment(
+            env=self.env,
+            env_path=self.env_path,
+            env_aux_path=self.env_aux_path,
+            env_objects=self.env_objects,
+            env_indexed=self.env_indexed,
+            env_sources=self.env_sources,
+            env_files=self.env_files,
+            containers=self.containers,
+            container_enum=self.container_enum,
+            texture_cache=self.texture_cache,
+            material_cache=self.material_cache,
+        )
+        self.env = None
+        self.env_objects = dict()
+        self.env_indexed = set()
+        self.env_sources = dict()
+        self.env_files = dict()
+        self.containers = defaultdict(SSSekaiEnvironmentContainer)
+        self.container_enum = list()
+        self.texture_cache = dict()
+        self.material_cache = dict()
+        self.reset_env()
+        return other
+
+    def pop_resident_env(self, path: str, aux_path: str) -> "SSSekaiGlobalEnvironment":
+        """Takes the environment for `path` and `aux_path` out of `env_resident`
+
+        Returns:
+            SSSekaiGlobalEnvironment: the environment, or None if it isn't resident
+        """
+        return self.env_resident.pop((path, aux_path), None)
+
+    def evict_resident_envs(self):
+        """Drops the least recently used environments until `env_resident_budget` is met"""
+        while self.env_resident and len(self.env_resident) > self.env_resident_budget:
+            (path, aux_path), evicted = self.env_resident.popitem(last=False)
+            logger.debug("Evicting environment: %s" % path)
+            evicted.reset_env()
+
     def reset_env(self):
+        if self.env:
+            # Release the files it's mapped. See `SSSekaiEnvironment.close_file`
+            self.env.close()
+        self.env = None
         self.env_path = ""
         self.env_aux_path = ""
+        self.env_objects.clear()
+        self.env_indexed.clear()
+        self.env_sources.clear()
+        self.env_files.clear()
         self.containers.clear()
         self.container_enum.clear()
         self.texture_cache.clear()
         self.material_cache.clear()
+        self.env_version += 1
 
 
 sssekai_global = SSSekaiGlobalEnvironment()
@@ -0,0 +1,3 @@
+# NOTE: `scanner`, `unityfs`, `archive`, `catalog`, `binder`, `transforms`, `mesh`, `utils`, `bundle_cache` and
+# `environment` must stay free of `bpy`, `mathutils` and the addon's own imports, so that they run outside of Blender.
+# See `scanner.run_scanner` and the tests. Log to `getLogger("sssekai")` in them, like the addon does.
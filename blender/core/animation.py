@@ -11,6 +11,7 @@ from sssekai.unity.AnimationClip import (
     kBindTransformRotation,
     kBindTransformScale,
 )
+from .binder import PathBinder
 from .math import (
     uVector3,
     blEuler,
@@ -302,7 +303,8 @@ def load_armature_animation(
         name (str): name of the action
         anim (Animation): animation data
         target (bpy.types.Object): target armature object
-        tos_leaf (dict): TOS. Animation *FULL* path CRC32 to *LEAF* bone name table
+        tos_leaf (dict): TOS. Animation *FULL* path CRC32 to *LEAF* bone name table.
+            With a `PathBinder`, paths with extra or missing root nodes are bound as well
         quat_skip_resample (bool, optional): If True, skips quaternion resampling. Defaults to False.
 
     Note:
@@ -311,6 +313,7 @@ def load_armature_animation(
     Returns:
         bpy.types.Action: the created action
     """
+    bind = tos_leaf.bind if isinstance(tos_leaf, PathBinder) else tos_leaf.get
     bpy.ops.object.mode_set(mode="EDIT")
     # Collect Local Space matrices
     # In Blender we animate bones in Pose Space (explained below)
@@ -394,7 +397,7 @@ def load_armature_animation(
     action = create_action(name)
     # Quaternions
     for path, curve in anim.Curves[kBindTransformRotation].items():
-        bone = tos_leaf.get(path, None)
+        bone = bind(path)
         if not bone:
             logger.warning("Quaternion: Failed to bind CRC32 %s to bone" % path)
             continue
@@ -416,7 +419,7 @@ def load_armature_animation(
         )
     # Euler Rotations
     for path, curve in anim.Curves[kBindTransformEuler].items():
-        bone = tos_leaf.get(path, None)
+        bone = bind(path)
         if not bone:
             logger.warning("Euler: Failed to bind CRC32 %s to bone" % path)
             continue
@@ -434,7 +437,7 @@ def load_armature_animation(
         )
     # Translations
     for path, curve in anim.Curves[kBindTransformPosition].items():
-        bone = tos_leaf.get(path, None)
+        bone = bind(path)
         if not bone:
             logger.warning("Translation: Failed to bind CRC32 %s to bone" % path)
             continue
@@ -450,7 +453,7 @@ def load_armature_animation(
         )
     # Scale
     for path, curve in anim.Curves[kBindTransformScale].items():
-        bone = tos_leaf.get(path, None)
+        bone = bind(path)
         if not bone:
             logger.warning("Scale: Failed to bind CRC32 %s to bone" % path)
             continue
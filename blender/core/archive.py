@@ -0,0 +1,153 @@
+# Reading asset bundles straight out of ZIP/TAR archives
+import os, struct, tarfile, zipfile
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+# ZIP local file header. See `zipfile.structFileHeader`
+ZIP_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+ZIP_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+# Only files with these extensions are looked into. See `is_archive`
+ARCHIVE_EXTENSIONS = (
+    ".zip",
+    ".tar",
+    ".tar.gz",
+    ".tgz",
+    ".tar.bz2",
+    ".tbz2",
+    ".tar.xz",
+    ".txz",
+)
+
+
+@dataclass
+class ArchiveMember:
+    name: str
+    size: int
+    # Offset of the member's data in the archive. -1 if it's compressed, and has to be read with `read_archive_member`
+    offset: int = -1
+
+    @property
+    def is_stored(self):
+        """True if the member is stored as-is, i.e. it can be read from the archive directly"""
+        return self.offset >= 0
+
+
+def is_archive(path: str) -> bool:
+    """True for ZIP/TAR archives with one of the `ARCHIVE_EXTENSIONS`. Other files aren't opened"""
+    if not path.lower().endswith(ARCHIVE_EXTENSIONS) or not os.path.isfile(path):
+        return False
+    return zipfile.is_zipfile(path) or tarfile.is_tarfile(path)
+
+
+def split_archive_path(path: str) -> Tuple[str, str]:
+    """Splits paths of archive members (i.e. `drop.zip/assets/bundle`) into the archive and member name
+
+    Returns:
+        Tuple[str, str]: (archive path, member name). The member name is None if `path` isn't in an archive
+    """
+    if os.path.exists(path):
+        return path, None
+    archive, member = path, []
+    while True:
+        archive, name = os.path.split(archive)
+        if not name:
+            return path, None
+        member.insert(0, name)
+        if os.path.isfile(archive):
+            if not is_archive(archive):
+                return path, None
+            return archive, "/".join(member)
+
+
+def list_archive(path: str) -> Dict[str, ArchiveMember]:
+    """Lists the files in the ZIP or TAR archive at `path`. Directories are skipped
+
+    Returns:
+        Dict[str, ArchiveMember]: member name to member
+    """
+    members = dict()
+    if zipfile.is_zipfile(path):
+        with open(path, "rb") as f, zipfile.ZipFile(f) as z:
+            for info in z.infolist():
+                if info.is_dir():
+                    continue
+                member = ArchiveMember(info.filename, info.file_size)
+                if info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 1:
+                    f.seek(info.header_offset)
+                    signature, *_, name_length, extra_length = ZIP_LOCAL_HEADER.unpack(
+                        f.read(ZIP_LOCAL_HEADER.size)
+                    )
+                    if signature != ZIP_LOCAL_HEADER_SIGNATURE:
+                        raise zipfile.BadZipFile(
+                            "Bad local file header: %s" % info.filename
+                        )
+                    member.offset = (
+                        info.header_offset
+                        + ZIP_LOCAL_HEADER.size
+                        + name_length
+                        + extra_length
+                    )
+                members[member.name] = member
+        return members
+    try:
+        # Members of uncompressed TARs are stored as-is
+        tar, stored = tarfile.open(path, "r:"), True
+    except tarfile.ReadError:
+        tar, stored = tarfile.open(path, "r:*"), False
+    with tar:
+        for info in tar.getmembers():
+            if info.isfile():
+                members[info.name] = ArchiveMember(
+                    info.name, info.size, info.offset_data if stored else -1
+                )
+    return members
+
+
+class ArchiveReader:
+    """Keeps the ZIP or TAR archive at `path` open for reading its members
+
+    Reopening compressed TARs (i.e. `.tar.gz`) decompresses them from the start every time.
+    Members read in archive order (see `list_archive`) are decompressed in one pass instead.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if zipfile.is_zipfile(path):
+            self.archive = zipfile.ZipFile(path)
+        else:
+            self.archive = tarfile.open(path, "r:*")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def read(self, name: str) -> bytes:
+        """Reads (and decompresses) the member `name`"""
+        if isinstance(self.archive, zipfile.ZipFile):
+            return self.archive.read(name)
+        return self.archive.extractfile(name).read()
+
+    def close(self):
+        self.archive.close()
+
+
+def read_archive_member(path: str, name: str) -> bytes:
+    """Reads (and decompresses) the member `name` of the ZIP or TAR archive at `path`
+
+    Use `ArchiveReader` for reading more than one member
+    """
+    with ArchiveReader(path) as reader:
+        return reader.read(name)
+
+
+def expand_archives(files: List[str]) -> List[str]:
+    """Replaces the ZIP/TAR archives in `files` with the paths of their members. See `split_archive_path`"""
+    result = []
+    for file in files:
+        if is_archive(file):
+            result += [os.path.join(file, name) for name in list_archive(file)]
+        else:
+            result.append(file)
+    return result
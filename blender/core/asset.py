@@ -1,9 +1,9 @@
-import bpy, bmesh
+import bpy
 import json, math
+import numpy as np
 import tempfile, copy, traceback
-from typing import Dict, Tuple, List, Set
+from typing import Dict, Tuple, List, Set, Callable
 from UnityPy.enums import ClassIDType
-from UnityPy.helpers.MeshHelper import MeshHandler
 from UnityPy.classes import (
     ColorRGBA,
     Texture2D,
@@ -15,26 +15,37 @@ from UnityPy.classes import (
     SkinnedMeshRenderer,
 )
 from UnityPy import Environment
+from UnityPy.files import ObjectReader
 from .types import Hierarchy, HierarchyNode
 from .utils import crc32, pprint
+from .scanner import peek_transform
+from .transforms import (
+    bindpose_transforms,
+    pose_basis_matrices,
+    swizzle_positions,
+    unity_matrices_to_array,
+)
+from .mesh import (
+    MeshArrays,
+    filter_triangles,
+    normalize_vectors,
+    skin_weights,
+    weight_batches,
+)
 from .helpers import (
     create_empty,
     rgba_to_rgb_tuple,
     auto_connect_shader_nodes_by_name,
     auto_setup_shader_node_driver,
-    apply_pose_matrix,
+    set_custom_normals,
 )
 from .math import (
-    swizzle_matrix,
     swizzle_vector,
     swizzle_quaternion,
     swizzle_vector_scale,
     swizzle_vector3,
-    blVector,
     blMatrix,
     uMatrix4x4,
-    UNITY_TO_BLENDER_BASIS,
-    BLENDER_TO_UNITY_BASIS,
 )
 from .consts import *
 from .. import logger
@@ -50,20 +61,60 @@ def build_scene_hierarchy(env: Environment) -> List[Hierarchy]:
     With Unity's Scene Graph (Hierarchy), the root of the hierarchy belongs to the scene itself.
     This in effect eliminates the distinction between scene(s) and would allow a one-to-one
     representation of the scene in Blender's View Layer.
+
+    NOTE: Only stubs (root PathID and name) are returned. Use `materialize_scene_hierarchy`
+    to build the tree itself when it's needed. Transforms aren't read in full here, see `peek_transform`.
     """
-    transform_roots = []
-    for obj in filter(
+    hierarchies = []
+    transforms = filter(
         lambda obj: obj.type in {ClassIDType.Transform, ClassIDType.RectTransform},
         env.objects,
+    )
+    # In file order, so the reads stay sequential
+    for obj in sorted(
+        transforms, key=lambda obj: (obj.assets_file.name, obj.byte_start)
     ):
-        data = obj.read()
-        if hasattr(data, "m_Children") and not data.m_Father.path_id:
-            transform_roots.append(data)
-    hierarchies = []
-    for transform in transform_roots:
-        hierarchy = Hierarchy(transform.m_GameObject.read().m_Name)
+        links = peek_transform(obj)
+        if links:
+            game_object_path_id, father_path_id, _ = links
+        else:
+            data = obj.read()
+            game_object_path_id = data.m_GameObject.path_id
+            father_path_id = data.m_Father.path_id
+        if not father_path_id:
+            game_object = obj.assets_file.objects[game_object_path_id]
+            hierarchies.append(
+                Hierarchy(
+                    game_object.peek_name(),
+                    root_path_id=obj.path_id,
+                    root_game_object_path_id=game_object_path_id,
+                    root_file=obj.assets_file.name,
+                )
+            )
+    hierarchies = sorted(hierarchies, key=lambda x: x.name)
+    return hierarchies
+
 
-        def dfs(root: Transform | RectTransform, parent: HierarchyNode = None):
+def materialize_scene_hierarchy(
+    hierarchy: Hierarchy, get_object: Callable[[int, str], ObjectReader]
+) -> Hierarchy:
+    """Builds the tree of a stub hierarchy, i.e. one restored from a snapshot
+
+    Args:
+        hierarchy (Hierarchy): the hierarchy. Modified in place
+        get_object (Callable[[int, str], ObjectReader]): (PathID, SerializedFile name) to ObjectReader lookup
+
+    Returns:
+        Hierarchy: the same hierarchy
+    """
+    if hierarchy.is_stub:
+        logger.debug("Building hierarchy: %s" % hierarchy.name)
+
+        # Iterative, so arbitrarily deep chains (i.e. hair and cloth bones) don't hit the recursion limit
+        stack = [(get_object(hierarchy.root_path_id, hierarchy.root_file), None)]
+        while stack:
+            reader, parent = stack.pop()
+            root: Transform | RectTransform = reader.read()
             game_object = root.m_GameObject.read()
             name = game_object.m_Name
             node = HierarchyNode(
@@ -73,24 +124,13 @@ def build_scene_hierarchy(env: Environment) -> List[Hierarchy]:
                 root.m_LocalRotation,
                 root.m_LocalScale,
                 # ---
-                parent=parent,
                 game_object=game_object,
+                game_object_path_id=root.m_GameObject.path_id,
             )
-            hierarchy.nodes[node.path_id] = node
-            if not parent:
-                # Effectively the bone for `transform`
-                hierarchy.root = node
-            else:
-                parent.children.append(node)
-                hierarchy.parents[node.path_id] = parent.path_id
-            for child in root.m_Children:
-                dfs(child.read(), node)
-
-        dfs(transform)
-        hierarchies.append(hierarchy)
-
-    hierarchies = sorted(hierarchies, key=lambda x: x.name)
-    return hierarchies
+            # The first node is effectively the bone for `transform`
+            hierarchy.add_node(node, parent)
+            stack += [(child, node) for child in reversed(root.m_Children)]
+    return hierarchy
 
 
 def import_scene_hierarchy(
@@ -104,7 +144,7 @@ def import_scene_hierarchy(
         arma (Armature): Armature as genereated by previous steps
         name (str): Armature Object name
         use_bindpose (bool): Whether to use the bindpose for the bones
-        seperate_armatures (bool): Whether to create a new armature for each Skinned Mesh Renderer
+        seperate_armatures (bool): Whether to create a new armature for each Skinned Mesh Renderer, on top of the complete one
 
     Note:
         In Unity Bindpose is generated in the asset import process (e.g. FBX)
@@ -124,19 +164,27 @@ def import_scene_hierarchy(
         List[Tuple[bpy.types.Object, Dict[int, str], int]]:
             List of tuples containing the created Armature, a dictionary of bone IDs, the path ID of the Skinned Mesh Renderer
             The SMR path ID can be 0 - in which case the armature is used for all Skinned Mesh Renderers in the hierarchy.
+            There's always exactly one such armature. With `seperate_armatures`, it comes last and is meant for the static meshes.
     """
     results = list()
 
-    def bindpose_of(sm: SkinnedMeshRenderer):
+    def bindpose_of(sm: SkinnedMeshRenderer) -> Dict[int, np.ndarray]:
         mesh = sm.m_Mesh.read()
-        bindpose = {p.m_PathID: mesh.m_BindPose[i] for i, p in enumerate(sm.m_Bones)}
-        return bindpose
+        matrices = unity_matrices_to_array(mesh.m_BindPose)
+        return {p.m_PathID: matrices[i] for i, p in enumerate(sm.m_Bones)}
+
+    # The skeleton is shared by every armature built from the hierarchy
+    root_bone = hierarchy.root
+    arrays = hierarchy.arrays
+    # No scaling is ever applied here since otherwise scaling becomes
+    # erroneouslly commutative which is *never* the case in any DCC software you'd use
+    global_transforms = arrays.global_transforms(scale=False)
+    for node, transform in zip(arrays.nodes, global_transforms):
+        node.global_transform = blMatrix(transform.tolist())
 
     def build_armature(
-        root_bone: HierarchyNode,
-        bindpose: Dict[int, uMatrix4x4] = None,
+        bindpose: Dict[int, np.ndarray] = None,
         bone_ids: Set[int] = None,
-        visited=set(),
         keep_only_bone_ids: bool = False,
     ) -> Tuple[bpy.types.Object, Dict[int, str]]:
         # Reserve bone_id nodes's names since they'd be used for vertex groups
@@ -150,9 +198,27 @@ def import_scene_hierarchy(
                     continue
                 bone = hierarchy.nodes[path_id]
                 reserve_bonenames[bone.name] = path_id
-        # No scaling is ever applied here since otherwise scaling becomes
-        # erroneouslly commutative which is *never* the case in any DCC software you'd use
-        root_bone.update_global_transforms(scale=False)
+        # Use bindposes for the subtree of the root bone
+        # and apply the actual pose in Pose Bones later
+        edit_transforms = global_transforms
+        if bindpose:
+            # Needs correction
+            indices = [
+                index
+                for index, path_id in enumerate(arrays.path_ids.tolist())
+                if path_id in bindpose
+            ]
+            if indices:
+                bindposes = np.array(
+                    [bindpose[arrays.nodes[index].path_id] for index in indices]
+                )
+                edit_transforms = global_transforms.copy()
+                # In armature space it's basically the inverse of the bindpose
+                # Identity = M_bind * M_pose
+                # XXX: Assume no scaling in M_pose
+                edit_transforms[indices] = bindpose_transforms(
+                    global_transforms[0], bindposes
+                )
 
         # Make an Armature with the hierarchy
         armature = bpy.data.armatures.new(root_bone.name)
@@ -164,32 +230,19 @@ def import_scene_hierarchy(
         bpy.ops.object.mode_set(mode="EDIT")
 
         ebones = dict()
-        pose_matrix = dict()
-        pose_scales = dict()
         bone_names = dict()
+        # Indices (in `arrays`) of the bones created, in order
+        created = list()
 
-        bone_ids_keep = set()
         if keep_only_bone_ids:
             # Find the only path that leads to the bone_ids set
             # i.e. ones that contributes to the final global transform, with or without bindpose
-            def dfs(bone: HierarchyNode):
-                if bone.path_id in bone_ids:
-                    return True
-                res = False
-                for child in bone.children:
-                    res |= dfs(child)
-                if res:
-                    bone_ids_keep.add(bone.path_id)
-                return res
-
-            dfs(root_bone)
-            for ch_root in bone_ids:
-                bone_ids_keep.add(ch_root)
-                for parent, child, _ in hierarchy.nodes[ch_root].children_recursive():
-                    # Add all children of the bone_ids to the keep set
-                    bone_ids_keep.add(child.path_id)
-
-        for parent, child, _ in root_bone.children_recursive(visited=visited):
+            # and all children of the bone_ids
+            keep = arrays.ancestor_mask(bone_ids) | arrays.subtree_mask(bone_ids)
+            bone_ids_keep = set(arrays.path_ids[keep].tolist())
+
+        for index, child in enumerate(arrays.nodes):
+            parent = arrays.nodes[arrays.parents[index]] if index else None
             if keep_only_bone_ids and child.path_id not in bone_ids_keep:
                 # Skip bones that are not in the bone_ids set with this flag
                 continue
@@ -208,40 +261,19 @@ def import_scene_hierarchy(
             ebone.use_relative_parent = False
             ebone.use_connect = False
             ebone.use_deform = True
-            # Cache the pose matrix for later
             # ebone name may not be unique in the hierarchy and importing it will
             # automatically add .001, .002, etc. suffixes to the bone name
-            pose_scales[ebone.name] = child.scale
             bone_names[child.path_id] = ebone.name
-            # Use bindposes for the subtree of the root bone
-            # and apply the actual pose in Pose Bones later
-            pose_matrix[ebone.name] = child.global_transform
-            if bindpose:
-                # Needs correction
-                M_edit = child.global_transform
-                M_bind = bindpose.get(child.path_id, None)
-                if not M_bind:
-                    # logger.debug("No bindpose found for %s" % child.name)
-                    pass
-                else:
-                    M_bind = swizzle_matrix(M_bind)
-                    # In armature space it's basically the inverse of the bindpose
-                    # Identity = M_bind * M_pose
-                    M_pose = M_bind.inverted()
-                    M_pose = UNITY_TO_BLENDER_BASIS @ M_pose @ BLENDER_TO_UNITY_BASIS
-                    M_parent = root_bone.global_transform
-                    # XXX: Assume no scaling in M_pose
-                    M_edit = M_parent @ M_pose
-            else:
-                M_edit = child.global_transform
+            M_edit = edit_transforms[index]
             # Treat the joints as extremely small bones
             # The same as https://github.com/KhronosGroup/glTF-Blender-IO/blob/2debd75ace303f3a3b00a43e9d7a9507af32f194/addons/io_scene_gltf2/blender/imp/gltf2_blender_node.py#L198
             # TODO: Alternative shapes for bones
             # TODO: Better bone size heuristic
-            ebone.head = M_edit @ blVector((0, 0, 0))
-            ebone.tail = M_edit @ blVector((0, 1, 0))
+            # i.e. M_edit @ (0, 0, 0), M_edit @ (0, 1, 0) and M_edit @ (0, 0, 1) - head
+            ebone.head = M_edit[:3, 3].tolist()
+            ebone.tail = (M_edit[:3, 3] + M_edit[:3, 1]).tolist()
             ebone.length = DEFAULT_BONE_SIZE
-            ebone.align_roll(M_edit @ blVector((0, 0, 1)) - ebone.head)
+            ebone.align_roll(M_edit[:3, 2].tolist())
             if parent:
                 ebone.parent = ebones.get(parent.path_id, None)
                 if not ebone.parent:
@@ -249,21 +281,39 @@ def import_scene_hierarchy(
                         "Parent bone %s not found for %s" % (parent.name, child.name)
                     )
             ebones[child.path_id] = ebone
-        bpy.ops.object.mode_set(mode="OBJECT")
+            created.append(index)
+        # Everything the Pose Mode pass needs is read in this same Edit Mode pass
+        index_of = {index: i for i, index in enumerate(created)}
+        parents = np.array(
+            [index_of.get(int(arrays.parents[index]), -1) for index in created],
+            dtype=np.int32,
+        ).reshape(-1)
+        edit_matrices = np.array(
+            [ebones[arrays.nodes[index].path_id].matrix for index in created],
+            dtype=np.float64,
+        ).reshape(-1, 4, 4)
         obj[KEY_HIERARCHY_BONE_PATHID] = str(root_bone.path_id)
         obj[KEY_HIERARCHY_BONE_NAME] = str(root_bone.name)
+        # So animations can be bound without walking the bones again. See `get_armature_path_table`
+        # (Path, Bone Name) pairs in depth-first pre-order. Every bone is kept, even where paths repeat
+        obj[KEY_HIERARCHY_BONE_PATH_TABLE] = json.dumps(
+            [
+                (path, bone_names[node.path_id])
+                for node, path in zip(arrays.nodes, arrays.paths())
+                if node.path_id in bone_names
+            ],
+            ensure_ascii=False,
+        )
         # Pose space adjustment
         # Make Scene Hierachy transform the Pose Bones so the final pose is correct
-        if pose_matrix:
-            # https://docs.blender.org/api/current/info_gotcha.html#stale-data
-            bpy.context.view_layer.update()
-            apply_pose_matrix(obj, pose_matrix, edit_mode=False, clear_pose=False)
-        # Scale adjustment
-        bpy.context.view_layer.update()
+        # See `apply_pose_matrix`. All of the bases are computed at once
+        bases = pose_basis_matrices(edit_matrices, global_transforms[created], parents)
         bpy.ops.object.mode_set(mode="POSE")
-        for bone, scale in pose_scales.items():
-            pbone = obj.pose.bones.get(bone, None)
-            pbone.scale = swizzle_vector_scale(scale)
+        for basis, index in zip(bases, created):
+            pbone = obj.pose.bones[bone_names[arrays.nodes[index].path_id]]
+            pbone.matrix_basis = blMatrix(basis.tolist())
+            # Scale adjustment
+            pbone.scale = swizzle_vector_scale(arrays.nodes[index].scale)
         return obj, bone_names
 
     sm_renderers = list()
@@ -276,6 +326,12 @@ def import_scene_hierarchy(
             sm: SkinnedMeshRenderer = node.game_object.m_SkinnedMeshRenderer.read()
             if sm.m_Mesh:
                 sm_renderers.append(sm)
+    # Read once per mesh, and shared by every armature built below
+    # SMR PathID:(Bone PathID:Bindpose)
+    bindposes = dict()
+    if use_bindpose:
+        for sm in sm_renderers:
+            bindposes[sm.object_reader.path_id] = bindpose_of(sm)
 
     if seperate_armatures:
         # Create new armatures for each Skinned Mesh Renderer
@@ -287,40 +343,26 @@ def import_scene_hierarchy(
         )
         for sm in tqdm(sm_renderers):
             bones = {p.path_id for p in sm.m_Bones}
-            parent = hierarchy.root
-            if use_bindpose:
-                bindpose = bindpose_of(sm)
-                obj, child_bone_names = build_armature(
-                    parent, bindpose=bindpose, bone_ids=bones, keep_only_bone_ids=True
-                )
-            else:
-                obj, child_bone_names = build_armature(
-                    parent, bone_ids=bones, keep_only_bone_ids=True
-                )
-            results.append((obj, child_bone_names, sm.object_reader.path_id))
-    else:
-        # Import the entire hierarchy as a single armature
-        # Fails when:
-        # - The root bones are reused for *different* bindposes
-        # - The root bones are reused for *different* meshes with different weights
-        # Otherwise for a single skinned mesh with a single bindpose this is fine
-        bone_ids = set()
-        for sm in sm_renderers:
-            bone_ids |= {p.path_id for p in sm.m_Bones}
-        if use_bindpose:
-            bindpose = dict()
-            for i in range(0, len(sm_renderers) - 1):
-                cur, next = sm_renderers[i], sm_renderers[i + 1]
-                bindpose |= bindpose_of(cur)
-                bindpose |= bindpose_of(next)
-            if len(sm_renderers) == 1:
-                bindpose |= bindpose_of(sm_renderers[0])
-            obj, bone_names = build_armature(
-                hierarchy.root, bindpose=bindpose, bone_ids=bone_ids
+            obj, child_bone_names = build_armature(
+                bindposes.get(sm.object_reader.path_id, None),
+                bone_ids=bones,
+                keep_only_bone_ids=True,
             )
-        else:
-            obj, bone_names = build_armature(hierarchy.root, bone_ids=bone_ids)
-        results.append((obj, bone_names, 0))
+            results.append((obj, child_bone_names, sm.object_reader.path_id))
+    # Import the entire hierarchy as a single armature
+    # With `seperate_armatures`, this is the complete one the static meshes are parented to
+    # Fails when:
+    # - The root bones are reused for *different* bindposes
+    # - The root bones are reused for *different* meshes with different weights
+    # Otherwise for a single skinned mesh with a single bindpose this is fine
+    bone_ids = set()
+    for sm in sm_renderers:
+        bone_ids |= {p.path_id for p in sm.m_Bones}
+    bindpose = dict()
+    for sm_bindpose in bindposes.values():
+        bindpose |= sm_bindpose
+    obj, bone_names = build_armature(bindpose, bone_ids=bone_ids)
+    results.append((obj, bone_names, 0))
 
     return results
 
@@ -349,93 +391,63 @@ def import_mesh_data(
         Tuple[bpy.types.Mesh, bpy.types.Object]: Created mesh and its parent object
     """
     mesh = bpy.data.meshes.new(name=data.m_Name)
-    handler = MeshHandler(data)
-    handler.process()
+    arrays = MeshArrays.from_mesh(data)
 
     obj = bpy.data.objects.new(name, mesh)
     bpy.context.collection.objects.link(obj)
-    bm = bmesh.new()
+    vertex_count = arrays.vertex_count
+    # Vertex position
+    vertices = swizzle_positions(
+        arrays.positions[:, :3].astype(np.float32).reshape(-1, 3)
+    )
+    mesh.vertices.add(vertex_count)
+    mesh.vertices.foreach_set("co", vertices.ravel())
+    # Indices
+    # UV rewinding, and without the faces Blender wouldn't take
+    triangles = filter_triangles(arrays.triangles, vertex_count)
+    mesh.loops.add(triangles.size)
+    mesh.loops.foreach_set("vertex_index", triangles.ravel())
+    mesh.polygons.add(len(triangles))
+    mesh.polygons.foreach_set(
+        "loop_start", np.arange(0, triangles.size, 3, dtype=np.int32)
+    )
+    if bpy.app.version < (4, 0, 0):
+        # Derived from `loop_start` (and read-only) since 4.0
+        mesh.polygons.foreach_set("loop_total", np.full(len(triangles), 3, np.int32))
+    mesh.polygons.foreach_set("use_smooth", np.ones(len(triangles), dtype=bool))
+    mesh.update(calc_edges=True)
     # Bone Indices + Bone Weights
-    deform_layer = None
     if vertex_groups:
-        for boneName in vertex_groups:
-            obj.vertex_groups.new(name=boneName)
-        deform_layer = bm.verts.layers.deform.new()
-    # Vertex position & vertex normal (pre-assign)
-    for vtx in range(0, handler.m_VertexCount):
-        vert = bm.verts.new(swizzle_vector3(*handler.m_Vertices[vtx][:3]))
-        # Blender always generates normals automatically
-        # Custom normals needs a bit more work
-        # See below for normals_split... calls
-        if handler.m_Normals:
-            vert.normal = swizzle_vector3(*handler.m_Normals[vtx][:3])
-        if deform_layer:
-            boneIndex = handler.m_BoneIndices[vtx]
-            if handler.m_BoneWeights:
-                boneWeight = handler.m_BoneWeights[vtx]
-            else:
-                # Default to 1 otherwise the bone would not have any effect on the skinning
-                # XXX: This is purly emprical to handle some edge cases.
-                boneWeight = [1.0 / len(boneIndex)] * len(boneIndex)
-            for i in range(len(boneIndex)):
-                vertex_group_index = boneIndex[i]
-                if not vertex_group_index in vert[deform_layer]:
-                    vert[deform_layer][vertex_group_index] = boneWeight[i]
-                vert[deform_layer][vertex_group_index] = max(
-                    vert[deform_layer][vertex_group_index], boneWeight[i]
-                )
-    bm.verts.ensure_lookup_table()
-    # Indices
-    trigs = handler.get_triangles()
-    for submesh in trigs:
-        for idx, trig in enumerate(submesh):
-            try:
-                face = bm.faces.new(
-                    [bm.verts[i] for i in reversed(trig)]
-                )  # UV rewinding
-                face.smooth = True
-            except ValueError as e:
-                # logger.warning("Invalid face index %d (%s) - discarded." % (idx, e))
-                pass
-    bm.to_mesh(mesh)
+        groups = [obj.vertex_groups.new(name=boneName) for boneName in vertex_groups]
+        if arrays.bone_indices is not None:
+            for group, weight, vertices in weight_batches(
+                *skin_weights(arrays.bone_indices, arrays.bone_weights, len(groups))
+            ):
+                groups[group].add(vertices, weight, "REPLACE")
 
     # UV Map
-    def try_add_uv_map(name, set_active=False):
-        src_layer = getattr(handler, "m_" + name)
-        if src_layer:
-            uv_layer = mesh.uv_layers.new()
-            uv_layer.name = name
-            if set_active:
-                mesh.uv_layers.active = uv_layer
-            for face in mesh.polygons:
-                for vtx, loop in zip(face.vertices, face.loop_indices):
-                    # XXX: UVs with >2 components HOW?
-                    uv_layer.data[loop].uv = src_layer[vtx][:2]
-
-    try_add_uv_map("UV0", set_active=True)
-    for i in range(1, 8):
-        # Unity supports up to 8 UV maps
-        try_add_uv_map("UV" + str(i))
+    # Unity supports up to 8 UV maps
+    for index, uvs in arrays.loop_uvs(triangles.ravel()).items():
+        uv_layer = mesh.uv_layers.new(name="UV" + str(index))
+        uv_layer.data.foreach_set("uv", uvs.ravel())
+        if index == 0:
+            mesh.uv_layers.active = uv_layer
 
     # Vertex Color
-    if handler.m_Colors:
+    if arrays.colors is not None:
         vertex_color = mesh.color_attributes.new(
             name="Vertex Color", type="FLOAT_COLOR", domain="POINT"
         )
-        for vtx in range(0, handler.m_VertexCount):
-            vertex_color.data[vtx].color = handler.m_Colors[vtx]
+        vertex_color.data.foreach_set(
+            "color", arrays.colors[:, :4].astype(np.float32).ravel()
+        )
     # Assign vertex normals
-    try:
-        mesh.create_normals_split()
-        mesh.use_auto_smooth = True
-    except:
-        pass  # 4.2.0 Alpha removed these somehow
-    normals = [(0, 0, 0) for l in mesh.loops]
-    for i, loop in enumerate(mesh.loops):
-        normal = bm.verts[loop.vertex_index].normal
-        normal.normalize()
-        normals[i] = normal
-    mesh.normals_split_custom_set(normals)
+    # Blender always generates normals automatically
+    # Custom normals needs a bit more work
+    if arrays.normals is not None:
+        set_custom_normals(
+            mesh, normalize_vectors(swizzle_positions(arrays.normals[:, :3]))
+        )
     # Blend Shape / Shape Keys
     if data.m_Shapes.channels:
         obj.shape_key_add(name="Basis")
@@ -461,7 +473,6 @@ def import_mesh_data(
         mesh[KEY_SHAPEKEY_HASH_TABEL] = json.dumps(
             keyshape_hash_tbl, ensure_ascii=False
         )
-    bm.free()
     return mesh, obj
 
 
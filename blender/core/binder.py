@@ -0,0 +1,81 @@
+# Binding animation curves to bones by the CRC32 of their paths
+import zlib
+from logging import getLogger
+from typing import Dict, Iterable, Tuple, Union
+
+logger = getLogger("sssekai")
+
+
+def crc32(name: str) -> int:
+    return zlib.crc32(name.encode("utf-8"))
+
+
+class PathBinder(dict):
+    """CRC32(Path):Bone Name table that also binds paths with extra or missing root nodes
+
+    Clips authored against a differently rooted skeleton bind to paths like `Spine/Chest`
+    or `Root/Hips/Spine/Chest` where the bone is at `Hips/Spine/Chest`. Their CRC32s can't be
+    taken apart, so the CRC32 of every suffix of every path, with and without `root` in front,
+    is precomputed instead. See `bind`
+
+    The table itself only holds the exact paths, so it can be used anywhere a plain
+    CRC32:Bone Name table is expected. Where bones share a path (i.e. siblings with the
+    same name), the first one is bound to it and the rest are logged. Every bone is
+    still kept in `bones`
+    """
+
+    # Path:Bone Name
+    paths: Dict[str, str]
+    # Bone Name:CRC32(Path), for every bone including the ones sharing a path
+    bones: Dict[str, int]
+    # Name of the root node, which the paths are relative to
+    root: str
+    # CRC32:(Bone Name, Path components matched). Bone Name is None where that's ambiguous
+    suffixes: Dict[int, Tuple[str, int]]
+
+    def __init__(
+        self,
+        paths: Union[Dict[str, str], Iterable[Tuple[str, str]]],
+        root: str = None,
+    ):
+        """paths: Path:Bone Name, or (Path, Bone Name) pairs where paths may repeat"""
+        super().__init__()
+        self.paths = dict()
+        self.bones = dict()
+        self.root = root
+        self.suffixes = dict()
+        for path, bone in paths.items() if isinstance(paths, dict) else paths:
+            self.bones[bone] = crc32(path)
+            if path in self.paths:
+                logger.warning(
+                    "Bones %s and %s share the path %s. Binding it to %s"
+                    % (self.paths[path], bone, path, self.paths[path])
+                )
+                continue
+            self.paths[path] = bone
+            self[crc32(path)] = bone
+            names = path.split("/") if path else []
+            if root:
+                names.insert(0, root)
+            for i in range(len(names)):
+                self.add_suffix(crc32("/".join(names[i:])), bone, len(names) - i)
+
+    def add_suffix(self, crc: int, bone: str, length: int):
+        current = self.suffixes.get(crc, None)
+        if not current or current[1] < length:
+            self.suffixes[crc] = (bone, length)
+        elif current[1] == length and current[0] != bone:
+            # i.e. `Hand` of both `Left/Hand` and `Right/Hand`
+            self.suffixes[crc] = (None, length)
+
+    def bind(self, crc: int) -> str:
+        """Finds the bone for a curve's path CRC32
+
+        Exact paths come first. Otherwise the bone with the longest path that matches,
+        save for a node or more at the root, is used. None if there's no such bone, or
+        there's more than one.
+        """
+        bone = self.get(crc, None)
+        if bone is None:
+            bone, _ = self.suffixes.get(crc, (None, 0))
+        return bone
@@ -0,0 +1,147 @@
+import os, json, hashlib, tempfile
+from logging import getLogger
+from typing import BinaryIO, Callable, Dict, List
+from .unityfs import read_unityfs_header, unpack_unityfs
+
+logger = getLogger("sssekai")
+
+# Bump this whenever the layout of the cached files changes
+BUNDLE_CACHE_VERSION = 1
+# What a `.skip` marker counts as towards `max_size`, in bytes. Roughly the block it takes up on disk
+SKIP_MARKER_SIZE = 4096
+
+
+def open_file(path: str) -> BinaryIO:
+    return open(path, "rb")
+
+
+class BundleCache:
+    """Uncompressed copies of compressed UnityFS bundles, keyed by the SHA1 of their content
+
+    Cached copies are uncompressed UnityFS files as well, which `SSSekaiEnvironment` then
+    memory-maps. The least recently used copies are removed once the cache grows over `max_size`.
+    """
+
+    # Cache directory
+    path: str
+    # In bytes
+    max_size: int
+    # Path to (Size, Modified Time in ns, SHA1) of the files seen so far. Saves hashing them again
+    digests: Dict[str, List]
+    # Whether `digests` has changed since it's been saved. See `save`
+    dirty: bool
+
+    def __init__(self, path: str, max_size: int):
+        self.path = os.path.join(path, "v%d" % BUNDLE_CACHE_VERSION)
+        self.max_size = max_size
+        os.makedirs(self.path, exist_ok=True)
+        self.dirty = False
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.digests = json.load(f)
+        except FileNotFoundError:
+            self.digests = dict()
+        except Exception as e:
+            logger.warning("Discarding unreadable bundle cache index: %s" % e)
+            self.digests = dict()
+
+    @property
+    def index_path(self):
+        return os.path.join(self.path, "index.json")
+
+    def get_digest(self, path: str) -> str:
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        entry = self.digests.get(path, None)
+        if not entry or entry[0] != stat.st_size or entry[1] != stat.st_mtime_ns:
+            sha1 = hashlib.sha1()
+            with open(path, "rb") as f:
+                while chunk := f.read(1 << 20):
+                    sha1.update(chunk)
+            entry = [stat.st_size, stat.st_mtime_ns, sha1.hexdigest()]
+            self.digests[path] = entry
+            self.dirty = True
+        return entry[2]
+
+    def save(self):
+        """Saves the digests computed so far. Call this once a batch of files is done with"""
+        if self.dirty:
+            with open(self.index_path, "w", encoding="utf-8") as f:
+                json.dump(self.digests, f)
+            self.dirty = False
+
+    def get(self, path: str, open_f: Callable[[str], BinaryIO] = open_file) -> str:
+        """Finds, or creates, the uncompressed copy of the bundle at `path`
+
+        Args:
+            path (str): bundle file
+            open_f (Callable[[str], BinaryIO]): opens `path` for reading the bundle, i.e. with decryption
+
+        Returns:
+            str: path to the uncompressed copy. None if `path` isn't a compressed, unencrypted UnityFS file
+        """
+        cached = os.path.join(self.path, self.get_digest(path))
+        if os.path.exists(cached + ".skip"):
+            # For `cleanup`
+            os.utime(cached + ".skip")
+            return None
+        if os.path.exists(cached):
+            # For `cleanup`
+            os.utime(cached)
+            return cached
+        with open_f(path) as src:
+            try:
+                header = read_unityfs_header(src)
+            except ValueError:
+                header = None
+            if not header or header.is_encrypted or header.is_uncompressed:
+                open(cached + ".skip", "wb").close()
+                self.cleanup(keep=cached + ".skip")
+                self.save()
+                return None
+            logger.debug("Caching uncompressed bundle: %s" % path)
+            src.seek(0)
+            fd, temp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as dst:
+                    unpack_unityfs(src, dst)
+                os.replace(temp, cached)
+            except BaseException:
+                os.remove(temp)
+                raise
+        self.cleanup(keep=cached)
+        self.save()
+        return cached
+
+    def cleanup(self, keep: str = None):
+        """Removes the least recently used copies and `.skip` markers, except `keep`, until the cache fits in `max_size`
+
+        Digests whose copy (or marker) is gone are dropped as well
+        """
+        files = []
+        for entry in os.scandir(self.path):
+            if not entry.is_file():
+                continue
+            extension = os.path.splitext(entry.name)[1]
+            if extension == ".skip":
+                files.append((entry.stat().st_mtime, SKIP_MARKER_SIZE, entry.path))
+            elif not extension:
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        size = sum(file[1] for file in files)
+        kept = set()
+        for mtime, file_size, file in sorted(files):
+            if size > self.max_size and file != keep:
+                logger.debug("Evicting cached bundle: %s" % file)
+                try:
+                    os.remove(file)
+                    size -= file_size
+                    continue
+                except OSError as e:
+                    logger.warning("Failed to evict %s: %s" % (file, e))
+            kept.add(os.path.splitext(os.path.basename(file))[0])
+        for path in [
+            path for path, entry in self.digests.items() if entry[2] not in kept
+        ]:
+            del self.digests[path]
+            self.dirty = True
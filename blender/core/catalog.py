@@ -0,0 +1,177 @@
+# Searchable catalog of every object in a directory of asset bundles, kept in SQLite
+import os, sqlite3
+from dataclasses import dataclass
+from typing import Callable, List
+
+# Bump this whenever the schema changes. Older catalogs are then rebuilt from scratch.
+CATALOG_VERSION = 2
+
+CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime_ns INTEGER,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS objects (
+    file TEXT,
+    container TEXT,
+    path_id INTEGER,
+    class_id INTEGER,
+    name TEXT,
+    byte_size INTEGER,
+    root_path_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS hierarchies (
+    file TEXT,
+    container TEXT,
+    name TEXT,
+    path_id INTEGER,
+    game_object_path_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS objects_file ON objects (file);
+CREATE INDEX IF NOT EXISTS objects_name ON objects (name);
+CREATE INDEX IF NOT EXISTS objects_class_id ON objects (class_id);
+CREATE INDEX IF NOT EXISTS hierarchies_file ON hierarchies (file);
+"""
+
+
+@dataclass
+class CatalogObject:
+    file: str
+    container: str
+    path_id: int
+    class_id: int
+    name: str
+    byte_size: int
+    root_path_id: int
+
+
+@dataclass
+class CatalogHierarchy:
+    file: str
+    container: str
+    name: str
+    path_id: int
+    game_object_path_id: int
+
+
+def wildcard_to_like(pattern: str) -> str:
+    """Converts a `*` and `?` wildcard pattern to a LIKE pattern (escaped with `\\`)"""
+    pattern = pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return pattern.replace("*", "%").replace("?", "_")
+
+
+class AssetCatalog:
+    """SQLite catalog of the objects in a directory of asset bundles.
+
+    Use `update` to (re)scan the files that are new or changed, and `search` or
+    `search_hierarchies` to query it. Names are matched case-insensitively with `*` and `?`
+    wildcards, i.e. `*0474*`.
+    """
+
+    def __init__(self, path: str):
+        self.db = sqlite3.connect(path)
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != CATALOG_VERSION:
+            self.db.executescript(
+                "DROP TABLE IF EXISTS files;"
+                "DROP TABLE IF EXISTS objects;"
+                "DROP TABLE IF EXISTS hierarchies;"
+            )
+            self.db.execute("PRAGMA user_version = %d" % CATALOG_VERSION)
+        self.db.executescript(CATALOG_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def remove_file(self, path: str):
+        for table, column in (
+            ("files", "path"),
+            ("objects", "file"),
+            ("hierarchies", "file"),
+        ):
+            self.db.execute("DELETE FROM %s WHERE %s = ?" % (table, column), (path,))
+
+    def update(self, files: List[str], scan: Callable[[List[str]], List[dict]]) -> int:
+        """Brings the catalog up to date with `files`.
+
+        Files that are no longer in `files` are dropped, and only the new or changed ones are scanned.
+
+        Args:
+            files (List[str]): every file the catalog should cover
+            scan (Callable[[List[str]], List[dict]]): scans the given files with `list_objects`. See `scanner.scan_file`
+
+        Returns:
+            int: number of files scanned
+        """
+        known = {
+            path: (size, mtime_ns)
+            for path, size, mtime_ns in self.db.execute(
+                "SELECT path, size, mtime_ns FROM files"
+            )
+        }
+        signatures = dict()
+        for file in files:
+            stat = os.stat(file)
+            signatures[file] = (stat.st_size, stat.st_mtime_ns)
+        with self.db:
+            for path in known.keys() - signatures.keys():
+                self.remove_file(path)
+        outdated = [file for file in files if known.get(file) != signatures[file]]
+        if not outdated:
+            return 0
+        results = scan(outdated)
+        with self.db:
+            for result in results:
+                path = result["path"]
+                self.remove_file(path)
+                self.db.execute(
+                    "INSERT INTO files VALUES (?, ?, ?, ?)",
+                    (path, *signatures[path], result.get("error", None)),
+                )
+                self.db.executemany(
+                    "INSERT INTO objects VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    ((path, *obj) for obj in result["objects"]),
+                )
+                self.db.executemany(
+                    "INSERT INTO hierarchies VALUES (?, ?, ?, ?, ?)",
+                    # Without the CAB
+                    ((path, *hierarchy[:4]) for hierarchy in result["hierarchies"]),
+                )
+        return len(outdated)
+
+    def search(
+        self, pattern: str = "*", class_id: int = None, limit: int = 256
+    ) -> List[CatalogObject]:
+        """Finds objects whose name matches `pattern`, optionally of ClassID `class_id` only"""
+        query = "SELECT file, container, path_id, class_id, name, byte_size, root_path_id FROM objects WHERE name LIKE ? ESCAPE '\\'"
+        args = [wildcard_to_like(pattern)]
+        if class_id is not None:
+            query += " AND class_id = ?"
+            args.append(class_id)
+        query += " ORDER BY name LIMIT ?"
+        args.append(limit)
+        return [CatalogObject(*row) for row in self.db.execute(query, args)]
+
+    def search_hierarchies(
+        self, pattern: str = "*", containing_class_id: int = None, limit: int = 256
+    ) -> List[CatalogHierarchy]:
+        """Finds hierarchies whose name matches `pattern`
+
+        With `containing_class_id`, only the hierarchies with an object of that ClassID
+        under their root Transform are returned.
+        """
+        query = "SELECT file, container, name, path_id, game_object_path_id FROM hierarchies AS h WHERE name LIKE ? ESCAPE '\\'"
+        args = [wildcard_to_like(pattern)]
+        if containing_class_id is not None:
+            query += " AND EXISTS (SELECT 1 FROM objects AS o WHERE o.file = h.file AND o.root_path_id = h.path_id AND o.class_id = ?)"
+            args.append(containing_class_id)
+        query += " ORDER BY name LIMIT ?"
+        args.append(limit)
+        return [CatalogHierarchy(*row) for row in self.db.execute(query, args)]
@@ -5,6 +5,8 @@ DEFAULT_BONE_SIZE = 0.01
 KEY_HIERARCHY_BONE_PATHID = "sssekai_bone_hierarchy_pathid"
 KEY_HIERARCHY_BONE_NAME = "sssekai_bone_hierarchy_bonename"
 KEY_HIERARCHY_BONE_ROOT = "sssekai_bone_hierarchy_root"
+# Bone paths to bone names, on Armature objects. See `get_armature_path_table`
+KEY_HIERARCHY_BONE_PATH_TABLE = "sssekai_bone_hierarchy_path_tbl"
 # Hashes of names prefixed `blendShape.`
 KEY_SHAPEKEY_HASH_TABEL = "sssekai_shapekey_name_hash_tbl"
 
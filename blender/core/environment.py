@@ -0,0 +1,336 @@
+import io, os, gc, json, mmap, hashlib
+import UnityPy
+from logging import getLogger
+from typing import Dict, List, Set
+from UnityPy import Environment
+from UnityPy.environment import simplify_name
+from UnityPy.enums import ArchiveFlags, ArchiveFlagsOld
+from UnityPy.files import BundleFile, File, SerializedFile
+from UnityPy.helpers.ImportHelper import parse_file
+from UnityPy.streams import EndianBinaryReader
+from .scanner import list_files
+from .archive import (
+    ArchiveMember,
+    ArchiveReader,
+    list_archive,
+    split_archive_path,
+)
+from .bundle_cache import BundleCache
+from .unityfs import (
+    read_bundle_cabs,
+    read_unityfs_header,
+    read_unityfs_data,
+    uses_new_archive_flags,
+)
+from .utils import get_cache_path
+
+logger = getLogger("sssekai")
+
+# Bump this whenever the layout of the index changes
+CAB_INDEX_VERSION = 1
+# UnityPy versions (inclusive, exclusive) `load_file_direct` is known to fill in `BundleFile`s correctly with.
+# It sets some of UnityPy's internals by hand, so bundles are loaded through `BundleFile` itself on any other
+DIRECT_BUNDLE_UNITYPY_VERSIONS = ((1, 20), (1, 26))
+
+
+def supports_direct_bundles() -> bool:
+    """True if the installed UnityPy is one of `DIRECT_BUNDLE_UNITYPY_VERSIONS`"""
+    try:
+        version = tuple(map(int, UnityPy.__version__.split(".")[:2]))
+    except ValueError:
+        return False
+    low, high = DIRECT_BUNDLE_UNITYPY_VERSIONS
+    return low <= version < high and hasattr(BundleFile, "_uses_block_alignment")
+
+
+def index_folder_cabs(path: str) -> Dict[str, List[str]]:
+    """Indexes the CAB names of every file in `path`. See `read_bundle_cabs`
+
+    The index is cached on disk, so only new or changed files are read again.
+
+    Returns:
+        Dict[str, List[str]]: file path to CAB names
+    """
+    key = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+    cache_path = get_cache_path("cab_index", key + ".json")
+    cache = dict()
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+            if data["version"] == CAB_INDEX_VERSION:
+                cache = data["files"]
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning("Discarding unreadable CAB index %s: %s" % (cache_path, e))
+    # Path: (Size, Modified Time in ns, CAB names)
+    files = dict()
+    for file in list_files(path):
+        stat = os.stat(file)
+        entry = cache.get(file, None)
+        if not entry or entry[0] != stat.st_size or entry[1] != stat.st_mtime_ns:
+            try:
+                cabs = read_bundle_cabs(file)
+            except Exception as e:
+                logger.warning("Failed to index %s: %s" % (file, e))
+                cabs = []
+            entry = [stat.st_size, stat.st_mtime_ns, cabs]
+        files[file] = entry
+    if files != cache:
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CAB_INDEX_VERSION, "files": files}, f)
+    return {file: entry[2] for file, entry in files.items()}
+
+
+class SSSekaiEnvironment(Environment):
+    """UnityPy Environment that only loads files once they're needed
+
+    Files registered with `add_lazy_file` are loaded the first time one of their CABs
+    is referenced (i.e. by dereferencing a PPtr), or when `load_lazy_file` is called.
+    """
+
+    # Simplified CAB name to file path
+    lazy_cabs: Dict[str, str]
+    # Files that are loaded as dependencies. Their objects won't show up in `objects`
+    lazy_dependencies: Set[str]
+    # Memory-map the files loaded by `load_file_direct`. Otherwise they're read into memory
+    use_mmap: bool
+    # Threads to decompress bundle blocks with. See `decompress_blocks`
+    max_workers: int
+    # Compressed bundles loaded by path are read from their uncompressed copies in here, if set
+    bundle_cache: BundleCache
+    # Archive path to its members. See `load_archive_member`
+    archives: Dict[str, Dict[str, ArchiveMember]]
+    # Archive path to the reader its compressed members are read with. See `close_file`
+    archive_readers: Dict[str, ArchiveReader]
+    # File path to the memory map it's loaded from. See `close_file`
+    mmaps: Dict[str, mmap.mmap]
+
+    def __init__(
+        self,
+        path: str = None,
+        use_mmap: bool = True,
+        bundle_cache: BundleCache = None,
+        max_workers: int = None,
+    ):
+        if path and os.path.isfile(path):
+            path = os.path.dirname(path)
+        super().__init__(path=path)
+        self.lazy_cabs = dict()
+        self.lazy_dependencies = set()
+        self.use_mmap = use_mmap
+        self.bundle_cache = bundle_cache
+        self.max_workers = max_workers
+        self.archives = dict()
+        self.archive_readers = dict()
+        self.mmaps = dict()
+
+    def load_file(self, file, parent=None, name=None, is_dependency=False):
+        if isinstance(file, str) and not os.path.exists(file):
+            archive, member = split_archive_path(file)
+            if member:
+                return self.load_archive_member(
+                    file, archive, member, parent, is_dependency
+                )
+        if isinstance(file, str) and os.path.isfile(file):
+            source = file
+            if self.bundle_cache:
+                try:
+                    source = self.bundle_cache.get(file) or file
+                except Exception as e:
+                    logger.warning("Failed to cache %s: %s" % (file, e))
+            try:
+                f = self.load_file_direct(file, parent, is_dependency, source)
+                if f is not None:
+                    return f
+            except Exception as e:
+                logger.warning(
+                    "Failed to load %s directly, loading it normally: %s" % (file, e)
+                )
+            if source != file:
+                with open(source, "rb") as f:
+                    return super().load_file(f.read(), parent, file, is_dependency)
+        return super().load_file(file, parent, name, is_dependency)
+
+    def close_file(self, path: str):
+        """Closes the memory map the file at `path` was loaded from, if any. See `load_file_direct`
+
+        For archives, the reader of their compressed members is closed as well. See `load_archive_member`
+
+        Open mappings keep the file from being replaced or removed on Windows. The file
+        has to be dropped from the environment beforehand.
+        """
+        reader = self.archive_readers.pop(path, None)
+        if reader is not None:
+            reader.close()
+        f = self.mmaps.pop(path, None)
+        if f is None:
+            return
+        # Readers of the file's objects may still be around in reference cycles
+        gc.collect()
+        try:
+            f.close()
+        except BufferError:
+            logger.warning(
+                "%s is still in use. Its mapping is closed once it's released" % path
+            )
+
+    def close(self):
+        """Closes the memory maps of every file, and every archive reader. See `close_file`"""
+        for path in list(self.mmaps) + list(self.archive_readers):
+            self.close_file(path)
+
+    def list_archive(self, archive: str) -> Dict[str, ArchiveMember]:
+        if not archive in self.archives:
+            self.archives[archive] = list_archive(archive)
+        return self.archives[archive]
+
+    def load_archive_member(
+        self, path: str, archive: str, member: str, parent=None, is_dependency=False
+    ):
+        """Loads the `member` of the ZIP/TAR `archive` as `path`, without extracting the archive
+
+        Members stored as-is are loaded directly from the archive (see `load_file_direct`).
+        Compressed ones are read into memory, with the archive kept open until `close_file`.
+        """
+        info = self.list_archive(archive)[member]
+        if info.is_stored:
+            try:
+                f = self.load_file_direct(
+                    path, parent, is_dependency, archive, info.offset, info.size
+                )
+                if f is not None:
+                    return f
+            except Exception as e:
+                logger.warning(
+                    "Failed to load %s directly, loading it normally: %s" % (path, e)
+                )
+        if not archive in self.archive_readers:
+            self.archive_readers[archive] = ArchiveReader(archive)
+        data = self.archive_readers[archive].read(member)
+        return super().load_file(data, parent, path, is_dependency)
+
+    def load_file_direct(
+        self,
+        path: str,
+        parent=None,
+        is_dependency=False,
+        source: str = None,
+        offset: int = 0,
+        size: int = None,
+    ):
+        """Loads the file at `path` (or its copy at `source`) without going through UnityPy's readers
+
+        Uncompressed UnityFS bundles and plain SerializedFiles are loaded from a read-only memory
+        map, with their nodes sliced from the mapping directly. The file is never copied into
+        memory as a whole, and object data is only paged in once it's read. Without `use_mmap`,
+        the file is read into memory in one go instead.
+
+        Compressed UnityFS bundles are decompressed into a single buffer, with the blocks
+        decompressed concurrently. See `read_unityfs_data`
+
+        Mappings stay open for as long as the file is loaded. See `close_file`
+
+        With UnityPy versions other than `DIRECT_BUNDLE_UNITYPY_VERSIONS`, bundles are read by
+        UnityPy's `BundleFile` from the mapping instead.
+
+        Args:
+            offset (int): where the file starts in `source`, i.e. for archive members
+            size (int): size of the file. Defaults to the rest of `source`
+
+        Returns:
+            File: the loaded file, or None for the files this doesn't apply to (i.e. encrypted bundles)
+        """
+        with open(source or path, "rb") as f:
+            if size is None:
+                size = os.fstat(f.fileno()).st_size - offset
+            if size <= 0:
+                return None
+            if self.use_mmap:
+                # Mappings have to start at multiples of ALLOCATIONGRANULARITY
+                base = offset - offset % mmap.ALLOCATIONGRANULARITY
+                start = offset - base
+                data = f = mmap.mmap(
+                    f.fileno(), start + size, offset=base, access=mmap.ACCESS_READ
+                )
+            else:
+                f.seek(offset)
+                start, data = 0, f.read(size)
+                f = io.BytesIO(data)
+        try:
+            f.seek(start)
+            header = read_unityfs_header(f)
+            if header.is_encrypted:
+                f.close()
+                return None
+        except ValueError:
+            header = None
+        except Exception:
+            f.close()
+            raise
+        if header and not supports_direct_bundles():
+            # Left to UnityPy's own `BundleFile`, over the mapping
+            header = None
+        if header and not header.is_uncompressed:
+            try:
+                view = memoryview(read_unityfs_data(f, header, self.max_workers))
+            finally:
+                # Nothing refers to the mapping past decompression
+                f.close()
+            data_offset = 0
+        else:
+            self.close_file(path)
+            if self.use_mmap:
+                self.mmaps[path] = f
+            view = memoryview(data)
+            data_offset = header.data_offset if header else start
+        parent = parent or self
+        if not header:
+            return super().load_file(view[start:], parent, path, is_dependency)
+        bundle = BundleFile.__new__(BundleFile)
+        File.__init__(bundle, parent=parent, name=path, is_dependency=is_dependency)
+        bundle.signature = "UnityFS"
+        bundle.version = header.version
+        bundle.version_player = header.version_player
+        bundle.version_engine = header.version_engine
+        if uses_new_archive_flags(header.version_engine):
+            bundle.dataflags = ArchiveFlags(header.flags)
+        else:
+            bundle.dataflags = ArchiveFlagsOld(header.flags)
+        bundle.decryptor = None
+        bundle._uses_block_alignment = header.version >= 7
+        bundle._block_info_flags = header.blocks[0].flags if header.blocks else 0
+        for node in header.nodes:
+            offset = data_offset + node.offset
+            reader = EndianBinaryReader(
+                view[offset : offset + node.size], offset=offset
+            )
+            f = parse_file(reader, bundle, node.path, is_dependency=is_dependency)
+            if isinstance(f, (EndianBinaryReader, SerializedFile)):
+                self.register_cab(node.path, f)
+            f.flags = node.flags
+            bundle.files[node.path] = f
+        self.files[path] = bundle
+        return bundle
+
+    def add_lazy_file(self, path: str, cabs: List[str], is_dependency: bool = False):
+        for cab in cabs:
+            self.lazy_cabs[simplify_name(cab)] = path
+        if is_dependency:
+            self.lazy_dependencies.add(path)
+
+    def add_lazy_folder(self, path: str, is_dependency: bool = True):
+        """Indexes every file in `path` (see `index_folder_cabs`) to be loaded lazily"""
+        for file, cabs in index_folder_cabs(path).items():
+            self.add_lazy_file(file, cabs, is_dependency)
+
+    def load_lazy_file(self, path: str):
+        if not path in self.files:
+            logger.debug("Loading file: %s" % path)
+            self.load_file(path, is_dependency=path in self.lazy_dependencies)
+
+    def find_file(self, name: str, is_dependency: bool = True):
+        path = self.lazy_cabs.get(simplify_name(name), None)
+        if path and not self.get_cab(name):
+            self.load_lazy_file(path)
+        return super().find_file(name, is_dependency)
@@ -1,8 +1,15 @@
-import bpy
-from typing import Dict
+import bpy, json
+import numpy as np
+from typing import Dict, Callable, Hashable
 from .math import blMatrix, blVector
 from .utils import get_addon_relative_path
-from .consts import DEFAULT_BONE_SIZE
+from .binder import PathBinder
+from .transforms import pose_basis_matrices
+from .consts import (
+    DEFAULT_BONE_SIZE,
+    KEY_HIERARCHY_BONE_NAME,
+    KEY_HIERARCHY_BONE_PATH_TABLE,
+)
 from .. import logger, register_wm_props, register_class, sssekai_global
 from bpy.app.translations import pgettext as T
 
@@ -28,6 +35,28 @@ def get_enum_search_op_name(wm_name: str):
     return f"search.{wm_name}"
 
 
+def versioned_enum_items(
+    version: Callable[[bpy.types.Context], Hashable],
+    build: Callable[[bpy.types.Context], list],
+):
+    """Wraps `build` into an EnumProperty `items` callback, which only calls it again once `version` changes.
+
+    The last items are kept referenced, as Blender requires for dynamic enums.
+    Both `version` and `build` should only read precomputed state. They're called on every redraw.
+    """
+    cache = [None, []]
+
+    def items(self, context):
+        if context is None:
+            return cache[1]
+        key = version(context)
+        if key != cache[0]:
+            cache[0], cache[1] = key, build(context)
+        return cache[1]
+
+    return items
+
+
 def register_serachable_enum(wm_name: str = "", **kwargs):
     @register_class
     class FakeEnumSearchOperator(bpy.types.Operator):
@@ -251,6 +280,32 @@ def apply_action(
         strip.action_frame_start = max(0, frame_begin)
 
 
+def set_custom_normals(mesh: bpy.types.Mesh, normals: np.ndarray):
+    """Sets the custom split normals of `mesh` from (N,3) unit vertex normals
+
+    Before 4.1, custom normals have to be enabled with `use_auto_smooth`,
+    and split normals created beforehand. Both are gone since.
+    """
+    if bpy.app.version < (4, 1, 0):
+        mesh.create_normals_split()
+        mesh.use_auto_smooth = True
+    mesh.normals_split_custom_set_from_vertices(normals)
+
+
+def get_armature_path_table(obj: bpy.types.Object) -> PathBinder:
+    """Returns the bone path table saved on an Armature imported by `import_scene_hierarchy`
+
+    Paths are relative to the root of the hierarchy, which is at CRC32 0. None if there isn't one.
+    Tables saved before every bone was kept are Path:Bone Name objects, which are read as well.
+    """
+    if not KEY_HIERARCHY_BONE_PATH_TABLE in obj:
+        return None
+    return PathBinder(
+        json.loads(obj[KEY_HIERARCHY_BONE_PATH_TABLE]),
+        obj.get(KEY_HIERARCHY_BONE_NAME, None),
+    )
+
+
 def editbone_children_recursive(root: bpy.types.EditBone):
     """Yields a tuple of (parent, child, depth) for children of a edit bone.
 
@@ -286,22 +341,23 @@ def apply_pose_matrix(
 ):
     """Applies a pose matrix to an armature object
 
+    Modes are only switched once per pass. Pose Mode bases are computed for all bones
+    at once, see `pose_basis_matrices`
+
     Args:
         dest (bpy.types.Object): target armature object
         pose_matrix (Dict[str, blMatrix]): bone name to pose TRS matrix in Armature (World) space
         edit_mode (bool, optional): apply in Edit Mode. otherwise done in Pose Mode. this resets the pose-space transforms. Defaults to False.
     """
     bpy.context.view_layer.objects.active = dest
-    bpy.ops.object.mode_set(mode="EDIT")
-    edit_space = {bone.name: bone.matrix for bone in dest.data.edit_bones}
     if clear_pose:
         bpy.ops.object.mode_set(mode="POSE")
         bpy.ops.pose.select_all(action="SELECT")
         bpy.ops.pose.transforms_clear()
         bpy.ops.pose.select_all(action="DESELECT")
-    for bone_name, M_final in pose_matrix.items():
-        if edit_mode:
-            bpy.ops.object.mode_set(mode="EDIT")
+    bpy.ops.object.mode_set(mode="EDIT")
+    if edit_mode:
+        for bone_name, M_final in pose_matrix.items():
             ebone = dest.data.edit_bones.get(bone_name)
             if not ebone:
                 logger.warning(f"Bone {bone_name} not found in edit mode.")
@@ -310,25 +366,26 @@ def apply_pose_matrix(
             ebone.tail = M_final @ blVector((0, 1, 0))
             ebone.length = DEFAULT_BONE_SIZE
             ebone.align_roll(M_final @ blVector((0, 0, 1)) - ebone.head)
-        else:
-            bpy.ops.object.mode_set(mode="POSE")
-            pbone = dest.pose.bones.get(bone_name)
-            if not pbone:
-                logger.warning(f"Bone {bone_name} not found in pose mode.")
-                continue
-            M_edit = edit_space[pbone.name]
-            M_parent = (
-                edit_space[pbone.parent.name] if pbone.parent else blMatrix.Identity(4)
-            )
-            M_local = M_parent.inverted() @ M_edit
-            M_final_parent = (
-                pose_matrix.get(pbone.parent.name, blMatrix.Identity(4))
-                if pbone.parent
-                else blMatrix.Identity(4)
-            )
-            M_final_local = M_final_parent.inverted() @ M_final
-            # Apply pose specified in the hierarchy
-            # PoseBone = EditBone^-1 * Final
-            # Also applies to local space
-            M_pose = M_local.inverted() @ M_final_local
-            pbone.matrix_basis = M_pose
+        return
+    ebones = list(dest.data.edit_bones)
+    index = {ebone.name: i for i, ebone in enumerate(ebones)}
+    parents = np.array(
+        [index[ebone.parent.name] if ebone.parent else -1 for ebone in ebones],
+        dtype=np.int32,
+    ).reshape(-1)
+    edit = np.array([ebone.matrix for ebone in ebones], dtype=np.float64).reshape(
+        -1, 4, 4
+    )
+    # Bones without a pose (i.e. parents of the posed ones) stay where they are
+    final = np.broadcast_to(np.eye(4), edit.shape).copy()
+    for bone_name, M_final in pose_matrix.items():
+        if bone_name in index:
+            final[index[bone_name]] = M_final
+    basis = pose_basis_matrices(edit, final, parents)
+    bpy.ops.object.mode_set(mode="POSE")
+    for bone_name in pose_matrix:
+        pbone = dest.pose.bones.get(bone_name)
+        if not pbone or not bone_name in index:
+            logger.warning(f"Bone {bone_name} not found in pose mode.")
+            continue
+        pbone.matrix_basis = blMatrix(basis[index[bone_name]].tolist())
@@ -0,0 +1,395 @@
+# Mesh data as NumPy arrays, ready for `foreach_set`
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, Generator, List, Tuple
+from UnityPy.classes import Mesh
+from UnityPy.enums.MeshTopology import MeshTopology
+from UnityPy.helpers.MeshHelper import MeshHandler
+from UnityPy.helpers.ResourceReader import get_resource_data
+
+# (Struct type, Normalized) of the vertex formats. See `VERTEX_FORMAT_STRUCT_TYPE_MAP` in UnityPy
+# Normalized formats are mapped to [0,1] ([-1,1] if signed), unlike in `MeshHandler`
+VERTEX_CHANNEL_FORMATS = {
+    # Before 2017. Float, Float16, Color, Byte, UInt32
+    0: [("f", False), ("e", False), ("B", True), ("B", False), ("I", False)],
+    # 2017 up to 2019. Same as the ones below, with Color after Float16
+    2017: [
+        ("f", False),
+        ("e", False),
+        ("B", True),
+        ("B", True),
+        ("b", True),
+        ("H", True),
+        ("h", True),
+        ("B", False),
+        ("b", False),
+        ("H", False),
+        ("h", False),
+        ("I", False),
+        ("i", False),
+    ],
+    # 2019 and up. Float, Float16, UNorm8, SNorm8, UNorm16, SNorm16, (U/S)Int8, 16, 32
+    2019: [
+        ("f", False),
+        ("e", False),
+        ("B", True),
+        ("b", True),
+        ("H", True),
+        ("h", True),
+        ("B", False),
+        ("b", False),
+        ("H", False),
+        ("h", False),
+        ("I", False),
+        ("i", False),
+    ],
+}
+# Vertex channel to `MeshArrays` attribute. See `MeshHandler.assign_channel_vertex_data`
+VERTEX_CHANNELS_2018 = ["positions", "normals", "tangents", "colors"]
+VERTEX_CHANNELS_2018 += ["uv%d" % i for i in range(8)]
+VERTEX_CHANNELS_2018 += ["bone_weights", "bone_indices"]
+VERTEX_CHANNELS_5 = ["positions", "normals", "colors", "uv0", "uv1", "uv2", "uv3"]
+VERTEX_CHANNELS_5 += ["tangents"]
+
+
+def filter_triangles(triangles: np.ndarray, vertex_count: int) -> np.ndarray:
+    """Rewinds (N,3) Unity triangles for Blender and drops the ones Blender would reject
+
+    Dropped are triangles that reference vertices out of range, that use a vertex more than
+    once, and repeats of a triangle over the same vertices (the first one is kept).
+
+    Returns:
+        np.ndarray: (M,3) triangles, in their original order
+    """
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)[:, ::-1]
+    a, b, c = triangles.T
+    valid = (triangles.min(axis=1) >= 0) & (triangles.max(axis=1) < vertex_count)
+    valid &= (a != b) & (b != c) & (a != c)
+    triangles = triangles[valid]
+    _, first = np.unique(np.sort(triangles, axis=1), axis=0, return_index=True)
+    return np.ascontiguousarray(triangles[np.sort(first)], dtype=np.int32)
+
+
+def normalize_vectors(vectors: np.ndarray) -> np.ndarray:
+    """(N,3) float32 unit vectors. Zero length vectors stay zero, like `Vector.normalized`"""
+    vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, 3)
+    lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, lengths, out=np.zeros_like(vectors), where=lengths > 0)
+
+
+def skin_weights(
+    bone_indices: np.ndarray,
+    bone_weights: np.ndarray = None,
+    group_count: int = None,
+    max_influences: int = 0,
+    normalize: bool = False,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(vertex, group, weight) triplets from (N,K) bone indices and weights, sorted by group and weight
+
+    Duplicate influences of a bone on a vertex are merged (the largest weight is kept), and zero
+    weights, as well as bones outside of `group_count`, are dropped.
+
+    Args:
+        bone_weights (np.ndarray): Defaults to 1/K for every influence, otherwise the bone would not have any effect on the skinning
+        group_count (int): number of vertex groups. Defaults to no limit
+        max_influences (int): keep only the largest this many influences per vertex. 0 keeps all of them
+        normalize (bool): rescale the weights of each vertex to add up to 1
+    """
+    bone_indices = np.asarray(bone_indices, dtype=np.int64)
+    count, influences = bone_indices.shape
+    if bone_weights is None:
+        # XXX: This is purly emprical to handle some edge cases.
+        bone_weights = np.full((count, influences), 1.0 / max(influences, 1))
+    vertices = np.repeat(np.arange(count, dtype=np.int64), influences)
+    groups = bone_indices.ravel()
+    weights = np.asarray(bone_weights, dtype=np.float32)[:, :influences].ravel()
+    valid = (groups >= 0) & (weights > 0)
+    if group_count is not None:
+        valid &= groups < group_count
+    vertices, groups, weights = vertices[valid], groups[valid], weights[valid]
+    # Merge duplicates, by the largest weight
+    keys = vertices * (groups.max(initial=0) + 1) + groups
+    order = np.argsort(keys, kind="stable")
+    keys, vertices, groups = keys[order], vertices[order], groups[order]
+    first = np.flatnonzero(np.diff(keys, prepend=-1))
+    weights = np.maximum.reduceat(weights[order], first) if len(first) else weights
+    vertices, groups = vertices[first], groups[first]
+    if max_influences:
+        order = np.lexsort((-weights, vertices))
+        vertices, groups, weights = vertices[order], groups[order], weights[order]
+        starts = np.flatnonzero(np.diff(vertices, prepend=-1))
+        ranks = np.arange(len(vertices)) - np.repeat(
+            starts, np.diff(starts, append=len(vertices))
+        )
+        keep = ranks < max_influences
+        vertices, groups, weights = vertices[keep], groups[keep], weights[keep]
+    if normalize:
+        totals = np.bincount(vertices, weights, minlength=count)
+        weights = (weights / totals[vertices]).astype(np.float32)
+    order = np.lexsort((vertices, weights, groups))
+    return vertices[order], groups[order], weights[order]
+
+
+def weight_batches(
+    vertices: np.ndarray, groups: np.ndarray, weights: np.ndarray
+) -> Generator[Tuple[int, float, List[int]], None, None]:
+    """Yields (group, weight, vertices) for runs of the same group and weight in the output of `skin_weights`,
+    i.e. for one `VertexGroup.add` call each"""
+    if not len(vertices):
+        return
+    starts = np.flatnonzero(
+        (np.diff(groups, prepend=-1) != 0) | (np.diff(weights, prepend=-1) != 0)
+    )
+    ends = np.append(starts[1:], len(vertices))
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        yield int(groups[start]), float(weights[start]), vertices[start:end].tolist()
+
+
+def channel_format(format: int, version: Tuple[int, ...]) -> Tuple[str, bool]:
+    """(Struct type, Normalized) of a vertex channel's `format`. See `VERTEX_CHANNEL_FORMATS`"""
+    if version[0] < 2017:
+        return VERTEX_CHANNEL_FORMATS[0][format]
+    if version[0] < 2019:
+        return VERTEX_CHANNEL_FORMATS[2017][format]
+    return VERTEX_CHANNEL_FORMATS[2019][format]
+
+
+def read_channel(
+    data,
+    count: int,
+    offset: int,
+    stride: int,
+    dimension: int,
+    dtype: str,
+    normalized: bool = False,
+    endian: str = "<",
+) -> np.ndarray:
+    """(count,dimension) view of a channel interleaved in a vertex stream, over the raw `data`
+
+    The view shares `data`'s memory, i.e. no copy is made, except for `normalized`
+    formats which are converted to floats in [0,1] ([-1,1] if signed).
+
+    Args:
+        offset (int): byte offset of the channel's first component, i.e. stream + channel offset
+        stride (int): bytes between vertices in the stream
+    """
+    dtype = np.dtype(dtype).newbyteorder(endian)
+    array = np.ndarray(
+        (count, dimension),
+        dtype,
+        buffer=data,
+        offset=offset,
+        strides=(stride, dtype.itemsize),
+    )
+    if normalized:
+        info = np.iinfo(dtype)
+        array = np.maximum(array / np.float32(info.max), np.float32(-1))
+    return array
+
+
+def read_indices(data, use_16bit_indices: bool, endian: str = "<") -> np.ndarray:
+    """(N,) view of a raw index buffer"""
+    dtype = np.dtype(np.uint16 if use_16bit_indices else np.uint32).newbyteorder(endian)
+    return np.frombuffer(data, dtype, len(data) // dtype.itemsize)
+
+
+def topology_triangles(
+    indices: np.ndarray, topology: int, version: Tuple[int, ...]
+) -> np.ndarray:
+    """(M,3) triangles from the `indices` of a submesh. See `MeshHandler.get_triangles`"""
+    indices = indices.astype(np.int64)
+    if topology == MeshTopology.Triangles:
+        return indices[: len(indices) // 3 * 3].reshape(-1, 3)
+    if version[0] < 4 or topology == MeshTopology.TriangleStrip:
+        a, b, c = indices[:-2], indices[1:-1], indices[2:]
+        # Strips flip their winding every other triangle
+        odd = np.arange(len(a)) & 1 == 1
+        triangles = np.stack((np.where(odd, b, a), np.where(odd, a, b), c), axis=-1)
+        # ...and are stitched together with degenerate ones
+        return triangles[(a != b) & (a != c) & (b != c)]
+    if topology == MeshTopology.Quads:
+        a, b, c, d = indices[: len(indices) // 4 * 4].reshape(-1, 4).T
+        return np.stack((a, b, c, a, c, d), axis=-1).reshape(-1, 3)
+    raise ValueError("Failed getting triangles. Submesh topology is lines or points.")
+
+
+@dataclass
+class MeshArrays:
+    """A Unity Mesh's vertex streams and index buffer, decoded into NumPy arrays
+
+    Channels the mesh doesn't have are None. Where the format allows, the arrays are views
+    over the mesh's raw vertex data. See `from_mesh`
+    """
+
+    vertex_count: int = 0
+    # (N,3) Unity coordinates
+    positions: np.ndarray = None
+    # (N,3). Some meshes store (N,4), with the 4th component always 0
+    normals: np.ndarray = None
+    # (N,4)
+    tangents: np.ndarray = None
+    # (N,4) RGBA in [0,1]
+    colors: np.ndarray = None
+    # (N,2). Up to 8 UV maps. Can have up to 4 components
+    uv0: np.ndarray = None
+    uv1: np.ndarray = None
+    uv2: np.ndarray = None
+    uv3: np.ndarray = None
+    uv4: np.ndarray = None
+    uv5: np.ndarray = None
+    uv6: np.ndarray = None
+    uv7: np.ndarray = None
+    # (N,K) K bone influences per vertex
+    bone_indices: np.ndarray = None
+    bone_weights: np.ndarray = None
+    # (M,3) triangles of each submesh, in Unity's winding
+    submeshes: List[np.ndarray] = field(default_factory=list)
+
+    @property
+    def uvs(self) -> Dict[int, np.ndarray]:
+        """UV Map index to the UVs, for the UV maps the mesh has"""
+        return {
+            i: getattr(self, "uv%d" % i)
+            for i in range(8)
+            if getattr(self, "uv%d" % i) is not None
+        }
+
+    def loop_uvs(self, loops: np.ndarray) -> Dict[int, np.ndarray]:
+        """UV Map index to the (L,2) UVs of each loop, for `foreach_set("uv", ...)`
+
+        UV maps that are all zero (i.e. unused lightmap UVs) are skipped.
+
+        Args:
+            loops (np.ndarray): (L,) vertex index of each loop
+        """
+        result = dict()
+        for index, uv in self.uvs.items():
+            uv = uv[:, :2]
+            if not uv.any():
+                continue
+            result[index] = np.ascontiguousarray(uv.take(loops, axis=0), np.float32)
+        return result
+
+    @property
+    def triangles(self) -> np.ndarray:
+        """(M,3) triangles of all submeshes"""
+        if not self.submeshes:
+            return np.empty((0, 3), dtype=np.int64)
+        return np.concatenate(self.submeshes)
+
+    @staticmethod
+    def from_handler(handler: MeshHandler):
+        """Arrays from a `MeshHandler` that has been `process`ed already, i.e. for compressed meshes"""
+        arrays = MeshArrays(handler.m_VertexCount)
+        for name, src in [
+            ("positions", "m_Vertices"),
+            ("normals", "m_Normals"),
+            ("tangents", "m_Tangents"),
+            ("colors", "m_Colors"),
+            ("bone_indices", "m_BoneIndices"),
+            ("bone_weights", "m_BoneWeights"),
+        ] + [("uv%d" % i, "m_UV%d" % i) for i in range(8)]:
+            value = getattr(handler, src)
+            if value:
+                setattr(arrays, name, np.asarray(value[: handler.m_VertexCount]))
+        if handler.m_IndexBuffer:
+            arrays.submeshes = [
+                np.array(submesh, dtype=np.int64).reshape(-1, 3)
+                for submesh in handler.get_triangles()
+            ]
+        return arrays
+
+    @staticmethod
+    def from_mesh(mesh: Mesh, version: Tuple[int, ...] = None, endian: str = "<"):
+        """Decodes the vertex channels and index buffer of `mesh` without `MeshHandler`'s per-vertex
+        Python lists. Compressed meshes, and the ones older than 5.0, still go through `MeshHandler`.
+        """
+        version = version or mesh.object_reader.version
+        vertex_data = mesh.m_VertexData
+        if (
+            version[0] < 5
+            or mesh.m_MeshCompression
+            or not vertex_data.m_VertexCount
+            or not (vertex_data.m_DataSize or mesh.m_StreamData.path)
+        ):
+            handler = MeshHandler(mesh, version, endian)
+            handler.process()
+            return MeshArrays.from_handler(handler)
+        # See `MeshHandler.process`
+        handler = MeshHandler(mesh, version, endian)
+        channels = vertex_data.m_Channels
+        streams = handler.get_streams(channels, vertex_data.m_VertexCount)
+        data = vertex_data.m_DataSize
+        if mesh.m_StreamData and mesh.m_StreamData.path:
+            data = get_resource_data(
+                mesh.m_StreamData.path,
+                mesh.object_reader.assets_file,
+                mesh.m_StreamData.offset,
+                mesh.m_StreamData.size,
+            )
+        if version[0] >= 2018:
+            names = VERTEX_CHANNELS_2018
+        else:
+            names = VERTEX_CHANNELS_5
+        arrays = MeshArrays(vertex_data.m_VertexCount)
+        for index, channel in enumerate(channels):
+            dimension = channel.dimension & 0xF
+            if not dimension:
+                continue
+            stream = streams[channel.stream]
+            if not stream.channelMask & (1 << index):
+                continue
+            if version[0] < 2018 and names[index] == "colors" and channel.format == 2:
+                # kChannelFormatColor. Always RGBA32
+                dimension = 4
+            dtype, normalized = channel_format(channel.format, version)
+            setattr(
+                arrays,
+                names[index],
+                read_channel(
+                    data,
+                    arrays.vertex_count,
+                    stream.offset + channel.offset,
+                    stream.stride,
+                    dimension,
+                    dtype,
+                    normalized,
+                    endian,
+                ),
+            )
+        if arrays.bone_weights is None and mesh.m_Skin:
+            # Unity 5.x up to 2018.1 keep them apart from the vertex data. See `MeshHandler.copy_from_mesh`
+            skin = mesh.m_Skin[: arrays.vertex_count]
+            arrays.bone_indices = np.array(
+                [
+                    (s.boneIndex_0_, s.boneIndex_1_, s.boneIndex_2_, s.boneIndex_3_)
+                    for s in skin
+                ],
+                dtype=np.uint32,
+            )
+            arrays.bone_weights = np.array(
+                [(s.weight_0_, s.weight_1_, s.weight_2_, s.weight_3_) for s in skin],
+                dtype=np.float32,
+            )
+        if mesh.m_IndexBuffer:
+            if mesh.m_Use16BitIndices is not None:
+                use_16bit_indices = bool(mesh.m_Use16BitIndices)
+            elif version >= (2017, 4) or (
+                version[:2] == (2017, 3) and mesh.m_MeshCompression == 0
+            ):
+                use_16bit_indices = mesh.m_IndexFormat == 0
+            else:
+                use_16bit_indices = True
+            # UnityPy reads the buffer as a list of bytes
+            indices = read_indices(bytes(mesh.m_IndexBuffer), use_16bit_indices, endian)
+            index_size = indices.itemsize
+            for submesh in mesh.m_SubMeshes:
+                first = submesh.firstByte // index_size
+                arrays.submeshes.append(
+                    topology_triangles(
+                        indices[first : first + submesh.indexCount],
+                        submesh.topology,
+                        version,
+                    )
+                )
+        return arrays
@@ -0,0 +1,294 @@
+# Bundle scanner that runs outside of Blender's main interpreter
+# NOTE: This module is also executed as a standalone script (see `run_scanner`). Do NOT import
+# `bpy` or anything from the addon here.
+import os, re, sys, json, struct, tempfile, subprocess
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Callable, Tuple
+
+# Serialized sizes of the Transform fields before `m_Children`, and of a PPtr (SerializedFile version 14+)
+TRANSFORM_HEADER_SIZE = 12 + 4 * (4 + 3 + 3)
+PPTR_SIZE = 12
+
+
+def list_files(path: str) -> List[str]:
+    """Lists every file in `path` recursively, the same way `UnityPy.load` would"""
+    if os.path.isfile(path):
+        return [path]
+    return [os.path.join(root, f) for root, dirs, files in os.walk(path) for f in files]
+
+
+def peek_transform(obj) -> Tuple[int, int, List[int]]:
+    """Reads the GameObject, father and children PathIDs of a Transform (or RectTransform)
+    straight from its serialized data, without constructing the object.
+
+    Layout: m_GameObject (PPtr), m_LocalRotation, m_LocalPosition, m_LocalScale, m_Children (PPtr[]),
+    m_Father (PPtr), and then the RectTransform fields if any.
+
+    Returns:
+        Tuple[int, int, List[int]]: (GameObject PathID, father PathID, children PathIDs). None if
+        the data doesn't have the layout above, read the object instead then.
+    """
+    from UnityPy.enums import ClassIDType
+
+    if obj.assets_file.header.version < 14 or obj.byte_size < TRANSFORM_HEADER_SIZE + 4:
+        return None
+    endian = obj.reader.endian
+    obj.reset()
+    data = obj.reader.read_bytes(obj.byte_size)
+    (game_object,) = struct.unpack_from(endian + "q", data, 4)
+    (count,) = struct.unpack_from(endian + "i", data, TRANSFORM_HEADER_SIZE)
+    offset = TRANSFORM_HEADER_SIZE + 4
+    size = offset + (count + 1) * PPTR_SIZE
+    if count < 0 or size > len(data):
+        return None
+    # RectTransform has more fields after m_Father
+    if obj.type == ClassIDType.Transform and size != len(data):
+        return None
+    pptrs = struct.unpack_from(endian + "iq" * (count + 1), data, offset)
+    children = list(pptrs[1 : 2 * count : 2])
+    return game_object, pptrs[-1], children
+
+
+def peek_game_object(obj) -> int:
+    """Reads the GameObject PathID of a Component straight from its serialized data. See `peek_transform`
+
+    Returns:
+        int: the PathID, or None if the data doesn't have the layout of a Component
+    """
+    if obj.assets_file.header.version < 14 or obj.byte_size < PPTR_SIZE:
+        return None
+    obj.reset()
+    data = obj.reader.read_bytes(PPTR_SIZE)
+    (game_object,) = struct.unpack_from(obj.reader.endian + "q", data, 4)
+    return game_object
+
+
+def is_component(class_id: int) -> bool:
+    """True for the ClassIDs of Components, i.e. the ones with a `m_GameObject`"""
+    from UnityPy import classes
+    from UnityPy.enums import ClassIDType
+
+    try:
+        clazz = getattr(classes, ClassIDType(class_id).name, None)
+    except ValueError:
+        return False
+    return isinstance(clazz, type) and issubclass(clazz, classes.Component)
+
+
+def find_root_transform(fathers: dict, transform) -> int:
+    """Follows `fathers` ({Transform: father PathID}, keyed by (file, PathID)) from `transform` up to its root
+
+    Returns:
+        int: PathID of the root Transform, or None if the chain leaves `fathers`
+    """
+    for _ in range(len(fathers)):
+        if not transform in fathers:
+            return None
+        if not fathers[transform]:
+            return transform[1]
+        transform = (transform[0], fathers[transform])
+    return None
+
+
+def scan_file(
+    path: str, root: str, unity_version: str, list_objects: bool = False
+) -> dict:
+    """Scans a single file for root Transforms, Animators and AnimationClips.
+
+    Args:
+        path (str): file to scan
+        root (str): directory dependencies (if any) are looked up in
+        unity_version (str): fallback Unity version
+        list_objects (bool): list every object in the file as well. See `catalog`
+
+    Returns:
+        dict: with keys
+            path: `path`
+            cabs: CAB names in the file
+            hierarchies: [(container, name, root Transform PathID, root GameObject PathID, CAB), ...]
+            animators: [(container, PathID, name, CAB), ...]
+            animations: [(container, PathID, name, CAB), ...]
+                CAB is the name of the SerializedFile the object is in. PathIDs are only unique within one
+            objects: [(container, PathID, ClassID, name, byte size, root Transform PathID), ...]. Only with `list_objects`.
+                The root Transform is the one of the hierarchy the object's GameObject is in, if any
+            error: set only when the file can't be scanned
+    """
+    result = {
+        "path": path,
+        "cabs": [],
+        "hierarchies": [],
+        "animators": [],
+        "animations": [],
+        "objects": [],
+    }
+    try:
+        import UnityPy
+        from UnityPy.enums import ClassIDType
+
+        UnityPy.config.SERIALIZED_FILE_PARSE_TYPETREE = False
+        UnityPy.config.FALLBACK_UNITY_VERSION = unity_version
+        env = UnityPy.Environment(path=root)
+        env.load_file(path)
+        result["cabs"] = list(env.cabs.keys())
+        # Keyed by (file, PathID). Transform to its father, GameObject to its Transform, and object to its GameObject
+        fathers, transforms, owners = dict(), dict(), dict()
+        keys, components = list(), dict()
+        for obj in env.objects:
+            key = (obj.assets_file.name, obj.path_id)
+            if list_objects:
+                try:
+                    name = obj.peek_name()
+                except Exception:
+                    name = None
+                result["objects"].append(
+                    (obj.container, obj.path_id, obj.class_id, name, obj.byte_size)
+                )
+                keys.append(key)
+                if obj.type == ClassIDType.GameObject:
+                    owners[key] = obj.path_id
+                else:
+                    if not obj.class_id in components:
+                        components[obj.class_id] = is_component(obj.class_id)
+                    if components[obj.class_id]:
+                        owners[key] = peek_game_object(obj)
+                        if owners[key] is None:
+                            owners[key] = obj.read().m_GameObject.path_id
+            match obj.type:
+                case ClassIDType.Transform | ClassIDType.RectTransform:
+                    links = peek_transform(obj)
+                    if links:
+                        game_object, father, _ = links
+                    else:
+                        data = obj.read()
+                        game_object = data.m_GameObject.path_id
+                        father = data.m_Father.path_id
+                    fathers[key] = father
+                    transforms[(key[0], game_object)] = obj.path_id
+                    if not father:
+                        game_object = obj.assets_file.objects[game_object]
+                        result["hierarchies"].append(
+                            (
+                                game_object.container,
+                                game_object.peek_name(),
+                                obj.path_id,
+                                game_object.path_id,
+                                key[0],
+                            )
+                        )
+                case ClassIDType.AnimationClip:
+                    result["animations"].append(
+                        (obj.container, obj.path_id, obj.peek_name(), key[0])
+                    )
+                case ClassIDType.Animator:
+                    data = obj.read()
+                    result["animators"].append(
+                        (
+                            obj.container,
+                            obj.path_id,
+                            data.m_GameObject.read().m_Name,
+                            key[0],
+                        )
+                    )
+        for i, (file, path_id) in enumerate(keys):
+            transform = transforms.get((file, owners.get((file, path_id))), None)
+            root = (
+                find_root_transform(fathers, (file, transform)) if transform else None
+            )
+            result["objects"][i] = (*result["objects"][i], root)
+    except Exception as e:
+        result["error"] = "%s: %s" % (type(e).__name__, e)
+    return result
+
+
+def scan_files(
+    paths: List[str],
+    root: str,
+    unity_version: str,
+    max_workers: int = None,
+    progress: Callable[[int, int], None] = None,
+    list_objects: bool = False,
+) -> List[dict]:
+    """Scans `paths` with a process pool. See `scan_file`
+
+    `progress` is called with (number of files scanned, number of files) along the way
+    """
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        n = len(paths)
+        for result in executor.map(
+            scan_file,
+            paths,
+            [root] * n,
+            [unity_version] * n,
+            [list_objects] * n,
+            chunksize=max(1, n // (4 * (max_workers or os.cpu_count() or 1))),
+        ):
+            results.append(result)
+            if progress:
+                progress(len(results), n)
+    return results
+
+
+def run_scanner(
+    paths: List[str],
+    root: str,
+    unity_version: str,
+    max_workers: int = None,
+    progress: Callable[[int, int], None] = None,
+    list_objects: bool = False,
+) -> List[dict]:
+    """Runs `scan_files` in a separate Python process, and returns its results.
+
+    The interpreter running Blender (`sys.executable`) is used, with the same `sys.path`.
+    The process is killed if `progress` raises.
+    """
+    with tempfile.TemporaryDirectory() as temp:
+        request = os.path.join(temp, "request.json")
+        response = os.path.join(temp, "response.json")
+        with open(request, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "paths": paths,
+                    "root": root,
+                    "unity_version": unity_version,
+                    "max_workers": max_workers,
+                    "list_objects": list_objects,
+                },
+                f,
+            )
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(p for p in sys.path if p)
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), request, response],
+            env=env,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            for line in process.stdout:
+                match = re.fullmatch(r"(\d+)/(\d+)", line.strip())
+                if match and progress:
+                    progress(int(match.group(1)), int(match.group(2)))
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, process.args)
+        with open(response, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        request = json.load(f)
+    results = scan_files(
+        request["paths"],
+        request["root"],
+        request["unity_version"],
+        request["max_workers"],
+        lambda i, n: print("%d/%d" % (i, n), flush=True),
+        request["list_objects"],
+    )
+    with open(sys.argv[2], "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False)
@@ -0,0 +1,169 @@
+import os, json, hashlib
+from logging import getLogger
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Tuple
+
+from sssekai.unity import sssekai_get_unity_version
+
+from .types import Hierarchy
+from .utils import dataclass_from_dict, get_cache_path
+
+logger = getLogger("sssekai")
+
+# Bump this whenever the layout below changes. Older snapshots are then discarded.
+SNAPSHOT_VERSION = 5
+
+
+@dataclass
+class HierarchySnapshot:
+    name: str
+    root_path_id: int = 0
+    root_game_object_path_id: int = 0
+    root_file: str = None
+
+
+@dataclass
+class ContainerSnapshot:
+    hierarchies: List[HierarchySnapshot] = field(default_factory=list)
+    # (PathID, Name, SerializedFile name)
+    animators: List[Tuple[int, str, str]] = field(default_factory=list)
+    animations: List[Tuple[int, str, str]] = field(default_factory=list)
+
+
+@dataclass
+class EnvironmentSnapshot:
+    version: int = SNAPSHOT_VERSION
+    unity_version: str = ""
+    # (Path, Size, Modified Time in ns) of every file that made up the environment
+    files: List[Tuple[str, int, int]] = field(default_factory=list)
+    containers: Dict[str, ContainerSnapshot] = field(default_factory=dict)
+    # (Path, CAB names, PathIDs) of files that can be loaded lazily. Empty if the environment
+    # was loaded eagerly. See `SSSekaiGlobalEnvironment.add_lazy_sources`
+    sources: List[Tuple[str, List[str], List[int]]] = field(default_factory=list)
+
+
+def get_folder_signature(*paths: str) -> List[Tuple[str, int, int]]:
+    """Lists (Path, Size, Modified Time in ns) of every file in `paths`, recursively.
+
+    Paths that don't exist are skipped. The result is sorted so it can be compared as-is.
+    """
+    signature = []
+    for path in paths:
+        if not path or not os.path.exists(path):
+            continue
+        if os.path.isfile(path):
+            files = [path]
+        else:
+            files = [
+                os.path.join(root, f) for root, dirs, fs in os.walk(path) for f in fs
+            ]
+        for file in files:
+            stat = os.stat(file)
+            signature.append([os.path.abspath(file), stat.st_size, stat.st_mtime_ns])
+    return sorted(signature)
+
+
+def get_snapshot_path(path: str, aux_path: str) -> str:
+    key = "\n".join((os.path.abspath(path), os.path.abspath(aux_path or "")))
+    key = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return get_cache_path("snapshots", key + ".json")
+
+
+def snapshot_hierarchy(hierarchy: Hierarchy) -> HierarchySnapshot:
+    """Snapshots the root of `hierarchy` only. Its tree is built again once it's imported.
+
+    See `materialize_scene_hierarchy`"""
+    root = hierarchy.root
+    return HierarchySnapshot(
+        hierarchy.name,
+        hierarchy.path_id,
+        root.game_object_path_id if root else hierarchy.root_game_object_path_id,
+        hierarchy.root_file,
+    )
+
+
+def restore_hierarchy(snapshot: HierarchySnapshot) -> Hierarchy:
+    """Rebuilds the Hierarchy stub from a snapshot. See `materialize_scene_hierarchy`"""
+    return Hierarchy(
+        snapshot.name,
+        root_path_id=snapshot.root_path_id,
+        root_game_object_path_id=snapshot.root_game_object_path_id,
+        root_file=snapshot.root_file,
+    )
+
+
+def load_environment_snapshot(path: str, aux_path: str) -> EnvironmentSnapshot:
+    """Loads the snapshot for `path` and `aux_path`.
+
+    Returns:
+        EnvironmentSnapshot: the snapshot, or None if there's none or it's outdated
+    """
+    snapshot_path = get_snapshot_path(path, aux_path)
+    if not os.path.exists(snapshot_path):
+        return None
+    try:
+        with open(snapshot_path, "r", encoding="utf-8") as f:
+            snapshot = dataclass_from_dict(EnvironmentSnapshot, json.load(f))
+    except Exception as e:
+        logger.warning("Discarding unreadable snapshot %s: %s" % (snapshot_path, e))
+        return None
+    if snapshot.version != SNAPSHOT_VERSION:
+        return None
+    if snapshot.unity_version != sssekai_get_unity_version():
+        return None
+    if snapshot.files != get_folder_signature(path, aux_path):
+        logger.debug("Snapshot outdated: %s" % snapshot_path)
+        return None
+    return snapshot
+
+
+def save_environment_snapshot(
+    path: str, aux_path: str, containers: dict, sources: list = None
+):
+    """Saves the catalog of `containers` for `path` and `aux_path`.
+
+    Args:
+        containers (Dict[str, SSSekaiEnvironmentContainer]): containers to save
+        sources (List[Tuple[str, List[str], List[int]]]): lazily loaded files, if any
+    """
+    snapshot = EnvironmentSnapshot(
+        unity_version=sssekai_get_unity_version(),
+        files=get_folder_signature(path, aux_path),
+        sources=sources or [],
+    )
+    for name, container in containers.items():
+        snapshot.containers[name] = ContainerSnapshot(
+            [snapshot_hierarchy(h) for h in container.hierarchies.values()],
+            [
+                (path_id, name, container.files.get(path_id, None))
+                for path_id, name in container.animators.items()
+            ],
+            [
+                (path_id, name, container.files.get(path_id, None))
+                for path_id, name in container.animations.items()
+            ],
+        )
+    snapshot_path = get_snapshot_path(path, aux_path)
+    with open(snapshot_path, "w", encoding="utf-8") as f:
+        json.dump(asdict(snapshot), f, ensure_ascii=False)
+    logger.debug("Saved snapshot: %s" % snapshot_path)
+
+
+def restore_environment_snapshot(snapshot: EnvironmentSnapshot, containers: dict):
+    """Fills `containers` with the catalog from `snapshot`
+
+    Args:
+        containers (DefaultDict[str, SSSekaiEnvironmentContainer]): containers to fill
+    """
+    for container_name, data in snapshot.containers.items():
+        container = containers[container_name]
+        for hierarchy in data.hierarchies:
+            hierarchy = restore_hierarchy(hierarchy)
+            container.hierarchies[hierarchy.path_id] = hierarchy
+        for entries, data_entries in (
+            (container.animators, data.animators),
+            (container.animations, data.animations),
+        ):
+            for path_id, name, file in data_entries:
+                entries[path_id] = name
+                container.files[path_id] = file
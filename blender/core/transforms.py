@@ -0,0 +1,271 @@
+# Batched transform math on hierarchies, with NumPy
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Generator, List, Set, Tuple
+
+# See `UNITY_TO_BLENDER_BASIS` in `math`
+UNITY_TO_BLENDER_BASIS = np.array(
+    (
+        (-1.0, 0.0, 0.0, 0.0),
+        (0.0, 0.0, -1.0, 0.0),
+        (0.0, 1.0, 0.0, 0.0),
+        (0.0, 0.0, 0.0, 1.0),
+    )
+)
+BLENDER_TO_UNITY_BASIS = np.linalg.inv(UNITY_TO_BLENDER_BASIS)
+
+
+def swizzle_positions(positions: np.ndarray) -> np.ndarray:
+    """(N,3) Unity positions to Blender. See `swizzle_vector`"""
+    x, y, z = positions.T
+    return np.stack((-x, -z, y), axis=-1)
+
+
+def swizzle_rotations(rotations: np.ndarray) -> np.ndarray:
+    """(N,4) Unity quaternions (XYZW) to Blender quaternions (WXYZ). See `swizzle_quaternion`"""
+    x, y, z, w = rotations.T
+    return np.stack((w, x, z, -y), axis=-1)
+
+
+def swizzle_scales(scales: np.ndarray) -> np.ndarray:
+    """(N,3) Unity scales to Blender. See `swizzle_vector_scale`"""
+    x, y, z = scales.T
+    return np.stack((x, z, y), axis=-1)
+
+
+def quaternions_to_matrices(quaternions: np.ndarray) -> np.ndarray:
+    """(N,4) unit quaternions (WXYZ) to (N,3,3) rotation matrices"""
+    w, x, y, z = quaternions.T
+    matrices = np.empty((len(quaternions), 3, 3))
+    matrices[:, 0, 0] = 1 - 2 * (y * y + z * z)
+    matrices[:, 0, 1] = 2 * (x * y - w * z)
+    matrices[:, 0, 2] = 2 * (x * z + w * y)
+    matrices[:, 1, 0] = 2 * (x * y + w * z)
+    matrices[:, 1, 1] = 1 - 2 * (x * x + z * z)
+    matrices[:, 1, 2] = 2 * (y * z - w * x)
+    matrices[:, 2, 0] = 2 * (x * z - w * y)
+    matrices[:, 2, 1] = 2 * (y * z + w * x)
+    matrices[:, 2, 2] = 1 - 2 * (x * x + y * y)
+    return matrices
+
+
+def trs_to_matrices(
+    positions: np.ndarray, rotations: np.ndarray, scales: np.ndarray = None
+) -> np.ndarray:
+    """(N,4,4) TRS matrices from Blender positions, quaternions (WXYZ) and optionally scales.
+    Same as `blMatrix.LocRotScale` on each of them"""
+    matrices = np.zeros((len(positions), 4, 4))
+    matrices[:, :3, :3] = quaternions_to_matrices(rotations)
+    if scales is not None:
+        matrices[:, :3, :3] *= scales[:, np.newaxis, :]
+    matrices[:, :3, 3] = positions
+    matrices[:, 3, 3] = 1
+    return matrices
+
+
+def levels_of(depths: np.ndarray) -> List[np.ndarray]:
+    """Groups node indices by their `depths`, from the root down"""
+    order = np.argsort(depths, kind="stable")
+    counts = np.bincount(depths)
+    return np.split(order, np.cumsum(counts)[:-1])
+
+
+@dataclass
+class HierarchyArrays:
+    """A (sub)tree of `HierarchyNode`s as flat arrays, in depth-first pre-order
+
+    Parents always come before their children, so transforms can be propagated
+    from the roots down one level at a time. See `global_transforms`
+    """
+
+    # The nodes themselves, in order
+    nodes: List[Any]
+    # (N,) PathIDs
+    path_ids: np.ndarray
+    # (N,) Index of the parent node. -1 for the root
+    parents: np.ndarray
+    # (N,) Depth of the node. 0 for the root
+    depths: np.ndarray
+    # (N,) One past the index of the node's last descendant, i.e. its subtree is [index, end)
+    ends: np.ndarray
+    # (N,3), (N,4) and (N,3) local transforms in Unity coordinates. Quaternions are XYZW
+    positions: np.ndarray
+    rotations: np.ndarray
+    scales: np.ndarray
+    # PathID:Index
+    index: Dict[int, int] = field(default_factory=dict)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @staticmethod
+    def from_root(root, children: Callable[[Any], List[Any]] = None):
+        """Flattens the tree under `root`
+
+        Args:
+            root: root `HierarchyNode`
+            children (Callable[[Any], List[Any]]): children of a node. Defaults to `node.children`
+        """
+        children = children or (lambda node: node.children)
+        nodes, parents, depths = [], [], []
+        # Iterative, so arbitrarily deep chains (i.e. hair and cloth bones) don't hit the recursion limit
+        stack = [(root, -1, 0)]
+        while stack:
+            node, parent, depth = stack.pop()
+            index = len(nodes)
+            nodes.append(node)
+            parents.append(parent)
+            depths.append(depth)
+            stack += [(child, index, depth + 1) for child in reversed(children(node))]
+        parents = np.array(parents, dtype=np.int32)
+        depths = np.array(depths, dtype=np.int32)
+        # Subtree sizes, accumulated from the leaves up
+        sizes = np.ones(len(nodes), dtype=np.int32)
+        for level in reversed(levels_of(depths)[1:]):
+            np.add.at(sizes, parents[level], sizes[level])
+        return HierarchyArrays(
+            nodes,
+            np.array([node.path_id for node in nodes], dtype=np.int64),
+            parents,
+            depths,
+            np.arange(len(nodes), dtype=np.int32) + sizes,
+            np.array(
+                [(n.position.x, n.position.y, n.position.z) for n in nodes],
+                dtype=np.float64,
+            ).reshape(-1, 3),
+            np.array(
+                [
+                    (n.rotation.x, n.rotation.y, n.rotation.z, n.rotation.w)
+                    for n in nodes
+                ],
+                dtype=np.float64,
+            ).reshape(-1, 4),
+            np.array(
+                [(n.scale.x, n.scale.y, n.scale.z) for n in nodes], dtype=np.float64
+            ).reshape(-1, 3),
+            {node.path_id: index for index, node in enumerate(nodes)},
+        )
+
+    @property
+    def levels(self) -> List[np.ndarray]:
+        """Indices of the nodes at each depth, from the root down"""
+        return levels_of(self.depths)
+
+    def paths(self) -> List[str]:
+        """Full paths of the nodes, relative to the root. The root's own path is empty"""
+        paths = [""] * len(self.nodes)
+        for index, parent in enumerate(self.parents.tolist()):
+            if parent >= 0:
+                name = self.nodes[index].name
+                paths[index] = paths[parent] + "/" + name if paths[parent] else name
+        return paths
+
+    def walk(
+        self, root: int = 0, skip: Set[int] = None
+    ) -> Generator[Tuple[Any, Any, int], None, None]:
+        """Yields (parent, node, depth) for the subtree at index `root`, in depth-first pre-order.
+        Same as `HierarchyNode.children_recursive`, without walking the tree again
+
+        Args:
+            root (int): index of the subtree's root
+            skip (Set[int]): PathIDs of the nodes to skip, along with their subtrees
+        """
+        base = self.depths[root]
+        index, end = root, self.ends[root]
+        while index < end:
+            node = self.nodes[index]
+            if skip and node.path_id in skip:
+                index = self.ends[index]
+                continue
+            parent = self.parents[index]
+            yield (
+                self.nodes[parent] if index != root else None,
+                node,
+                int(self.depths[index] - base),
+            )
+            index += 1
+
+    def subtree_mask(self, path_ids: Set[int]) -> np.ndarray:
+        """(N,) True for the nodes of the subtrees rooted at `path_ids`"""
+        mask = np.isin(self.path_ids, list(path_ids))
+        for level in self.levels[1:]:
+            mask[level] |= mask[self.parents[level]]
+        return mask
+
+    def ancestor_mask(self, path_ids: Set[int]) -> np.ndarray:
+        """(N,) True for the nodes that have any of `path_ids` in their subtrees, themselves included"""
+        mask = np.isin(self.path_ids, list(path_ids))
+        for level in reversed(self.levels[1:]):
+            np.logical_or.at(mask, self.parents[level], mask[level])
+        return mask
+
+    def local_transforms(self, scale: bool = False) -> np.ndarray:
+        """(N,4,4) local transforms in Blender coordinates. See `HierarchyNode.to_trs_matrix`"""
+        return trs_to_matrices(
+            swizzle_positions(self.positions),
+            swizzle_rotations(self.rotations),
+            swizzle_scales(self.scales) if scale else None,
+        )
+
+    def global_transforms(self, scale: bool = False) -> np.ndarray:
+        """(N,4,4) global transforms in Blender coordinates, relative to the root's parent
+
+        Computed one level of the tree at a time, with every node of the level in one batch.
+        """
+        local = self.local_transforms(scale)
+        result = np.empty_like(local)
+        for level in self.levels:
+            parents = self.parents[level]
+            if parents[0] < 0:
+                result[level] = local[level]
+            else:
+                result[level] = np.matmul(result[parents], local[level])
+        return result
+
+
+def bindpose_transforms(root: np.ndarray, bindposes: np.ndarray) -> np.ndarray:
+    """(N,4,4) armature space transforms of the bones from their (N,4,4) Unity bindposes
+
+    i.e. `root @ (U2B @ bindpose^-1 @ B2U)` for each of them, where `root` is the global
+    transform of the armature's root bone.
+    """
+    poses = np.linalg.inv(bindposes)
+    poses = UNITY_TO_BLENDER_BASIS @ poses @ BLENDER_TO_UNITY_BASIS
+    return root @ poses
+
+
+def unity_matrices_to_array(matrices: list) -> np.ndarray:
+    """(N,4,4) array from a list of `Matrix4x4f`. See `swizzle_matrix`"""
+    return np.array(
+        [
+            (
+                (m.e00, m.e01, m.e02, m.e03),
+                (m.e10, m.e11, m.e12, m.e13),
+                (m.e20, m.e21, m.e22, m.e23),
+                (m.e30, m.e31, m.e32, m.e33),
+            )
+            for m in matrices
+        ],
+        dtype=np.float64,
+    ).reshape(-1, 4, 4)
+
+
+def pose_basis_matrices(
+    edit: np.ndarray, final: np.ndarray, parents: np.ndarray
+) -> np.ndarray:
+    """(N,4,4) pose bone `matrix_basis` that moves each bone from its (N,4,4) armature space
+    `edit` (rest) matrix to its `final` one, in one batch. See `apply_pose_matrix`
+
+    Args:
+        edit (np.ndarray): (N,4,4) edit bone matrices
+        final (np.ndarray): (N,4,4) final matrices
+        parents (np.ndarray): (N,) index of the parent bone. -1 for the roots
+    """
+    identity = np.broadcast_to(np.eye(4), edit.shape)
+    has_parent = (parents >= 0)[:, np.newaxis, np.newaxis]
+    edit_parent = np.where(has_parent, edit[parents], identity)
+    final_parent = np.where(has_parent, final[parents], identity)
+    # PoseBone = EditBone^-1 * Final, in the parent's space
+    edit_local = np.linalg.solve(edit_parent, edit)
+    final_local = np.linalg.solve(final_parent, final)
+    return np.linalg.solve(edit_local, final_local)
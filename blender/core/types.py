@@ -1,7 +1,8 @@
 from enum import IntEnum
 from dataclasses import dataclass, field
 from typing import Dict, List, Tuple, Generator
-from .utils import dataclass_from_dict
+from .utils import dataclass_from_dict, crc32
+from .transforms import HierarchyArrays
 from .math import (
     swizzle_vector,
     swizzle_quaternion,
@@ -34,6 +35,8 @@ class HierarchyNode:
 
     # Unity-specific
     game_object: GameObject = None
+    # Set even when `game_object` isn't loaded yet (e.g. restored from a snapshot)
+    game_object_path_id: int = 0
 
     def __hash__(self):
         return self.path_id
@@ -57,30 +60,36 @@ class HierarchyNode:
     ) -> Generator[Tuple["HierarchyNode", "HierarchyNode", int], None, None]:
         """Yields a tuple of (parent, child, depth) for each bone in the hierarchy.
 
-        The tree is traversed in depth-first pre-order
+        The tree is traversed in depth-first pre-order. Prefer `Hierarchy.children_recursive`,
+        which reuses the hierarchy's cached order, where the hierarchy is at hand.
 
         Arguments:
             root: root node. leave None to use self
             visited: read-only set of visited parent nodes to skip
         """
-
-        def dfs(bone: HierarchyNode, parent: HierarchyNode = None, depth=0):
+        # Iterative, so arbitrarily deep chains (i.e. hair and cloth bones) don't hit the recursion limit
+        stack = [(None, root or self, 0)]
+        while stack:
+            parent, bone, depth = stack.pop()
             if not bone.path_id in visited:
                 yield parent, bone, depth
-            for child in bone.children:
-                if not child.path_id in visited:
-                    yield from dfs(child, bone, depth + 1)
+            stack += [
+                (bone, child, depth + 1)
+                for child in reversed(bone.children)
+                if not child.path_id in visited
+            ]
 
-        yield from dfs(root or self)
+    def to_arrays(self) -> HierarchyArrays:
+        """Flattens this bone and all its children into arrays. See `HierarchyArrays`"""
+        return HierarchyArrays.from_root(self)
 
     def update_global_transforms(self, scale=False):
-        """Calculates global transforms for this bone and all its children recursively."""
-        for parent, child, _ in self.children_recursive():
-            transform = child.to_trs_matrix() if scale else child.to_tr_matrix()
-            if parent:
-                child.global_transform = parent.global_transform @ transform
-            else:
-                child.global_transform = transform
+        """Calculates global transforms for this bone and all its children, in batches.
+
+        See `HierarchyArrays.global_transforms`"""
+        arrays = self.to_arrays()
+        for node, transform in zip(arrays.nodes, arrays.global_transforms(scale)):
+            node.global_transform = blMatrix(transform.tolist())
 
 
 @dataclass
@@ -94,15 +103,102 @@ class Hierarchy:
     # PathID:PathID
     parents: Dict[int, int] = field(default_factory=dict)
 
+    # Unity-specific
+    # Set for stubs, where `root` and the rest of the tree is only built on demand.
+    # See `build_scene_hierarchy` and `materialize_scene_hierarchy`
+    root_path_id: int = 0
+    root_game_object_path_id: int = 0
+    # Name of the SerializedFile (CAB) the root is in. PathIDs are only unique within one
+    root_file: str = None
+
+    # Cached depth-first pre-order of the tree. See `arrays`
+    _arrays: HierarchyArrays = field(default=None, repr=False, compare=False)
+    # Cached Name:Node, Path:Node and CRC32(Path):Node lookups. See `indexes`
+    _indexes: Tuple[Dict, Dict, Dict] = field(default=None, repr=False, compare=False)
+
     @property
     def path_id(self):
-        return self.root.path_id
+        return self.root.path_id if self.root else self.root_path_id
+
+    @property
+    def is_stub(self):
+        return self.root is None
+
+    @property
+    def arrays(self) -> HierarchyArrays:
+        """The whole tree as `HierarchyArrays`, in depth-first pre-order.
+
+        Built once and reused until the tree changes. See `add_node` and `invalidate`"""
+        if self._arrays is None or len(self._arrays) != len(self.nodes):
+            self._arrays = self.root.to_arrays()
+            self._indexes = None
+        return self._arrays
+
+    def invalidate(self):
+        """Drops the cached order and indexes. Call this after modifying the tree by hand"""
+        self._arrays = None
+        self._indexes = None
+
+    @property
+    def indexes(
+        self,
+    ) -> Tuple[
+        Dict[str, HierarchyNode], Dict[str, HierarchyNode], Dict[int, HierarchyNode]
+    ]:
+        """(Name:Node, Path:Node, CRC32(Path):Node) lookups, built once along with `arrays`
+
+        Paths are relative to the root, like the ones animations bind to (i.e. `Hips/Spine`).
+        The root itself is at the empty path, whose CRC32 is 0. Where names or paths are
+        repeated, the first node in depth-first pre-order wins.
+        """
+        arrays = self.arrays
+        if self._indexes is None:
+            names, paths, crcs = dict(), dict(), dict()
+            for node, path in zip(arrays.nodes, arrays.paths()):
+                names.setdefault(node.name, node)
+                paths.setdefault(path, node)
+            for path, node in paths.items():
+                crcs.setdefault(crc32(path), node)
+            self._indexes = (names, paths, crcs)
+        return self._indexes
+
+    @property
+    def name_index(self) -> Dict[str, HierarchyNode]:
+        return self.indexes[0]
+
+    @property
+    def path_index(self) -> Dict[str, HierarchyNode]:
+        return self.indexes[1]
+
+    @property
+    def crc_index(self) -> Dict[int, HierarchyNode]:
+        return self.indexes[2]
+
+    def add_node(self, node: HierarchyNode, parent: HierarchyNode = None):
+        """Adds `node` as a child of `parent`, or as the root if there's none"""
+        self.nodes[node.path_id] = node
+        node.parent = parent
+        if not parent:
+            self.root = node
+        else:
+            parent.children.append(node)
+            self.parents[node.path_id] = parent.path_id
+        self.invalidate()
+
+    def children_recursive(
+        self, root: HierarchyNode = None, skip: set = None
+    ) -> Generator[Tuple[HierarchyNode, HierarchyNode, int], None, None]:
+        """Yields (parent, child, depth) for each node under `root` (or the root of the hierarchy)
+        in depth-first pre-order, from the cached order. See `HierarchyArrays.walk`"""
+        arrays = self.arrays
+        yield from arrays.walk(arrays.index[root.path_id] if root else 0, skip)
 
     @staticmethod
     def from_node(node: HierarchyNode):
         """Create the hierarchy from a single node, with it as the new root"""
         hierarchy = Hierarchy(node.name, node)
-        for parent, child, _ in node.children_recursive():
+        for parent, child, _ in hierarchy.children_recursive():
             hierarchy.nodes[child.path_id] = child
-            hierarchy.parents[child.path_id] = parent.path_id
+            if parent:
+                hierarchy.parents[child.path_id] = parent.path_id
         return hierarchy
@@ -0,0 +1,292 @@
+# Minimal UnityFS (AssetBundle) container reader
+import os, re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import BinaryIO, Iterator, List
+
+from UnityPy.streams import EndianBinaryReader, EndianBinaryWriter
+from UnityPy.helpers import CompressionHelper
+from UnityPy.enums.BundleFile import CompressionFlags
+
+UNITYFS_SIGNATURE = b"UnityFS\0"
+# ArchiveFlags
+UNITYFS_COMPRESSION_MASK = 0x3F
+UNITYFS_BLOCKS_AND_DIRECTORY_INFO_COMBINED = 0x40
+UNITYFS_BLOCKS_INFO_AT_THE_END = 0x80
+UNITYFS_BLOCK_INFO_NEED_PADDING_AT_START = 0x200
+UNITYFS_USES_ENCRYPTION_OLD = 0x200
+UNITYFS_USES_ENCRYPTION = 0x400
+
+
+@dataclass
+class UnityFSBlock:
+    uncompressed_size: int
+    compressed_size: int
+    flags: int
+
+
+@dataclass
+class UnityFSNode:
+    # Offset and size in the uncompressed data
+    offset: int
+    size: int
+    flags: int
+    path: str
+
+
+@dataclass
+class UnityFSHeader:
+    version: int
+    version_player: str
+    version_engine: str
+    size: int
+    flags: int
+    # Offset of the first block in the file
+    data_offset: int = 0
+    blocks: List[UnityFSBlock] = field(default_factory=list)
+    nodes: List[UnityFSNode] = field(default_factory=list)
+
+    @property
+    def is_encrypted(self):
+        if uses_new_archive_flags(self.version_engine):
+            return bool(self.flags & UNITYFS_USES_ENCRYPTION)
+        return bool(self.flags & UNITYFS_USES_ENCRYPTION_OLD)
+
+    @property
+    def is_uncompressed(self):
+        """True if every data block is stored as-is, i.e. the nodes can be read from the file directly"""
+        return not any(block.flags & UNITYFS_COMPRESSION_MASK for block in self.blocks)
+
+
+def parse_unity_version(version: str) -> tuple:
+    return tuple(int(x) for x in re.findall(r"\d+", version)[:3])
+
+
+def uses_new_archive_flags(version_engine: str) -> bool:
+    """Unity CN used 0x200 for encryption before it became `BlockInfoNeedPaddingAtStart`. See UnityPy's BundleFile"""
+    version = parse_unity_version(version_engine)
+    if not version or version == (0, 0, 0):
+        return True
+    return not (
+        version < (2020,)
+        or (version[0] == 2020 and version < (2020, 3, 34))
+        or (version[0] == 2021 and version < (2021, 3, 2))
+        or (version[0] == 2022 and version < (2022, 1, 1))
+    )
+
+
+def uses_block_alignment(header: UnityFSHeader) -> bool:
+    """The blocks info is aligned to 16 bytes since header version 7. Some 2019.4 builds align with version 6"""
+    version = parse_unity_version(header.version_engine)
+    return header.version >= 7 or (version[:1] == (2019,) and version >= (2019, 4, 15))
+
+
+def read_unityfs_header(f: BinaryIO) -> UnityFSHeader:
+    """Reads the header, block and directory info of a UnityFS file. The data blocks are NOT read.
+
+    Raises:
+        ValueError: if `f` isn't a UnityFS file
+    """
+    start = f.tell()
+    if f.read(len(UNITYFS_SIGNATURE)) != UNITYFS_SIGNATURE:
+        raise ValueError("Not a UnityFS file")
+    reader = EndianBinaryReader(f.read(4096), endian=">")
+    header = UnityFSHeader(
+        reader.read_u_int(),
+        reader.read_string_to_null(),
+        reader.read_string_to_null(),
+        reader.read_long(),
+        0,
+    )
+    compressed_size = reader.read_u_int()
+    uncompressed_size = reader.read_u_int()
+    header.flags = reader.read_u_int()
+    position = len(UNITYFS_SIGNATURE) + reader.Position
+    if uses_block_alignment(header):
+        # Relative to the start of the file, which isn't always aligned itself (i.e. in ZIPs)
+        position = (position + 15) // 16 * 16
+    position += start
+    if header.flags & UNITYFS_BLOCKS_INFO_AT_THE_END:
+        f.seek(0, os.SEEK_END)
+        f.seek(f.tell() - compressed_size)
+        blocks_info = f.read(compressed_size)
+        header.data_offset = position
+    else:
+        f.seek(position)
+        blocks_info = f.read(compressed_size)
+        header.data_offset = position + compressed_size
+    compression = CompressionFlags(header.flags & UNITYFS_COMPRESSION_MASK)
+    if compression != CompressionFlags.NONE:
+        blocks_info = CompressionHelper.DECOMPRESSION_MAP[compression](
+            blocks_info, uncompressed_size
+        )
+    reader = EndianBinaryReader(blocks_info, endian=">")
+    reader.read_bytes(16)  # Hash
+    header.blocks = [
+        UnityFSBlock(reader.read_u_int(), reader.read_u_int(), reader.read_u_short())
+        for _ in range(reader.read_int())
+    ]
+    header.nodes = [
+        UnityFSNode(
+            reader.read_long(),
+            reader.read_long(),
+            reader.read_u_int(),
+            reader.read_string_to_null(),
+        )
+        for _ in range(reader.read_int())
+    ]
+    if (
+        header.flags & UNITYFS_BLOCK_INFO_NEED_PADDING_AT_START
+        and uses_new_archive_flags(header.version_engine)
+    ):
+        header.data_offset = (header.data_offset - start + 15) // 16 * 16 + start
+    return header
+
+
+def decompress_block(data: bytes, block: UnityFSBlock) -> bytes:
+    compression = CompressionFlags(block.flags & UNITYFS_COMPRESSION_MASK)
+    if compression == CompressionFlags.NONE:
+        return data
+    return CompressionHelper.DECOMPRESSION_MAP[compression](
+        data, block.uncompressed_size
+    )
+
+
+def decompress_blocks(
+    f: BinaryIO, blocks: List[UnityFSBlock], max_workers: int = None
+) -> Iterator[bytes]:
+    """Reads `blocks` from the current position of `f`, and yields them decompressed, in order
+
+    Blocks are read on the calling thread and decompressed on a pool of `max_workers` threads
+    (LZ4 and LZMA release the GIL meanwhile). At most 2 * `max_workers` blocks are in flight.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers <= 1 or len(blocks) <= 1:
+        for block in blocks:
+            yield decompress_block(f.read(block.compressed_size), block)
+        return
+    with ThreadPoolExecutor(max_workers) as executor:
+        pending = deque()
+        for block in blocks:
+            data = f.read(block.compressed_size)
+            pending.append(executor.submit(decompress_block, data, block))
+            if len(pending) >= 2 * max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def read_unityfs_data(
+    f: BinaryIO, header: UnityFSHeader, max_workers: int = None
+) -> bytearray:
+    """Reads and decompresses every data block of the UnityFS file `f` into one buffer. See `decompress_blocks`
+
+    Node offsets are relative to the start of the buffer.
+    """
+    data = bytearray(sum(block.uncompressed_size for block in header.blocks))
+    view = memoryview(data)
+    offset = 0
+    f.seek(header.data_offset)
+    for block in decompress_blocks(f, header.blocks, max_workers):
+        view[offset : offset + len(block)] = block
+        offset += len(block)
+    return data
+
+
+def write_unityfs_header(f: BinaryIO, header: UnityFSHeader):
+    """Writes the header, and the uncompressed block and directory info of `header` to `f`
+
+    The blocks info is written right after the header. `header.data_offset` and `header.size`
+    are updated to match, and the data blocks are expected to follow.
+    """
+    blocks_info = EndianBinaryWriter(endian=">")
+    blocks_info.write_bytes(b"\0" * 16)  # Hash
+    blocks_info.write_int(len(header.blocks))
+    for block in header.blocks:
+        blocks_info.write_u_int(block.uncompressed_size)
+        blocks_info.write_u_int(block.compressed_size)
+        blocks_info.write_u_short(block.flags)
+    blocks_info.write_int(len(header.nodes))
+    for node in header.nodes:
+        blocks_info.write_long(node.offset)
+        blocks_info.write_long(node.size)
+        blocks_info.write_u_int(node.flags)
+        blocks_info.write_string_to_null(node.path)
+    blocks_info = blocks_info.bytes
+    writer = EndianBinaryWriter(endian=">")
+    writer.write_string_to_null(header.version_player)
+    writer.write_string_to_null(header.version_engine)
+    prefix = writer.bytes
+    # Signature, version, ..., size, compressed & uncompressed blocks info size, flags
+    position = len(UNITYFS_SIGNATURE) + 4 + len(prefix) + 8 + 4 + 4 + 4
+    if uses_block_alignment(header):
+        position = (position + 15) // 16 * 16
+    data_offset = position + len(blocks_info)
+    if (
+        header.flags & UNITYFS_BLOCK_INFO_NEED_PADDING_AT_START
+        and uses_new_archive_flags(header.version_engine)
+    ):
+        data_offset = (data_offset + 15) // 16 * 16
+    header.data_offset = data_offset
+    header.size = data_offset + sum(block.compressed_size for block in header.blocks)
+    writer = EndianBinaryWriter(endian=">")
+    writer.write_bytes(UNITYFS_SIGNATURE)
+    writer.write_u_int(header.version)
+    writer.write_bytes(prefix)
+    writer.write_long(header.size)
+    writer.write_u_int(len(blocks_info))
+    writer.write_u_int(len(blocks_info))
+    writer.write_u_int(header.flags)
+    writer.write_bytes(b"\0" * (position - writer.Length))
+    writer.write_bytes(blocks_info)
+    writer.write_bytes(b"\0" * (data_offset - writer.Length))
+    f.write(writer.bytes)
+
+
+def unpack_unityfs(
+    src: BinaryIO, dst: BinaryIO, max_workers: int = None
+) -> UnityFSHeader:
+    """Writes an uncompressed copy of the UnityFS file `src` to `dst`, block by block. See `decompress_blocks`
+
+    Nodes in the copy can then be read straight from the file. See `UnityFSHeader.is_uncompressed`
+
+    Raises:
+        ValueError: if `src` isn't an unencrypted UnityFS file
+
+    Returns:
+        UnityFSHeader: header of the copy
+    """
+    source = read_unityfs_header(src)
+    if source.is_encrypted:
+        raise ValueError("Encrypted UnityFS files are not supported")
+    header = replace(
+        source,
+        flags=source.flags & ~UNITYFS_COMPRESSION_MASK & ~UNITYFS_BLOCKS_INFO_AT_THE_END
+        | UNITYFS_BLOCKS_AND_DIRECTORY_INFO_COMBINED,
+        blocks=[
+            UnityFSBlock(
+                block.uncompressed_size,
+                block.uncompressed_size,
+                block.flags & ~UNITYFS_COMPRESSION_MASK,
+            )
+            for block in source.blocks
+        ],
+    )
+    write_unityfs_header(dst, header)
+    src.seek(source.data_offset)
+    for block in decompress_blocks(src, source.blocks, max_workers):
+        dst.write(block)
+    return header
+
+
+def read_bundle_cabs(path: str) -> List[str]:
+    """Lists the CAB (and resource) names in the file at `path`, without loading it
+
+    Files that aren't UnityFS (e.g. plain SerializedFiles) are named after themselves
+    """
+    with open(path, "rb") as f:
+        try:
+            return [node.path for node in read_unityfs_header(f).nodes]
+        except ValueError:
+            return [os.path.basename(path)]
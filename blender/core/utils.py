@@ -1,8 +1,12 @@
 import os, zlib
-from .. import SCRIPT_DIR
 from sssekai.abcache import fromdict as dataclass_from_dict
 from pprint import pprint
 
+# The addon's `SCRIPT_DIR`, worked out here so this module doesn't import `bpy` through it
+SCRIPT_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
 
 def crc32(name: str | bytes) -> int:
     if isinstance(name, str):
@@ -13,3 +17,13 @@ def crc32(name: str | bytes) -> int:
 
 def get_addon_relative_path(*args):
     return os.path.join(SCRIPT_DIR, *args)
+
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "sssekai_blender_io")
+
+
+def get_cache_path(*args):
+    """Path inside the addon's persistent cache directory. Parent directories are created on demand."""
+    path = os.path.join(CACHE_DIR, *args)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
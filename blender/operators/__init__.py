@@ -1,3 +1,5 @@
+from . import environment
+from . import catalog
 from . import importer
 from . import utils
 from . import material
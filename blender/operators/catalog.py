@@ -0,0 +1,179 @@
+import bpy, os, hashlib, threading, traceback
+from bpy.app.translations import pgettext as T
+
+from sssekai.unity import sssekai_get_unity_version
+from UnityPy.enums import ClassIDType
+
+from ..core.catalog import AssetCatalog
+from ..core.scanner import list_files, run_scanner
+from ..core.utils import get_cache_path
+from .environment import LoadCancelled, apply_catalog_selection, tag_redraw_all
+from .. import register_class, logger
+from .. import sssekai_global
+
+
+def get_catalog_path(path: str) -> str:
+    key = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+    return get_cache_path("catalog", key + ".sqlite")
+
+
+@register_class
+class SSSekaiBlenderBuildCatalogOperator(bpy.types.Operator):
+    bl_idname = "sssekai.catalog_build_op"
+    bl_label = T("Build Catalog")
+    bl_description = T(
+        "Scan every asset bundle in the catalog directory into a searchable catalog. Only new or changed files are scanned again. Press ESC to cancel"
+    )
+
+    def execute(self, context):
+        global sssekai_global
+        wm = context.window_manager
+        if sssekai_global.catalog_building:
+            return {"CANCELLED"}
+        self.path = wm.sssekai_catalog_directory
+        if not self.path or not os.path.isdir(self.path):
+            self.report({"ERROR"}, T("Directory does not exist"))
+            return {"CANCELLED"}
+        self.result = None
+        unity_version = sssekai_get_unity_version()
+
+        def progress(i: int, n: int):
+            sssekai_global.catalog_building_progress = i / n
+            sssekai_global.catalog_building_message = "%d/%d" % (i, n)
+            if sssekai_global.catalog_building_cancelled:
+                raise LoadCancelled()
+
+        def scan(paths):
+            logger.debug("Cataloging %d files" % len(paths))
+            return run_scanner(
+                paths, self.path, unity_version, progress=progress, list_objects=True
+            )
+
+        def run():
+            try:
+                with AssetCatalog(get_catalog_path(self.path)) as catalog:
+                    self.result = catalog.update(list_files(self.path), scan)
+            except Exception as e:
+                self.result = e
+
+        sssekai_global.catalog_building = True
+        sssekai_global.catalog_building_cancelled = False
+        sssekai_global.catalog_building_progress = 0
+        sssekai_global.catalog_building_message = ""
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        self.timer = wm.event_timer_add(0.1, window=context.window)
+        wm.modal_handler_add(self)
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context, event):
+        global sssekai_global
+        wm = context.window_manager
+        if event.type == "ESC":
+            sssekai_global.catalog_building_cancelled = True
+            return {"RUNNING_MODAL"}
+        if event.type != "TIMER":
+            return {"PASS_THROUGH"}
+        tag_redraw_all(context)
+        if self.thread.is_alive():
+            return {"PASS_THROUGH"}
+        wm.event_timer_remove(self.timer)
+        sssekai_global.catalog_building = False
+        if isinstance(self.result, LoadCancelled):
+            self.report({"INFO"}, T("Cataloging cancelled"))
+            return {"CANCELLED"}
+        if isinstance(self.result, Exception):
+            traceback.print_exception(self.result)
+            self.report({"ERROR"}, T("Failed to build catalog: %s") % self.result)
+            return {"CANCELLED"}
+        self.report({"INFO"}, T("Cataloged %d files") % self.result)
+        bpy.ops.sssekai.catalog_search_op()
+        return {"FINISHED"}
+
+
+@register_class
+class SSSekaiBlenderCancelBuildCatalogOperator(bpy.types.Operator):
+    bl_idname = "sssekai.catalog_cancel_build_op"
+    bl_label = T("Cancel")
+    bl_description = T("Cancel building the catalog")
+
+    def execute(self, context):
+        global sssekai_global
+        sssekai_global.catalog_building_cancelled = True
+        return {"FINISHED"}
+
+
+@register_class
+class SSSekaiBlenderSearchCatalogOperator(bpy.types.Operator):
+    bl_idname = "sssekai.catalog_search_op"
+    bl_label = T("Search")
+    bl_description = T("Search the catalog of the catalog directory")
+
+    def execute(self, context):
+        global sssekai_global
+        wm = context.window_manager
+        catalog_path = get_catalog_path(wm.sssekai_catalog_directory)
+        sssekai_global.catalog_results = []
+        sssekai_global.catalog_version += 1
+        if not wm.sssekai_catalog_directory or not os.path.exists(catalog_path):
+            return {"CANCELLED"}
+        pattern = wm.sssekai_catalog_query or "*"
+        with AssetCatalog(catalog_path) as catalog:
+            if wm.sssekai_catalog_type == "HIERARCHY":
+                containing = wm.sssekai_catalog_containing
+                containing = (
+                    None if containing == "NONE" else ClassIDType[containing].value
+                )
+                results = [
+                    (r.file, r.container, r.path_id, r.name, "Hierarchy", r.path_id)
+                    for r in catalog.search_hierarchies(pattern, containing)
+                ]
+            else:
+                class_id = (
+                    None
+                    if wm.sssekai_catalog_type == "ANY"
+                    else ClassIDType[wm.sssekai_catalog_type].value
+                )
+                results = [
+                    (
+                        r.file,
+                        r.container,
+                        r.path_id,
+                        r.name,
+                        ClassIDType(r.class_id).name,
+                        r.root_path_id,
+                    )
+                    for r in catalog.search(pattern, class_id)
+                ]
+        sssekai_global.catalog_results = results
+        sssekai_global.catalog_version += 1
+        return {"FINISHED"}
+
+
+@register_class
+class SSSekaiBlenderLoadCatalogResultOperator(bpy.types.Operator):
+    bl_idname = "sssekai.catalog_load_result_op"
+    bl_label = T("Load Bundle")
+    bl_description = T(
+        "Load only the asset bundle the selected result is in. Its dependencies are looked up in the catalog directory, unless an auxiliary directory is set"
+    )
+
+    def execute(self, context):
+        global sssekai_global
+        wm = context.window_manager
+        index = wm.sssekai_catalog_result
+        if not index.isdigit() or int(index) >= len(sssekai_global.catalog_results):
+            return {"CANCELLED"}
+        file, container, path_id, name, class_name, root_path_id = (
+            sssekai_global.catalog_results[int(index)]
+        )
+        logger.debug("Loading %s for %s (%d)" % (file, name, path_id))
+        sssekai_global.catalog_selection = (file, path_id, root_path_id)
+        if not wm.sssekai_selected_assetbundle_file_aux:
+            wm.sssekai_selected_assetbundle_file_aux = wm.sssekai_catalog_directory
+        # This loads the environment. See `update_environment`
+        wm.sssekai_selected_assetbundle_file = file
+        if not sssekai_global.env_loading:
+            # Already loaded
+            apply_catalog_selection(wm)
+        return {"FINISHED"}
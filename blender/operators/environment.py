@@ -0,0 +1,505 @@
+import bpy, os, threading, traceback
+from bpy.app.translations import pgettext as T
+from typing import Callable, Dict, List, Tuple
+
+from sssekai.unity import sssekai_get_unity_version
+
+import UnityPy
+from UnityPy.enums import ClassIDType
+from UnityPy.classes import Animator
+
+from ..core.asset import build_scene_hierarchy
+from ..core.types import Hierarchy
+from ..core.environment import SSSekaiEnvironment
+from ..core.bundle_cache import BundleCache
+from ..core.scanner import list_files, run_scanner, scan_file
+from ..core.archive import expand_archives, is_archive
+from ..core.snapshot import (
+    load_environment_snapshot,
+    save_environment_snapshot,
+    restore_environment_snapshot,
+)
+from .. import register_class, logger
+from .. import sssekai_global, SSSekaiGlobalEnvironment
+
+EMPTY_CONTAINER = "<default>"
+# In seconds. See `SSSekaiEnvironmentWatcher`
+WATCH_INTERVAL = 2.0
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+def get_bundle_cache(wm: bpy.types.WindowManager) -> BundleCache:
+    """Returns the bundle cache set up in the import panel, or None if it's disabled"""
+    if not wm.sssekai_bundle_cache_directory:
+        return None
+    return BundleCache(
+        wm.sssekai_bundle_cache_directory, int(wm.sssekai_bundle_cache_size * (1 << 30))
+    )
+
+
+def load_folder(
+    env: SSSekaiEnvironment,
+    path: str,
+    progress: Callable[[float, str], None],
+    begin: float = 0,
+    end: float = 1,
+):
+    """Loads every file in `path` into `env` like `Environment.load_folder` does, with progress
+
+    Files in ZIP/TAR archives are loaded as well, without extracting them. See `SSSekaiEnvironment.load_archive_member`
+    """
+    files = expand_archives(list_files(path))
+    loaded = 0
+
+    def open_file(file: str):
+        nonlocal loaded
+        progress(begin + (end - begin) * loaded / len(files), os.path.basename(file))
+        loaded += 1
+        # Paths are memory-mapped by `SSSekaiEnvironment.load_file` where possible
+        return file
+
+    env.load_assets(files, open_file)
+
+
+def add_scan_results(
+    state: SSSekaiGlobalEnvironment, results: List[dict]
+) -> List[Tuple[str, List[str], List[int]]]:
+    """Fills the containers of `state` with `results` from the scanner. See `scan_file`
+
+    Returns:
+        List[Tuple[str, List[str], List[int]]]: sources for `SSSekaiGlobalEnvironment.add_lazy_sources`
+    """
+    sources = []
+    for result in results:
+        if "error" in result:
+            logger.warning("Skipping %s: %s" % (result["path"], result["error"]))
+            continue
+        path_ids = []
+        for container, name, path_id, game_object_path_id, file in result[
+            "hierarchies"
+        ]:
+            state.containers[container or EMPTY_CONTAINER].hierarchies[path_id] = (
+                Hierarchy(
+                    name,
+                    root_path_id=path_id,
+                    root_game_object_path_id=game_object_path_id,
+                    root_file=file,
+                )
+            )
+            path_ids += [path_id, game_object_path_id]
+        for key in ("animators", "animations"):
+            for container, path_id, name, file in result[key]:
+                container = state.containers[container or EMPTY_CONTAINER]
+                getattr(container, key)[path_id] = name
+                container.files[path_id] = file
+                path_ids.append(path_id)
+        sources.append((result["path"], result["cabs"], path_ids))
+    return sources
+
+
+def scan_environment(
+    state: SSSekaiGlobalEnvironment,
+    path: str,
+    progress: Callable[[float, str], None],
+    begin: float = 0,
+    end: float = 1,
+) -> List[Tuple[str, List[str], List[int]]]:
+    """Scans `path` with the multi-process scanner and fills the containers of `state` with the results
+
+    Returns:
+        List[Tuple[str, List[str], List[int]]]: sources for `SSSekaiGlobalEnvironment.add_lazy_sources`
+    """
+    files = list_files(path)
+    logger.debug("Scanning %d files" % len(files))
+    results = run_scanner(
+        files,
+        path,
+        sssekai_get_unity_version(),
+        progress=lambda i, n: progress(begin + (end - begin) * i / n, "%d/%d" % (i, n)),
+    )
+    return add_scan_results(state, results)
+
+
+def get_file_signatures(path: str) -> Dict[str, Tuple[int, int]]:
+    """Lists (Size, Modified Time in ns) of every file in `path`. See `list_files`"""
+    signatures = dict()
+    for file in list_files(path):
+        try:
+            stat = os.stat(file)
+        except FileNotFoundError:
+            continue
+        signatures[file] = (stat.st_size, stat.st_mtime_ns)
+    return signatures
+
+
+def update_container_enum(state: SSSekaiGlobalEnvironment):
+    state.container_enum = [
+        (container, container, "", "FILE_FOLDER", index)
+        for index, container in enumerate(state.containers)
+    ]
+    state.container_enum = sorted(state.container_enum, key=lambda x: x[1])
+
+
+def apply_catalog_selection(wm: bpy.types.WindowManager):
+    """Selects the catalog result picked with `SSSekaiBlenderLoadCatalogResultOperator`, once its file is loaded
+
+    The hierarchy it's in, and the animator or animation it is, are selected where applicable.
+    """
+    global sssekai_global
+    selection = sssekai_global.catalog_selection
+    if not selection or selection[0] != sssekai_global.env_path:
+        return
+    sssekai_global.catalog_selection = None
+    _, path_id, root_path_id = selection
+    for name, container in sssekai_global.containers.items():
+        if root_path_id in container.hierarchies:
+            wm.sssekai_selected_hierarchy_container = name
+            wm.sssekai_selected_hierarchy = str(root_path_id)
+        if path_id in container.animators:
+            wm.sssekai_selected_animator_container = name
+            wm.sssekai_selected_animator = str(path_id)
+        if path_id in container.animations:
+            wm.sssekai_selected_animation_container = name
+            wm.sssekai_selected_animation = str(path_id)
+
+
+def load_environment(
+    path: str,
+    aux_path: str,
+    use_snapshot: bool = True,
+    use_scanner: bool = False,
+    progress: Callable[[float, str], None] = None,
+    bundle_cache: BundleCache = None,
+) -> SSSekaiGlobalEnvironment:
+    """Loads `path` and `aux_path` into a new environment. `sssekai_global` is NOT touched.
+
+    Use `SSSekaiGlobalEnvironment.set_env` to switch over to the result.
+
+    Args:
+        path (str): asset bundle file or directory
+        aux_path (str): auxiliary directory
+        use_snapshot (bool): restore from, and save to snapshots
+        use_scanner (bool): use the multi-process scanner
+        progress (Callable[[float, str], None]): called with (0~1, message) along the way. Raise from it to cancel
+        bundle_cache (BundleCache): read compressed bundles from their uncompressed copies in here
+
+    Returns:
+        SSSekaiGlobalEnvironment: the loaded environment
+    """
+    progress = progress or (lambda factor, message: None)
+    assert path and os.path.exists(path), "Directory does not exist"
+    logger.debug("Loading environment: %s" % path)
+    UnityPy.config.SERIALIZED_FILE_PARSE_TYPETREE = False
+    UnityPy.config.FALLBACK_UNITY_VERSION = sssekai_get_unity_version()
+    state = SSSekaiGlobalEnvironment()
+    state.env = SSSekaiEnvironment(path, bundle_cache=bundle_cache)
+    state.env_path = path
+    state.env_aux_path = aux_path
+    state.env_files = get_file_signatures(path)
+    sources = None
+    if use_scanner and any(map(is_archive, state.env_files)):
+        # The scanner only reads plain files
+        logger.debug("Archives found, not using the scanner")
+        use_scanner = False
+    snapshot = load_environment_snapshot(path, aux_path) if use_snapshot else None
+    if snapshot:
+        logger.debug("Restoring from snapshot")
+        if snapshot.sources:
+            state.add_lazy_sources(snapshot.sources)
+        else:
+            load_folder(state.env, path, progress, 0, 0.8)
+        restore_environment_snapshot(snapshot, state.containers)
+    elif use_scanner:
+        sources = scan_environment(state, path, progress, 0, 0.8)
+        state.add_lazy_sources(sources)
+    else:
+        load_folder(state.env, path, progress, 0, 0.5)
+        logger.debug("Building scene hierarchy")
+        progress(0.5, "Building scene hierarchy")
+        for hierarchy in build_scene_hierarchy(state.env):
+            root = state.get_object(
+                hierarchy.root_game_object_path_id, hierarchy.root_file
+            )
+            container = root.container or EMPTY_CONTAINER
+            state.containers[container].hierarchies[hierarchy.path_id] = hierarchy
+        progress(0.7, "Enumerating animations")
+        for reader in filter(
+            lambda obj: obj.type == ClassIDType.AnimationClip, state.env.objects
+        ):
+            container = state.containers[reader.container or EMPTY_CONTAINER]
+            container.animations[reader.path_id] = reader.peek_name()
+            container.files[reader.path_id] = reader.assets_file.name
+
+        for reader in filter(
+            lambda obj: obj.type == ClassIDType.Animator, state.env.objects
+        ):
+            container = state.containers[reader.container or EMPTY_CONTAINER]
+            animator: Animator = reader.read()
+            container.animators[reader.path_id] = animator.m_GameObject.read().m_Name
+            container.files[reader.path_id] = reader.assets_file.name
+    if os.path.exists(aux_path):
+        logger.debug("Indexing auxiliary environment: %s" % aux_path)
+        progress(0.8, "Indexing auxiliary directory")
+        state.env.add_lazy_folder(aux_path)
+    if use_snapshot and not snapshot:
+        try:
+            save_environment_snapshot(path, aux_path, state.containers, sources)
+        except Exception as e:
+            logger.warning("Failed to save snapshot: %s" % e)
+
+    if bundle_cache:
+        bundle_cache.save()
+
+    logger.debug("Updating enums")
+    for container in state.containers.values():
+        container.update_enums()
+    update_container_enum(state)
+    progress(1, "")
+    return state
+
+
+def tag_redraw_all(context: bpy.types.Context):
+    for window in context.window_manager.windows:
+        for area in window.screen.areas:
+            area.tag_redraw()
+
+
+@register_class
+class SSSekaiBlenderLoadEnvironmentOperator(bpy.types.Operator):
+    bl_idname = "sssekai.load_environment_op"
+    bl_label = T("Load")
+    bl_description = T(
+        "Load the selected directories in the background. Press ESC to cancel"
+    )
+
+    def execute(self, context):
+        global sssekai_global
+        wm = context.window_manager
+        if sssekai_global.env_loading:
+            # Superseded. The running loader restarts itself once it's cancelled
+            sssekai_global.env_loading_cancelled = True
+            return {"CANCELLED"}
+        self.path = wm.sssekai_selected_assetbundle_file
+        self.aux_path = wm.sssekai_selected_assetbundle_file_aux
+        self.result = None
+        resident = sssekai_global.pop_resident_env(self.path, self.aux_path)
+        if resident:
+            logger.debug("Switching to resident environment: %s" % self.path)
+            sssekai_global.set_env(resident)
+            apply_catalog_selection(wm)
+            tag_redraw_all(context)
+            return {"FINISHED"}
+        use_snapshot = wm.sssekai_use_environment_snapshot
+        use_scanner = wm.sssekai_use_multiprocess_scanner
+        bundle_cache = get_bundle_cache(wm)
+
+        def progress(factor: float, message: str):
+            sssekai_global.env_loading_progress = factor
+            sssekai_global.env_loading_message = message
+            if sssekai_global.env_loading_cancelled:
+                raise LoadCancelled()
+
+        def run():
+            try:
+                self.result = load_environment(
+                    self.path,
+                    self.aux_path,
+                    use_snapshot,
+                    use_scanner,
+                    progress,
+                    bundle_cache,
+                )
+            except Exception as e:
+                self.result = e
+
+        sssekai_global.env_loading = True
+        sssekai_global.env_loading_cancelled = False
+        sssekai_global.env_loading_progress = 0
+        sssekai_global.env_loading_message = ""
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        wm.progress_begin(0, 100)
+        self.timer = wm.event_timer_add(0.1, window=context.window)
+        wm.modal_handler_add(self)
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context, event):
+        global sssekai_global
+        wm = context.window_manager
+        if event.type == "ESC":
+            sssekai_global.env_loading_cancelled = True
+            return {"RUNNING_MODAL"}
+        if event.type != "TIMER":
+            return {"PASS_THROUGH"}
+        wm.progress_update(int(sssekai_global.env_loading_progress * 100))
+        tag_redraw_all(context)
+        if self.thread.is_alive():
+            return {"PASS_THROUGH"}
+        wm.event_timer_remove(self.timer)
+        wm.progress_end()
+        sssekai_global.env_loading = False
+        if (
+            wm.sssekai_selected_assetbundle_file != self.path
+            or wm.sssekai_selected_assetbundle_file_aux != self.aux_path
+        ):
+            # Selection changed while loading
+            bpy.ops.sssekai.load_environment_op("INVOKE_DEFAULT")
+            return {"CANCELLED"}
+        if isinstance(self.result, LoadCancelled):
+            self.report({"INFO"}, T("Loading cancelled"))
+            return {"CANCELLED"}
+        if isinstance(self.result, Exception):
+            traceback.print_exception(self.result)
+            self.report({"ERROR"}, T("Failed to load: %s") % self.result)
+            return {"CANCELLED"}
+        sssekai_global.set_env(self.result)
+        self.result = None
+        apply_catalog_selection(wm)
+        tag_redraw_all(context)
+        self.report({"INFO"}, T("Loaded %s") % self.path)
+        return {"FINISHED"}
+
+
+@register_class
+class SSSekaiBlenderCancelLoadEnvironmentOperator(bpy.types.Operator):
+    bl_idname = "sssekai.cancel_load_environment_op"
+    bl_label = T("Cancel")
+    bl_description = T("Cancel loading the selected directories")
+
+    def execute(self, context):
+        global sssekai_global
+        sssekai_global.env_loading_cancelled = True
+        return {"FINISHED"}
+
+
+def apply_environment_changes(
+    state: SSSekaiGlobalEnvironment,
+    files: List[str],
+    results: List[dict],
+    signatures: Dict[str, Tuple[int, int]],
+):
+    """Updates `state` for the `files` that were added, removed or changed. Everything else is left as-is
+
+    Args:
+        files (List[str]): files that were added, removed or changed
+        results (List[dict]): scanner results of the ones that still exist. See `scan_file`
+        signatures (Dict[str, Tuple[int, int]]): the new `env_files`. See `get_file_signatures`
+    """
+    touched = set()
+    for file in files:
+        path_ids = state.unload_file(file)
+        for name, container in state.containers.items():
+            for entries in (
+                container.hierarchies,
+                container.animators,
+                container.animations,
+            ):
+                for path_id in path_ids & entries.keys():
+                    del entries[path_id]
+                    container.files.pop(path_id, None)
+                    touched.add(name)
+    for result in results:
+        for key in ("hierarchies", "animators", "animations"):
+            touched.update(entry[0] or EMPTY_CONTAINER for entry in result[key])
+    state.add_lazy_sources(add_scan_results(state, results))
+    for name in touched:
+        container = state.containers[name]
+        if container.hierarchies or container.animators or container.animations:
+            container.update_enums()
+        else:
+            del state.containers[name]
+    update_container_enum(state)
+    state.env_files = signatures
+    state.env_version += 1
+
+
+class SSSekaiEnvironmentWatcher:
+    """Timer (see `bpy.app.timers`) that polls the loaded directory for added, removed or changed files
+
+    Only the containers of those files are updated. Changed files are scanned in the background.
+    """
+
+    def __init__(self):
+        self.thread = None
+
+    def __call__(self):
+        if not getattr(bpy.context.window_manager, "sssekai_watch_environment", False):
+            return None
+        try:
+            self.poll()
+        except Exception as e:
+            traceback.print_exception(e)
+            logger.error("Failed to update the environment: %s" % e)
+        return WATCH_INTERVAL
+
+    def poll(self):
+        global sssekai_global
+        if self.thread:
+            if self.thread.is_alive():
+                return
+            self.thread = None
+            if self.env is not sssekai_global.env:
+                # Switched to another environment meanwhile
+                return
+            if isinstance(self.results, Exception):
+                raise self.results
+            apply_environment_changes(
+                sssekai_global, self.files, self.results, self.signatures
+            )
+            tag_redraw_all(bpy.context)
+            return
+        if sssekai_global.env is None or sssekai_global.env_loading:
+            return
+        path = sssekai_global.env_path
+        signatures = get_file_signatures(path)
+        previous = sssekai_global.env_files
+        files = [file for file in previous if file not in signatures]
+        files += [
+            file
+            for file, signature in signatures.items()
+            if previous.get(file, None) != signature
+        ]
+        if not files:
+            return
+        for file in files:
+            if file in signatures and is_archive(file):
+                # The scanner only reads plain files
+                logger.warning(
+                    "%s changed. Its contents are unloaded until the environment is loaded again"
+                    % file
+                )
+        logger.info("Updating %d changed files in %s" % (len(files), path))
+        self.env = sssekai_global.env
+        self.files = files
+        self.signatures = signatures
+        self.results = None
+        unity_version = sssekai_get_unity_version()
+
+        def run():
+            try:
+                self.results = [
+                    scan_file(file, path, unity_version)
+                    for file in files
+                    if file in signatures and not is_archive(file)
+                ]
+            except Exception as e:
+                self.results = e
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+
+
+environment_watcher = SSSekaiEnvironmentWatcher()
+
+
+def set_environment_watch(enabled: bool):
+    registered = bpy.app.timers.is_registered(environment_watcher)
+    if enabled and not registered:
+        bpy.app.timers.register(
+            environment_watcher, first_interval=WATCH_INTERVAL, persistent=True
+        )
+    elif not enabled and registered:
+        bpy.app.timers.unregister(environment_watcher)
@@ -35,6 +35,7 @@ from ..core.asset import (
     import_sekai_stage_lightmap_material,
     import_sekai_stage_color_add_material,
     import_scene_hierarchy,
+    materialize_scene_hierarchy,
     import_mesh_data,
 )
 from ..core.animation import (
@@ -48,7 +49,8 @@ from ..core.animation import (
 )
 from ..core.types import Hierarchy
 from ..core.math import blVector, blEuler, blMatrix, xform_to_matrix
-from ..core.helpers import apply_pose_matrix
+from ..core.helpers import apply_pose_matrix, get_armature_path_table
+from ..core.binder import PathBinder
 from .. import register_class, register_wm_props, logger
 from .. import sssekai_global
 from ..operators.material import (
@@ -214,6 +216,7 @@ class SSSekaiBlenderImportHierarchyOperator(bpy.types.Operator):
         selected = wm.sssekai_selected_hierarchy
         selected: bpy.types.EnumProperty
         hierarchy = sssekai_global.containers[container].hierarchies[int(selected)]
+        hierarchy = materialize_scene_hierarchy(hierarchy, sssekai_global.get_object)
         logger.debug("Loading selected hierarchy: %s" % hierarchy.name)
         # Import the scene as an Armature
         scene = import_scene_hierarchy(
@@ -284,14 +287,11 @@ class SSSekaiBlenderImportHierarchyOperator(bpy.types.Operator):
                         % (game_object.m_Name, str(e))
                     )
         # Static Meshes
-        if wm.sssekai_hierarchy_import_seperate_armatures:
-            # Only bones that can have effect on mesh skinning are kept in `scene` with this mode
-            # Create a complete Armature for the static ones
-            scene = import_scene_hierarchy(
-                hierarchy, wm.sssekai_hierarchy_import_bindpose, False
-            )
         for armature_obj, nodes, sm_id in scene:
-            assert sm_id == 0, "bad importer state"
+            if sm_id:
+                # Only bones that can have effect on mesh skinning are kept in these
+                # The complete Armature (SMR PathID 0) is built for the static ones
+                continue
             if wm.sssekai_hierarchy_import_mode == "SEKAI_CHARACTER":
                 armature_obj.parent = active_obj
             for path_id, bone_name in tqdm(
@@ -488,11 +488,20 @@ class SSSekaiBlenderImportHierarchyAnimationOperaotr(bpy.types.Operator):
         # XXX: Does TOS mean To String? Unity uses this nomenclature internally
         tos_leaf = dict()
         bind_xform = dict()
-        bpy.ops.object.mode_set(mode="EDIT")
-        if wm.sssekai_animation_use_animator:
-            animator = sssekai_global.containers[
-                wm.sssekai_selected_animator_container
-            ].animators[int(wm.sssekai_selected_animator)]
+        path_table = get_armature_path_table(active_obj)
+        if (
+            path_table
+            and not wm.sssekai_animation_use_animator
+            and not wm.sssekai_animation_root_bone
+        ):
+            # Built when the hierarchy was imported. See `import_scene_hierarchy`
+            tos_leaf = path_table
+        elif wm.sssekai_animation_use_animator:
+            bpy.ops.object.mode_set(mode="EDIT")
+            animator = sssekai_global.get_container_object(
+                wm.sssekai_selected_animator_container,
+                int(wm.sssekai_selected_animator),
+            )
             animator = animator.read()
             avatar = animator.m_Avatar
             if not avatar.path_id:
@@ -530,6 +539,7 @@ class SSSekaiBlenderImportHierarchyAnimationOperaotr(bpy.types.Operator):
             if global_xform:
                 apply_pose_matrix(active_obj, global_xform, True, True)
         else:
+            bpy.ops.object.mode_set(mode="EDIT")
             dfngen = None
             if wm.sssekai_animation_root_bone:
                 ebone = active_obj.data.edit_bones.get(
@@ -553,14 +563,21 @@ class SSSekaiBlenderImportHierarchyAnimationOperaotr(bpy.types.Operator):
                     pa_path += "/"
                 # Blender bone names are guaranteed to be unique within their hierarchy
                 tos_leaf[child.name] = pa_path + child[KEY_HIERARCHY_BONE_NAME]
-            tos_leaf = {crc32(v): k for k, v in tos_leaf.items()}
-        tos_leaf[0] = active_obj.data.edit_bones[0].name  # Root bone is always 0
+            # Paths start at the selected root bone, or right below the stub
+            root = (
+                None
+                if wm.sssekai_animation_root_bone
+                else active_obj.get(KEY_HIERARCHY_BONE_NAME, None)
+            )
+            tos_leaf = PathBinder({v: k for k, v in tos_leaf.items()}, root)
+        if tos_leaf is not path_table:
+            tos_leaf[0] = active_obj.data.edit_bones[0].name  # Root bone is always 0
         bpy.ops.object.mode_set(mode="OBJECT")
         # Load Animation
-        anim = sssekai_global.containers[
-            wm.sssekai_selected_animation_container
-        ].animations[int(wm.sssekai_selected_animation)]
-        logger.info("Loading Animation %s" % anim.m_Name)
+        anim = sssekai_global.get_container_object(
+            wm.sssekai_selected_animation_container, int(wm.sssekai_selected_animation)
+        )
+        logger.info("Loading Animation %s" % anim.peek_name())
         anim = anim.read()
         anim = read_animation(anim)
         # Check for Mecanim IK hashes
@@ -666,10 +683,10 @@ class SSSekaiBlenderImportSekaiCharacterFaceMotionOperator(bpy.types.Operator):
         # Set active object to the face
         bpy.context.view_layer.objects.active = face
         # Load Animation
-        anim = sssekai_global.containers[
-            wm.sssekai_selected_animation_container
-        ].animations[int(wm.sssekai_selected_animation)]
-        logger.info("Loading Animation %s" % anim.m_Name)
+        anim = sssekai_global.get_container_object(
+            wm.sssekai_selected_animation_container, int(wm.sssekai_selected_animation)
+        )
+        logger.info("Loading Animation %s" % anim.peek_name())
         anim = anim.read()
         anim = read_animation(anim)
         action = load_sekai_keyshape_animation(anim.Name, anim, crc_table)
@@ -698,10 +715,10 @@ class SSSekaiBlenderImportSekaiCameraAnimationOperator(bpy.types.Operator):
         active_obj = context.active_object
         assert KEY_SEKAI_CAMERA_RIG in active_obj, "Active object must be a Camera Rig"
         # Load Animation
-        anim = sssekai_global.containers[
-            wm.sssekai_selected_animation_container
-        ].animations[int(wm.sssekai_selected_animation)]
-        logger.info("Loading Animation %s" % anim.m_Name)
+        anim = sssekai_global.get_container_object(
+            wm.sssekai_selected_animation_container, int(wm.sssekai_selected_animation)
+        )
+        logger.info("Loading Animation %s" % anim.peek_name())
         anim = anim.read()
         anim = read_animation(anim)
         if not wm.sssekai_animation_import_use_scene_fps:
@@ -739,10 +756,10 @@ class SSSekaiBlenderImportGlobalLightAnimationOperator(bpy.types.Operator):
         wm = context.window_manager
         ensure_sssekai_shader_blend()
         # Load Animation
-        anim = sssekai_global.containers[
-            wm.sssekai_selected_animation_container
-        ].animations[int(wm.sssekai_selected_animation)]
-        logger.info("Loading Animation %s" % anim.m_Name)
+        anim = sssekai_global.get_container_object(
+            wm.sssekai_selected_animation_container, int(wm.sssekai_selected_animation)
+        )
+        logger.info("Loading Animation %s" % anim.peek_name())
         anim = anim.read()
         anim = read_animation(anim)
         if not wm.sssekai_animation_import_use_scene_fps:
@@ -795,10 +812,10 @@ class SSSekaiBlenderImportCharacterLightAnimationOperator(bpy.types.Operator):
         ), "Active object must be a Character Controller"
         controler = active_obj[KEY_SEKAI_CHARACTER_LIGHT_OBJ]
         # Load Animation
-        anim = sssekai_global.containers[
-            wm.sssekai_selected_animation_container
-        ].animations[int(wm.sssekai_selected_animation)]
-        logger.info("Loading Animation %s" % anim.m_Name)
+        anim = sssekai_global.get_container_object(
+            wm.sssekai_selected_animation_container, int(wm.sssekai_selected_animation)
+        )
+        logger.info("Loading Animation %s" % anim.peek_name())
         anim = anim.read()
         anim = read_animation(anim)
         if not wm.sssekai_animation_import_use_scene_fps:
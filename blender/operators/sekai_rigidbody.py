@@ -4,6 +4,7 @@
 import bpy, math
 from bpy.app.translations import pgettext as T
 from ..core.types import Hierarchy
+from ..core.asset import materialize_scene_hierarchy
 from ..core.consts import *
 from collections import defaultdict
 from .. import register_class, register_wm_props, logger
@@ -138,6 +139,7 @@ class SSSekaiBlenderHierarchyAddSekaiRigidBodiesOperator(bpy.types.Operator):
         selected: bpy.types.EnumProperty
         hierarchy = sssekai_global.containers[container].hierarchies[int(selected)]
         assert hierarchy, "Hierarchy Data not found. Please ensure you've selected the container the hierarchy is in"
+        hierarchy = materialize_scene_hierarchy(hierarchy, sssekai_global.get_object)
         context.scene.frame_current = 0
         armature = active_obj.data
         def find_by_script(game_object: GameObject, name: str):
@@ -165,7 +167,7 @@ class SSSekaiBlenderHierarchyAddSekaiRigidBodiesOperator(bpy.types.Operator):
         # Graph setup
         assert spring_mananger
         nodeDict = {node.name: node for node in hierarchy.nodes.values()}
-        nodeDepths = {node.name: depth for pa,node,depth in hierarchy.root.children_recursive()}
+        nodeDepths = {node.name: depth for pa,node,depth in hierarchy.children_recursive()}
         springBones = [
             swizzle_data(bone.read()) for bone in spring_mananger.springBones
         ]
@@ -193,7 +195,7 @@ class SSSekaiBlenderHierarchyAddSekaiRigidBodiesOperator(bpy.types.Operator):
         # DSU
         for root in springRootNames:
             node = nodeDict[root]
-            for parent, child, depth in node.children_recursive():
+            for parent, child, depth in hierarchy.children_recursive(node):
                 springNodeParents[child.name] = root
         # https://github.com/unity3d-jp/UnityChanSpringBone/tree/9415071549aee47c094657d9ef5af239b96c201f/Runtime/Colliders
         sphereColliders = [swizzle_data(collider) for collider in sphereColliders]
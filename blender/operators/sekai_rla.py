@@ -1,6 +1,11 @@
 from bpy.app.translations import pgettext as T
 import bpy, bpy.utils.previews
-import json
+import json, zipfile, os, io
+
+import UnityPy
+from sssekai.unity import sssekai_get_unity_version
+from sssekai.unity.AssetBundle import load_assetbundle
+from sssekai.crypto.AssetBundle import decrypt_iter
 
 from sssekai.unity.AnimationClip import (
     AnimationHelper,
@@ -9,6 +14,7 @@ from sssekai.unity.AnimationClip import (
     kBindTransformPosition,
 )
 from UnityPy.classes import GenericBinding
+from UnityPy.enums import ClassIDType
 
 from ..core.consts import *
 from ..core.helpers import (
@@ -21,7 +27,13 @@ from ..core.animation import (
     load_armature_animation,
     load_sekai_keyshape_animation,
 )
-from ..core.helpers import armature_editbone_children_recursive
+from ..core.helpers import (
+    armature_editbone_children_recursive,
+    get_armature_path_table,
+)
+from ..core.binder import PathBinder
+from ..core.environment import SSSekaiEnvironment
+from .environment import get_bundle_cache
 from .. import sssekai_global
 
 
@@ -71,20 +83,24 @@ class SSSekaiBlenderImportRLASegmentOperator(bpy.types.Operator):
         ]
         if body_obj:
             bpy.context.view_layer.objects.active = body_obj
-            bpy.ops.object.mode_set(mode="EDIT")
-            tos_crc_table = dict()
-            for parent, child, depth in armature_editbone_children_recursive(
-                body_obj.data
-            ):
-                if not parent:
-                    tos_crc_table[child.name] = child.name
-                else:
-                    tos_crc_table[child.name] = (
-                        tos_crc_table[parent.name] + "/" + child.name
-                    )
-            tos_crc_table = {crc32(v): k for k, v in tos_crc_table.items()}
-            inv_tos_crc_table = {v: k for k, v in tos_crc_table.items()}
-            bpy.ops.object.mode_set(mode="OBJECT")
+            # Built when the hierarchy was imported. See `import_scene_hierarchy`
+            tos_crc_table = get_armature_path_table(body_obj)
+            if not tos_crc_table:
+                bpy.ops.object.mode_set(mode="EDIT")
+                tos_crc_table = dict()
+                for parent, child, depth in armature_editbone_children_recursive(
+                    body_obj.data
+                ):
+                    if not parent:
+                        tos_crc_table[child.name] = child.name
+                    else:
+                        tos_crc_table[child.name] = (
+                            tos_crc_table[parent.name] + "/" + child.name
+                        )
+                tos_crc_table = PathBinder([(v, k) for k, v in tos_crc_table.items()])
+                bpy.ops.object.mode_set(mode="OBJECT")
+            # Every bone, including the ones sharing a path with another
+            inv_tos_crc_table = tos_crc_table.bones
             anim = AnimationHelper(sssekai_global.rla_selected_raw_clip + "_MOT", 0, 0)
             # fmt: off
             for tick, pose in chara_segments:                
@@ -229,6 +245,7 @@ NOTE: NLA tracks will be used regardless of the option specified!"""
             (min_tick - base_tick) / SEKAI_RLA_TIME_MAGNITUDE,
             (max_tick - base_tick) / SEKAI_RLA_TIME_MAGNITUDE,
         )
+        sssekai_global.rla_version += 1
 
     def execute(self, context):
         wm = context.window_manager
@@ -244,3 +261,98 @@ NOTE: NLA tracks will be used regardless of the option specified!"""
             except Exception as e:
                 logger.error("Failed to import segment: %s" % e)
         return {"FINISHED"}
+
+
+def open_bundle(path: str) -> io.BytesIO:
+    """Opens, and decrypts (if needed) the bundle at `path`. See `load_assetbundle`"""
+    stream = io.BytesIO()
+    with open(path, "rb") as f:
+        for block in decrypt_iter(lambda nbytes: f.read(nbytes)):
+            stream.write(block)
+    stream.seek(0)
+    return stream
+
+
+@register_class
+class SSSekaiBlenderLoadRLAArchiveOperator(bpy.types.Operator):
+    bl_idname = "sssekai.rla_load_archive_op"
+    bl_label = T("Load RLA Bundle")
+    bl_description = T("Load the selected RLA Bundle or ZIP archive")
+
+    def execute(self, context):
+        global sssekai_global
+        wm = context.window_manager
+        filename = wm.sssekai_streaming_live_archive_bundle
+        if not os.path.isfile(filename):
+            self.report({"ERROR"}, T("File not found: %s") % filename)
+            return {"CANCELLED"}
+        try:
+            # Support ZIP archives as well
+            with open(filename, "rb") as f:
+                datas = dict()
+                if f.read(2) == b"PK":
+                    f.seek(0)
+                    logger.debug("Loaded RLA ZIP archive: %s" % filename)
+                    with zipfile.ZipFile(f, "r") as z:
+                        for name in z.namelist():
+                            with z.open(name) as zf:
+                                datas[name] = zf.read()
+                else:
+                    bundle_cache = get_bundle_cache(wm)
+                    cached = bundle_cache and bundle_cache.get(filename, open_bundle)
+                    if cached:
+                        UnityPy.config.FALLBACK_UNITY_VERSION = (
+                            sssekai_get_unity_version()
+                        )
+                        rla_env = SSSekaiEnvironment()
+                        rla_env.load_file(cached)
+                    else:
+                        f.seek(0)
+                        rla_env = load_assetbundle(f)
+                    logger.debug("Loaded RLA Unity bundle: %s" % filename)
+                    for obj in rla_env.objects:
+                        if obj.type in {ClassIDType.TextAsset}:
+                            data = obj.read()
+                            datas[data.m_Name] = data.m_Script.encode(
+                                "utf-8", "surrogateescape"
+                            )
+            header = json.loads(datas["sekai.rlh"].decode("utf-8"))
+            seconds = header["splitSeconds"]
+            raw_clips = dict()
+            for sid in header["splitFileIds"]:
+                sname = "sekai_%02d_%08d" % (seconds, sid)
+                raw_clips[sname] = datas[sname + ".rla"]
+        except Exception as e:
+            logger.error("Failed to load RLA bundle: %s" % e)
+            self.report({"ERROR"}, T("Failed to load RLA bundle: %s") % e)
+            return {"CANCELLED"}
+        sssekai_global.rla_header = header
+        sssekai_global.rla_raw_clips = raw_clips
+        sssekai_global.rla_sekai_streaming_live_bundle_path = filename
+        sssekai_global.rla_enum_entries = [
+            (sname, sname, "", "ANIM_DATA", index)
+            for index, sname in enumerate(raw_clips.keys())
+        ]
+        sssekai_global.rla_selected_raw_clip = None
+        sssekai_global.rla_clip_data.clear()
+        sssekai_global.rla_clip_charas.clear()
+        sssekai_global.rla_clip_tick_range = (0, 0)
+        sssekai_global.rla_version += 1
+        logger.debug("RLA version: %s" % header["version"])
+        return {"FINISHED"}
+
+
+@register_class
+class SSSekaiBlenderLoadRLAClipOperator(bpy.types.Operator):
+    bl_idname = "sssekai.rla_load_clip_op"
+    bl_label = T("Load RLA Clip")
+    bl_description = T("Decode the selected RLA Clip")
+
+    def execute(self, context):
+        global sssekai_global
+        wm = context.window_manager
+        entry = wm.sssekai_rla_selected
+        if not sssekai_global.rla_raw_clips.get(entry, None):
+            return {"CANCELLED"}
+        SSSekaiBlenderImportRLABatchOperator.update_selected_rla_asset(entry)
+        return {"FINISHED"}
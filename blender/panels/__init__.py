@@ -1,5 +1,6 @@
 from . import warning
 from . import importer
+from . import catalog
 
 from . import sekai_rla
 
@@ -0,0 +1,155 @@
+from bpy.app.translations import pgettext as T
+import bpy
+
+from bpy.props import StringProperty, EnumProperty
+from ..core.helpers import (
+    register_serachable_enum,
+    get_enum_search_op_name,
+    versioned_enum_items,
+)
+from .. import register_class, register_wm_props
+from .. import sssekai_global
+
+from ..operators.catalog import (
+    SSSekaiBlenderBuildCatalogOperator,
+    SSSekaiBlenderCancelBuildCatalogOperator,
+    SSSekaiBlenderSearchCatalogOperator,
+    SSSekaiBlenderLoadCatalogResultOperator,
+)
+
+EMPTY_OPT = ("<no results>", "Not Available", "", "ERROR", 0)
+
+
+def update_catalog_search(self, context: bpy.types.Context):
+    bpy.ops.sssekai.catalog_search_op()
+
+
+enumerate_catalog_results = versioned_enum_items(
+    lambda context: sssekai_global.catalog_version,
+    lambda context: [
+        (
+            str(index),
+            f"{name} ({path_id})",
+            f"{class_name}\n{container or ''}\n{file}",
+            "FILE",
+            index,
+        )
+        for index, (file, container, path_id, name, class_name, _) in enumerate(
+            sssekai_global.catalog_results
+        )
+    ]
+    or [EMPTY_OPT],
+)
+
+register_serachable_enum(
+    "sssekai_catalog_result",
+    name=T("Result"),
+    description=T("Selected search result"),
+    items=enumerate_catalog_results,
+)
+register_wm_props(
+    sssekai_catalog_directory=StringProperty(
+        name=T("Directory"),
+        description=T(
+            "Where the asset bundles to catalog are located. Every file in this directory is scanned"
+        ),
+        subtype="DIR_PATH",
+        update=update_catalog_search,
+    ),
+    sssekai_catalog_query=StringProperty(
+        name=T("Name"),
+        description=T(
+            "Name to search for. Use * and ? as wildcards, i.e. *0474*. Case insensitive"
+        ),
+        default="*",
+        update=update_catalog_search,
+    ),
+    sssekai_catalog_type=EnumProperty(
+        name=T("Type"),
+        description=T("Type of the assets to search for"),
+        items=[
+            ("ANY", T("Any"), T("Any named asset"), "FILE", 1),
+            (
+                "HIERARCHY",
+                T("Hierarchy"),
+                T("Root of a hierarchy"),
+                "OUTLINER_OB_ARMATURE",
+                2,
+            ),
+            ("AnimationClip", T("Animation"), T("AnimationClip"), "ANIM_DATA", 3),
+            ("Mesh", T("Mesh"), T("Mesh"), "MESH_DATA", 4),
+            ("Material", T("Material"), T("Material"), "MATERIAL", 5),
+            ("Texture2D", T("Texture"), T("Texture2D"), "TEXTURE", 6),
+            ("GameObject", T("GameObject"), T("GameObject"), "OBJECT_DATA", 7),
+        ],
+        update=update_catalog_search,
+    ),
+    sssekai_catalog_containing=EnumProperty(
+        name=T("Containing"),
+        description=T("Only find hierarchies whose prefab has such a component"),
+        items=[
+            ("NONE", T("Anything"), T("Any hierarchy"), "BLANK1", 1),
+            (
+                "SkinnedMeshRenderer",
+                T("Skinned Mesh"),
+                T("SkinnedMeshRenderer"),
+                "MOD_ARMATURE",
+                2,
+            ),
+            ("MeshRenderer", T("Mesh"), T("MeshRenderer"), "MESH_DATA", 3),
+            ("Animator", T("Animator"), T("Animator"), "DECORATE_ANIMATE", 4),
+        ],
+        update=update_catalog_search,
+    ),
+)
+
+
+@register_class
+class SSSekaiCatalogPanel(bpy.types.Panel):
+    bl_idname = "OBJ_PT_sssekai_catalog"
+    bl_label = T("Catalog")
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "SSSekai"
+    bl_options = {"DEFAULT_CLOSED"}
+
+    def draw(self, context):
+        layout = self.layout
+        wm = context.window_manager
+        row = layout.row()
+        row.prop(wm, "sssekai_catalog_directory", icon="FILE_FOLDER")
+        row = layout.row()
+        if sssekai_global.catalog_building:
+            row.label(
+                text=T("Cataloging... %d%% %s")
+                % (
+                    sssekai_global.catalog_building_progress * 100,
+                    sssekai_global.catalog_building_message,
+                ),
+                icon="TIME",
+            )
+            row.operator(
+                SSSekaiBlenderCancelBuildCatalogOperator.bl_idname, icon="CANCEL"
+            )
+        else:
+            row.operator(
+                SSSekaiBlenderBuildCatalogOperator.bl_idname, icon="FILE_REFRESH"
+            )
+        row = layout.row()
+        row.prop(wm, "sssekai_catalog_type")
+        if wm.sssekai_catalog_type == "HIERARCHY":
+            row = layout.row()
+            row.prop(wm, "sssekai_catalog_containing")
+        row = layout.row()
+        row.prop(wm, "sssekai_catalog_query", icon="VIEWZOOM")
+        row.operator(
+            SSSekaiBlenderSearchCatalogOperator.bl_idname, text="", icon="FILE_REFRESH"
+        )
+        row = layout.row()
+        row.prop(wm, "sssekai_catalog_result")
+        row.operator(
+            get_enum_search_op_name("sssekai_catalog_result"),
+            icon="VIEWZOOM",
+        )
+        row = layout.row()
+        row.operator(SSSekaiBlenderLoadCatalogResultOperator.bl_idname, icon="IMPORT")
@@ -11,19 +11,22 @@ from bpy.app.translations import pgettext as T
 import bpy, bpy.utils.previews
 import os
 
-from sssekai.unity import sssekai_get_unity_version
-
-import UnityPy
-from UnityPy.enums import ClassIDType
-from UnityPy.classes import AnimationClip, Animator
-
-from ..core.helpers import register_serachable_enum, get_enum_search_op_name
+from ..core.helpers import (
+    register_serachable_enum,
+    get_enum_search_op_name,
+    versioned_enum_items,
+)
 from ..core.consts import *
 from .. import register_class, register_wm_props, logger
 
-from ..core.asset import build_scene_hierarchy
 from .. import sssekai_global, SSSekaiEnvironmentContainer
 
+from ..operators.environment import (
+    SSSekaiBlenderLoadEnvironmentOperator,
+    SSSekaiBlenderCancelLoadEnvironmentOperator,
+    set_environment_watch,
+)
+
 from ..operators.importer import (
     SSSekaiBlenderCreateCameraRigControllerOperator,
     SSSekaiBlenderImportHierarchyOperator,
@@ -50,86 +53,59 @@ from ..operators.sekai_rigidbody import (
 from ..operators.material import SSSekaiGenericMaterialSetModeOperator
 
 EMPTY_OPT = ("<no assest selected!>", "Not Available", "", "ERROR", 0)
-EMPTY_CONTAINER = "<default>"
 ALL_CONTAINER = "<all>"
 
 
-def update_environment(path: str, aux_path: str):
+def update_resident_environments(self, context: bpy.types.Context):
     global sssekai_global
 
-    if path and os.path.exists(path):
-        if sssekai_global.env_path == path and sssekai_global.env_aux_path == aux_path:
-            return
-        logger.debug("Loading environment: %s" % path)
-        UnityPy.config.SERIALIZED_FILE_PARSE_TYPETREE = False
-        UnityPy.config.FALLBACK_UNITY_VERSION = sssekai_get_unity_version()
-        sssekai_global.reset_env()
-        sssekai_global.env = UnityPy.load(path)
-        sssekai_global.env_path = path
-        sssekai_global.env_aux_path = aux_path
-        logger.debug("Building scene hierarchy")
-        hierarchies = build_scene_hierarchy(sssekai_global.env)
-        if os.path.exists(aux_path):
-            logger.debug("Loading auxiliary environment: %s" % aux_path)
-            sssekai_global.env.load_folder(aux_path)
-        for hierarchy in hierarchies:
-            root = hierarchy.root.game_object
-            container = root.object_reader.container or EMPTY_CONTAINER
-            sssekai_global.containers[container].hierarchies[
-                hierarchy.path_id
-            ] = hierarchy
-        logger.debug("Updating enums")
-        for reader in filter(
-            lambda obj: obj.type == ClassIDType.AnimationClip,
-            sssekai_global.env.objects,
-        ):
-            container = reader.container or EMPTY_CONTAINER
-            sssekai_global.containers[container].animations[reader.path_id] = reader
-
-        for reader in filter(
-            lambda obj: obj.type == ClassIDType.Animator, sssekai_global.env.objects
-        ):
-            container = reader.container or EMPTY_CONTAINER
-            sssekai_global.containers[container].animators[reader.path_id] = reader
-
-        for container in sssekai_global.containers.values():
-            container.update_enums()
-
-        sssekai_global.container_enum = [
-            (container, container, "", "FILE_FOLDER", index)
-            for index, container in enumerate(sssekai_global.containers)
-        ]
-        sssekai_global.container_enum = sorted(
-            sssekai_global.container_enum, key=lambda x: x[1]
-        )
-    else:
-        sssekai_global.container_enum.clear()
+    wm = context.window_manager
+    sssekai_global.env_resident_budget = wm.sssekai_resident_environments
+    sssekai_global.evict_resident_envs()
+
 
+def update_environment_watch(self, context: bpy.types.Context):
+    set_environment_watch(context.window_manager.sssekai_watch_environment)
 
-def enumerate_containers(obj: bpy.types.Object, context: bpy.types.Context):
+
+def update_environment(self, context: bpy.types.Context):
     global sssekai_global
 
     wm = context.window_manager
-    try:
-        update_environment(
-            wm.sssekai_selected_assetbundle_file,
-            wm.sssekai_selected_assetbundle_file_aux,
-        )
-    except Exception as e:
-        wm.sssekai_selected_assetbundle_file = ""
-        raise e
-    return sssekai_global.container_enum or [EMPTY_OPT]
+    if not wm.sssekai_selected_assetbundle_file:
+        sssekai_global.reset_env()
+        return
+    if (
+        sssekai_global.env_path == wm.sssekai_selected_assetbundle_file
+        and sssekai_global.env_aux_path == wm.sssekai_selected_assetbundle_file_aux
+    ):
+        return
+    if context.window:
+        bpy.ops.sssekai.load_environment_op("INVOKE_DEFAULT")
+
+
+enumerate_containers = versioned_enum_items(
+    lambda context: sssekai_global.env_version,
+    lambda context: sssekai_global.container_enum or [EMPTY_OPT],
+)
 
 
 def enumerate_prop(container_selection_key: str, prop: str):
     global sssekai_global
 
-    def inner(obj: bpy.types.Object, context: bpy.types.Context):
-        wm = context.window_manager
-        container = getattr(wm, container_selection_key)
-        return getattr(sssekai_global.containers[container].enums, prop) or [EMPTY_OPT]
+    def build(context: bpy.types.Context):
+        container = sssekai_global.containers.get(
+            getattr(context.window_manager, container_selection_key), None
+        )
+        return (container and getattr(container.enums, prop)) or [EMPTY_OPT]
 
-    return inner
+    return versioned_enum_items(
+        lambda context: (
+            sssekai_global.env_version,
+            getattr(context.window_manager, container_selection_key),
+        ),
+        build,
+    )
 
 
 register_serachable_enum(
@@ -172,9 +148,11 @@ register_wm_props(
     sssekai_selected_assetbundle_file=StringProperty(
         name=T("Directory"),
         description=T(
-            "Where the asset bundle(s) are located. Every AssetBundle in this directory will be loaded (if possible)"
+            "Where the asset bundle(s) are located. Every AssetBundle in this directory will be loaded (if possible)\n"
+            "ZIP/TAR archives can be picked as well, their members are loaded without extracting them"
         ),
-        subtype="DIR_PATH",
+        subtype="FILE_PATH",
+        update=update_environment,
     ),
     sssekai_selected_assetbundle_file_aux=StringProperty(
         name=T("Aux. Directory"),
@@ -183,6 +161,57 @@ register_wm_props(
             "NOTE: These files will NOT show up in the Asset Browser, but will be used by the addon if needed."
         ),
         subtype="DIR_PATH",
+        update=update_environment,
+    ),
+    sssekai_use_environment_snapshot=BoolProperty(
+        name=T("Use Snapshot"),
+        description=T(
+            "Cache the parsed hierarchies and animations of the selected directories on disk, and reuse them if no file has changed since"
+        ),
+        default=True,
+    ),
+    sssekai_use_multiprocess_scanner=BoolProperty(
+        name=T("Multi-process Scan"),
+        description=T(
+            "Scan the selected directory with a pool of processes outside of Blender. Files are then only loaded when they're needed.\n"
+            "Recommended for directories with a lot of asset bundles"
+        ),
+        default=False,
+    ),
+    sssekai_bundle_cache_directory=StringProperty(
+        name=T("Bundle Cache"),
+        description=T(
+            "Where to keep uncompressed copies of compressed asset bundles, so they're not decompressed again the next time they're loaded.\n"
+            "Leave empty to disable"
+        ),
+        subtype="DIR_PATH",
+        default="",
+    ),
+    sssekai_bundle_cache_size=FloatProperty(
+        name=T("Cache Size (GiB)"),
+        description=T(
+            "How large the bundle cache may grow. The least recently used copies are removed first"
+        ),
+        default=16,
+        min=0,
+    ),
+    sssekai_watch_environment=BoolProperty(
+        name=T("Watch"),
+        description=T(
+            "Watch the selected directory for added, removed or changed files, and update only the assets in them"
+        ),
+        default=False,
+        update=update_environment_watch,
+    ),
+    sssekai_resident_environments=IntProperty(
+        name=T("Keep Loaded"),
+        description=T(
+            "How many previously loaded directories are kept in memory. Switching back to one of them is then instant.\n"
+            "The least recently used ones are unloaded first"
+        ),
+        default=2,
+        min=0,
+        update=update_resident_environments,
     ),
     sssekai_animation_append_exisiting=BoolProperty(
         name=T("Append"),
@@ -507,6 +536,32 @@ class SSSekaiBlenderImportPanel(bpy.types.Panel):
         row = layout.row()
         row.prop(wm, "sssekai_selected_assetbundle_file_aux", icon="FILE_FOLDER")
         row = layout.row()
+        row.prop(wm, "sssekai_use_environment_snapshot")
+        row.prop(wm, "sssekai_use_multiprocess_scanner")
+        row.prop(wm, "sssekai_watch_environment")
+        row = layout.row()
+        row.prop(wm, "sssekai_resident_environments")
+        row = layout.row()
+        row.prop(wm, "sssekai_bundle_cache_directory", icon="FILE_CACHE")
+        row.prop(wm, "sssekai_bundle_cache_size")
+        row = layout.row()
+        if sssekai_global.env_loading:
+            row.label(
+                text=T("Loading... %d%% %s")
+                % (
+                    sssekai_global.env_loading_progress * 100,
+                    sssekai_global.env_loading_message,
+                ),
+                icon="TIME",
+            )
+            row.operator(
+                SSSekaiBlenderCancelLoadEnvironmentOperator.bl_idname, icon="CANCEL"
+            )
+        else:
+            row.operator(
+                SSSekaiBlenderLoadEnvironmentOperator.bl_idname, icon="FILE_REFRESH"
+            )
+        row = layout.row()
 
         row.label(text=T("Import Type"), icon="IMPORT")
         row = layout.row()
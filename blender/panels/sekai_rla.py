@@ -1,22 +1,31 @@
 from bpy.types import Context
 from bpy.app.translations import pgettext as T
 import bpy, bpy.utils.previews
-import zipfile, json, os
 
-from sssekai.unity.AssetBundle import load_assetbundle
-
-from UnityPy.enums import ClassIDType
 from bpy.props import StringProperty, EnumProperty, IntProperty, IntVectorProperty
 from ..core.consts import *
+from ..core.helpers import versioned_enum_items
 from .. import register_class, register_wm_props, logger
 from .. import sssekai_global
 
 from ..operators.sekai_rla import (
     SSSekaiBlenderImportRLASegmentOperator,
     SSSekaiBlenderImportRLABatchOperator,
+    SSSekaiBlenderLoadRLAArchiveOperator,
+    SSSekaiBlenderLoadRLAClipOperator,
 )
 
 
+def update_rla_archive(self, context: bpy.types.Context):
+    if context.window_manager.sssekai_streaming_live_archive_bundle:
+        if bpy.ops.sssekai.rla_load_archive_op() == {"FINISHED"}:
+            bpy.ops.sssekai.rla_load_clip_op()
+
+
+def update_rla_clip(self, context: bpy.types.Context):
+    bpy.ops.sssekai.rla_load_clip_op()
+
+
 @register_class
 class SSSekaiRLAImportPanel(bpy.types.Panel):
     bl_idname = "OBJ_PT_sssekai_rla_import"
@@ -25,74 +34,10 @@ class SSSekaiRLAImportPanel(bpy.types.Panel):
     bl_region_type = "UI"
     bl_category = "SSSekai"
 
-    @staticmethod
-    def enumerate_rla_assets(self, context):
-        global sssekai_global
-
-        if context is None:
-            return []
-
-        wm = context.window_manager
-
-        filename = wm.sssekai_streaming_live_archive_bundle
-        if (
-            not os.path.isfile(filename)
-            or filename == sssekai_global.rla_sekai_streaming_live_bundle_path
-        ):
-            return sssekai_global.rla_enum_entries or [("NONE", "None", "", 0)]
-
-        try:
-            # Support ZIP archives as well
-            with open(filename, "rb") as f:
-                datas = dict()
-                if f.read(2) == b"PK":
-                    f.seek(0)
-                    logger.debug("Loaded RLA ZIP archive: %s" % filename)
-                    with zipfile.ZipFile(f, "r") as z:
-                        for name in z.namelist():
-                            with z.open(name) as zf:
-                                datas[name] = zf.read()
-                else:
-                    f.seek(0)
-                    rla_env = load_assetbundle(f)
-                    logger.debug("Loaded RLA Unity bundle: %s" % filename)
-                    for obj in rla_env.objects:
-                        if obj.type in {ClassIDType.TextAsset}:
-                            data = obj.read()
-                            datas[data.m_Name] = data.m_Script.encode(
-                                "utf-8", "surrogateescape"
-                            )
-                header = sssekai_global.rla_header = json.loads(
-                    datas["sekai.rlh"].decode("utf-8")
-                )
-                seconds = header["splitSeconds"]
-                sssekai_global.rla_raw_clips.clear()
-                for sid in header["splitFileIds"]:
-                    sname = "sekai_%02d_%08d" % (seconds, sid)
-                    data = datas[sname + ".rla"]
-                    sssekai_global.rla_raw_clips[sname] = data
-                sssekai_global.rla_sekai_streaming_live_bundle_path = filename
-                sssekai_global.rla_enum_entries = [
-                    (sname, sname, "", "ANIM_DATA", index)
-                    for index, sname in enumerate(sssekai_global.rla_raw_clips.keys())
-                ]
-                logger.debug("RLA version: %s" % header["version"])
-        except Exception as e:
-            logger.error("Failed to load RLA bundle: %s" % e)
-        return sssekai_global.rla_enum_entries
-
-    @classmethod
-    def poll(self, context):
-        wm = context.window_manager
-        entry = wm.sssekai_rla_selected
-        if (
-            entry
-            and entry != sssekai_global.rla_selected_raw_clip
-            and entry in sssekai_global.rla_raw_clips
-            and sssekai_global.rla_raw_clips[entry]
-        ):
-            SSSekaiBlenderImportRLABatchOperator.update_selected_rla_asset(entry)
-        return True
+    enumerate_rla_assets = versioned_enum_items(
+        lambda context: sssekai_global.rla_version,
+        lambda context: sssekai_global.rla_enum_entries or [("NONE", "None", "", 0)],
+    )
 
     def draw(self, context: Context):
         layout = self.layout
@@ -111,7 +56,10 @@ class SSSekaiRLAImportPanel(bpy.types.Panel):
         row = layout.row()
         row.label(text=T("Number of segments: %d") % len(sssekai_global.rla_clip_data))
         row = layout.row()
-        layout.prop(wm, "sssekai_streaming_live_archive_bundle", icon="FILE_FOLDER")
+        row.prop(wm, "sssekai_streaming_live_archive_bundle", icon="FILE_FOLDER")
+        row.operator(
+            SSSekaiBlenderLoadRLAArchiveOperator.bl_idname, text="", icon="FILE_REFRESH"
+        )
         row = layout.row()
         row.prop(wm, "sssekai_rla_selected", icon="SCENE_DATA")
         row = layout.row()
@@ -170,11 +118,13 @@ register_wm_props(
             "The bundle file inside 'streaming_live/archive' directory.\nOr alternatively, a ZIP file containing 'sekai.rlh' (json) and respective 'sekai_xx_xxxxxx.rla' files. These files should have the extension '.rlh', '.rla'"
         ),
         subtype="FILE_PATH",
+        update=update_rla_archive,
     ),
     sssekai_rla_selected=EnumProperty(
         name=T("RLA Clip"),
         description=T("Selected RLA Clip"),
         items=SSSekaiRLAImportPanel.enumerate_rla_assets,
+        update=update_rla_clip,
     ),
     sssekai_rla_import_range=IntVectorProperty(
         name=T("Import Range"),
@@ -1,4 +1,4 @@
-import os, sys
+import os, sys, importlib, importlib.util
 
 from coloredlogs import install
 from logging import getLogger, DEBUG
@@ -17,4 +17,19 @@ TEMP_DIR = sample_file_path(".temp")
 os.makedirs(TEMP_DIR, exist_ok=True)
 sys.path.insert(0, sample_file_path(".."))
 
+
+def load_module(name):
+    """Imports `blender/core/<name>.py` without the addon (and `bpy`). See `blender/core/__init__.py`"""
+    if not "core" in sys.modules:
+        # `blender/core` as a package of its own, so its relative imports work
+        spec = importlib.util.spec_from_file_location(
+            "core",
+            sample_file_path("..", "blender", "core", "__init__.py"),
+            submodule_search_locations=[sample_file_path("..", "blender", "core")],
+        )
+        sys.modules["core"] = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(sys.modules["core"])
+    return importlib.import_module("core." + name)
+
+
 from sssekai.unity.AssetBundle import load_assetbundle
@@ -0,0 +1,68 @@
+from tests import *
+
+import glob, io, shutil, tarfile, zipfile
+
+archive = load_module("archive")
+unityfs = load_module("unityfs")
+
+
+def test_archive(tmp_path):
+    files = [
+        PATH
+        for PATH in sorted(glob.glob(sample_file_path("*", "*")))
+        if not os.path.basename(os.path.dirname(PATH)).startswith("__")
+    ]
+    names = ["assets/%s" % os.path.basename(PATH) for PATH in files]
+    zip_path = os.path.join(tmp_path, "archive.zip")
+    with zipfile.ZipFile(zip_path, "w") as z:
+        for i, (PATH, name) in enumerate(zip(files, names)):
+            # Alternate between stored and compressed members
+            z.write(PATH, name, zipfile.ZIP_DEFLATED if i % 2 else zipfile.ZIP_STORED)
+    tar_path = os.path.join(tmp_path, "archive.tar")
+    tgz_path = os.path.join(tmp_path, "archive.tar.gz")
+    for path, mode in ((tar_path, "w"), (tgz_path, "w:gz")):
+        with tarfile.open(path, mode) as tar:
+            for PATH, name in zip(files, names):
+                tar.add(PATH, name)
+    for path in (zip_path, tar_path, tgz_path):
+        assert archive.is_archive(path)
+        members = archive.list_archive(path)
+        assert sorted(members) == sorted(names)
+        with open(path, "rb") as f:
+            for PATH, name in zip(files, names):
+                with open(PATH, "rb") as src:
+                    data = src.read()
+                member = members[name]
+                assert member.size == len(data)
+                assert archive.read_archive_member(path, name) == data
+                if member.is_stored:
+                    f.seek(member.offset)
+                    assert f.read(member.size) == data
+                    # Headers of bundles that don't start at a multiple of 16
+                    f.seek(member.offset)
+                    try:
+                        header = unityfs.read_unityfs_header(f)
+                    except ValueError:
+                        continue
+                    expected = unityfs.read_unityfs_header(io.BytesIO(data))
+                    assert header.data_offset - member.offset == expected.data_offset
+                    assert header.nodes == expected.nodes
+                member_path = os.path.join(path, name)
+                assert archive.split_archive_path(member_path) == (path, name)
+        assert archive.expand_archives([path]) == [
+            os.path.join(path, name) for name in members
+        ]
+        # Kept open across members
+        with archive.ArchiveReader(path) as reader:
+            for PATH, name in zip(files, names):
+                with open(PATH, "rb") as src:
+                    assert reader.read(name) == src.read()
+        logger.info("ok. %s: %d members" % (path, len(members)))
+    assert archive.list_archive(tar_path)[names[0]].is_stored
+    assert not archive.list_archive(tgz_path)[names[0]].is_stored
+    assert not archive.is_archive(files[0])
+    # Only files named like archives are looked into
+    renamed = os.path.join(tmp_path, "archive")
+    shutil.copy(zip_path, renamed)
+    assert not archive.is_archive(renamed)
+    assert archive.split_archive_path(files[0]) == (files[0], None)
@@ -0,0 +1,54 @@
+from tests import *
+
+binder = load_module("binder")
+crc32 = binder.crc32
+
+PATHS = {
+    "": "Root",
+    "Hips": "Hips",
+    "Hips/Spine": "Spine",
+    "Hips/Spine/Chest": "Chest",
+    "Hips/Spine/Chest/Left/Hand": "Hand.L",
+    "Hips/Spine/Chest/Right/Hand": "Hand.R",
+    "Chest": "Chest.001",
+}
+
+
+def test_binder():
+    table = binder.PathBinder(PATHS, "Root")
+    # Exact paths only in the table itself
+    assert dict(table) == {crc32(path): bone for path, bone in PATHS.items()}
+    for path, bone in PATHS.items():
+        assert table.bind(crc32(path)) == bone
+    assert table.bind(0) == "Root"
+    # Extra root node
+    assert table.bind(crc32("Root/Hips/Spine")) == "Spine"
+    assert table.bind(crc32("Root")) == "Root"
+    # Missing root nodes
+    assert table.bind(crc32("Spine/Chest")) == "Chest"
+    assert table.bind(crc32("Left/Hand")) == "Hand.L"
+    assert table.bind(crc32("Spine")) == "Spine"
+    # Exact paths win over suffixes
+    assert table.bind(crc32("Chest")) == "Chest.001"
+    # Ambiguous
+    assert table.bind(crc32("Hand")) is None
+    # Unknown
+    assert table.bind(crc32("Hips/Tail")) is None
+    assert binder.PathBinder(PATHS).bind(crc32("Root/Hips")) is None
+
+
+def test_binder_shared_paths():
+    # Siblings with the same name share a path
+    pairs = [("", "Root"), ("Hips", "Hips"), ("Hips", "Hips.001")]
+    table = binder.PathBinder(pairs, "Root")
+    assert dict(table) == {crc32(""): "Root", crc32("Hips"): "Hips"}
+    assert table.bind(crc32("Root/Hips")) == "Hips"
+    # Every bone is kept
+    assert table.bones == {
+        "Root": crc32(""),
+        "Hips": crc32("Hips"),
+        "Hips.001": crc32("Hips"),
+    }
+    assert binder.PathBinder(PATHS).bones == {
+        bone: crc32(path) for path, bone in PATHS.items()
+    }
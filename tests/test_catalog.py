@@ -0,0 +1,58 @@
+from tests import *
+
+from sssekai.unity import sssekai_get_unity_version
+from UnityPy.enums import ClassIDType
+
+scanner = load_module("scanner")
+catalog = load_module("catalog")
+
+
+def test_catalog(tmp_path):
+    PATH = sample_file_path("mesh")
+    DB = os.path.join(tmp_path, "catalog.sqlite")
+    files = scanner.list_files(PATH)
+    scan = lambda paths: [
+        scanner.scan_file(path, PATH, sssekai_get_unity_version(), list_objects=True)
+        for path in paths
+    ]
+    with catalog.AssetCatalog(DB) as db:
+        assert db.update(files, scan) == len(files)
+        # Nothing changed
+        assert db.update(files, scan) == 0
+        meshes = db.search("*", ClassIDType.Mesh)
+        assert meshes and all(m.class_id == ClassIDType.Mesh for m in meshes)
+        mesh = meshes[0]
+        assert db.search(mesh.name.upper(), ClassIDType.Mesh)[0] == mesh
+        assert db.search("*%s*" % mesh.name[1:-1])
+        assert not db.search("_" * len(mesh.name))
+        hierarchies = db.search_hierarchies(
+            "*", containing_class_id=ClassIDType.SkinnedMeshRenderer
+        )
+        assert hierarchies
+        # Renderers have no names of their own
+        roots = set(
+            db.db.execute(
+                "SELECT file, root_path_id FROM objects WHERE class_id = ?",
+                (ClassIDType.SkinnedMeshRenderer,),
+            )
+        )
+        for h in hierarchies:
+            assert (h.file, h.path_id) in roots
+            logger.info("ok. %s: %s (%d)" % (h.file, h.name, h.path_id))
+        # Hierarchies without one are left out
+        colliders = db.search_hierarchies(
+            "*", containing_class_id=ClassIDType.CapsuleCollider
+        )
+        assert [h.name for h in colliders] == ["sit_body"]
+        # Files that are gone are dropped
+        assert db.update(files[1:], scan) == 0
+        assert not any(obj.file == files[0] for obj in db.search())
+    with catalog.AssetCatalog(DB) as db:
+        assert db.update(files, scan) == 1
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_path:
+        test_catalog(tmp_path)
@@ -0,0 +1,57 @@
+from tests import *
+
+import glob, zipfile
+from sssekai.unity import sssekai_get_unity_version
+
+environment = load_module("environment")
+bundle_cache = load_module("bundle_cache")
+unityfs = load_module("unityfs")
+
+UnityPy.config.FALLBACK_UNITY_VERSION = sssekai_get_unity_version()
+FILES = sorted(glob.glob(sample_file_path("mesh", "*")))
+
+
+def read_objects(env):
+    return sorted(
+        (obj.path_id, obj.class_id, bytes(obj.get_raw_data())) for obj in env.objects
+    )
+
+
+def test_load_file_direct(tmp_path):
+    assert environment.supports_direct_bundles()
+    cache = bundle_cache.BundleCache(os.path.join(tmp_path, "cache"), 1 << 30)
+    for PATH in FILES:
+        expected = read_objects(UnityPy.load(PATH))
+        assert expected
+        # Compressed, read into memory or memory-mapped
+        for use_mmap in (True, False):
+            env = environment.SSSekaiEnvironment(PATH, use_mmap=use_mmap)
+            assert env.load_file_direct(PATH) is not None
+            assert read_objects(env) == expected
+            env.close()
+        # Uncompressed copy, memory-mapped
+        env = environment.SSSekaiEnvironment(PATH, bundle_cache=cache)
+        env.load_file(PATH)
+        assert PATH in env.mmaps
+        assert read_objects(env) == expected
+        env.close()
+        assert not env.mmaps
+        # Loaded once one of its CABs is referenced
+        env = environment.SSSekaiEnvironment(PATH)
+        cabs = unityfs.read_bundle_cabs(PATH)
+        env.add_lazy_file(PATH, cabs)
+        env.find_file(cabs[0])
+        assert read_objects(env) == expected
+        env.close()
+        # Archive members, stored as-is and compressed
+        name = os.path.basename(PATH)
+        zip_path = os.path.join(tmp_path, name + ".zip")
+        with zipfile.ZipFile(zip_path, "w") as z:
+            z.write(cache.get(PATH), "stored", zipfile.ZIP_STORED)
+            z.write(PATH, "deflated", zipfile.ZIP_DEFLATED)
+        for member in ("stored", "deflated"):
+            env = environment.SSSekaiEnvironment(tmp_path)
+            env.load_file(os.path.join(zip_path, member))
+            assert read_objects(env) == expected
+            env.close()
+        logger.info("ok. %s: %d objects" % (name, len(expected)))
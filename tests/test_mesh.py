@@ -1,9 +1,13 @@
 from tests import *
 
-from UnityPy.classes import MeshRenderer, UnityTexEnv, Texture2D
+from UnityPy.classes import BoneWeights4, MeshRenderer, UnityTexEnv, Texture2D
 from UnityPy.helpers import MeshHelper
 from UnityPy.enums import ClassIDType
 
+import numpy as np
+
+mesh_arrays = load_module("mesh")
+
 
 def test_mesh():
     PATH = sample_file_path("mesh", "face_31_0001")
@@ -36,5 +40,220 @@ def test_mesh():
             logger.info("ok. mesh was: %s" % rnd.m_GameObject.m_Name)
 
 
+def reference_triangles(submeshes, vertex_count):
+    # What `bmesh.faces.new` used to take
+    triangles, seen = [], set()
+    for submesh in submeshes:
+        for trig in submesh:
+            trig = list(reversed(trig))
+            key = frozenset(trig)
+            if len(key) != 3 or key in seen:
+                continue
+            if not all(0 <= i < vertex_count for i in trig):
+                continue
+            seen.add(key)
+            triangles.append(trig)
+    return triangles
+
+
+def test_filter_triangles():
+    triangles = [[0, 1, 2], [2, 1, 0], [1, 2, 0], [0, 0, 1], [1, 2, 3], [2, 3, 9]]
+    result = mesh_arrays.filter_triangles(triangles, 4)
+    assert result.tolist() == reference_triangles([triangles], 4)
+    assert result.tolist() == [[2, 1, 0], [3, 2, 1]]
+    assert mesh_arrays.filter_triangles([], 4).shape == (0, 3)
+    PATH = sample_file_path("mesh", "face_31_0001")
+    with open(PATH, "rb") as f:
+        env = load_assetbundle(f)
+        for obj in filter(lambda obj: obj.type == ClassIDType.Mesh, env.objects):
+            handler = MeshHelper.MeshHandler(obj.read())
+            handler.process()
+            submeshes = handler.get_triangles()
+            result = mesh_arrays.filter_triangles(
+                [trig for submesh in submeshes for trig in submesh],
+                handler.m_VertexCount,
+            )
+            expected = reference_triangles(submeshes, handler.m_VertexCount)
+            assert result.tolist() == expected
+            logger.info("ok. %s: %d triangles" % (obj.peek_name(), len(result)))
+
+
+def test_mesh_arrays():
+    for name in ("face_31_0001", "ladies_s_31_0001"):
+        with open(sample_file_path("mesh", name), "rb") as f:
+            env = load_assetbundle(f)
+            for obj in filter(lambda obj: obj.type == ClassIDType.Mesh, env.objects):
+                data = obj.read()
+                arrays = mesh_arrays.MeshArrays.from_mesh(data)
+                handler = MeshHelper.MeshHandler(data)
+                handler.process()
+                expected = mesh_arrays.MeshArrays.from_handler(handler)
+                assert arrays.vertex_count == expected.vertex_count
+                for key in ("positions", "normals", "tangents", "bone_indices"):
+                    assert np.array_equal(getattr(arrays, key), getattr(expected, key))
+                assert np.allclose(arrays.bone_weights, expected.bone_weights)
+                # Normalized here, raw UNorm8 in MeshHandler
+                assert np.allclose(arrays.colors, expected.colors / 255)
+                assert arrays.uvs.keys() == expected.uvs.keys()
+                for i, uv in arrays.uvs.items():
+                    assert np.array_equal(uv, expected.uvs[i])
+                assert len(arrays.submeshes) == len(expected.submeshes)
+                for a, b in zip(arrays.submeshes, expected.submeshes):
+                    assert np.array_equal(a, b)
+                # Views over the vertex data
+                assert arrays.positions.base is not None
+                logger.info(
+                    "ok. %s: %d vertices" % (obj.peek_name(), len(arrays.positions))
+                )
+
+
+def test_mesh_colors():
+    # UNorm8 vertex colors are imported as floats in [0,1], as FLOAT_COLOR attributes take
+    with open(sample_file_path("mesh", "ladies_s_31_0001"), "rb") as f:
+        env = load_assetbundle(f)
+        data = next(obj.read() for obj in env.objects if obj.type == ClassIDType.Mesh)
+        arrays = mesh_arrays.MeshArrays.from_mesh(data)
+        handler = MeshHelper.MeshHandler(data)
+        handler.process()
+        raw = np.asarray(handler.m_Colors).reshape(arrays.colors.shape)
+        # Raw bytes, which used to be imported as-is
+        assert raw.max() > 1
+        assert arrays.colors.dtype == np.float32
+        assert arrays.colors.min() >= 0 and arrays.colors.max() <= 1
+        assert np.allclose(arrays.colors, raw / 255)
+
+
+def test_mesh_arrays_skin():
+    with open(sample_file_path("mesh", "face_31_0001"), "rb") as f:
+        env = load_assetbundle(f)
+        obj = next(obj for obj in env.objects if obj.type == ClassIDType.Mesh)
+        data = obj.read()
+        expected = mesh_arrays.MeshArrays.from_mesh(data)
+        # As in Unity 5.x up to 2018.1. Blend channels are the last ones, in a stream of their own
+        for channel in data.m_VertexData.m_Channels[12:]:
+            channel.dimension = 0
+        data.m_Skin = [
+            BoneWeights4(*indices, *weights)
+            for indices, weights in zip(expected.bone_indices, expected.bone_weights)
+        ]
+        arrays = mesh_arrays.MeshArrays.from_mesh(data)
+        assert np.array_equal(arrays.bone_indices, expected.bone_indices)
+        assert np.allclose(arrays.bone_weights, expected.bone_weights)
+        assert np.array_equal(arrays.positions, expected.positions)
+
+
+def test_mesh_arrays_formats():
+    data = np.array([[0, 255, 128, 7], [255, 0, 64, 9]], dtype=np.uint8).tobytes()
+    colors = mesh_arrays.read_channel(data, 2, 0, 4, 4, "B", normalized=True)
+    assert np.allclose(colors[0], [0, 1, 128 / 255, 7 / 255])
+    halfs = np.array([[1, 2, 0], [3, 4, 0]], dtype="<f2").tobytes()
+    uvs = mesh_arrays.read_channel(halfs, 2, 0, 6, 2, "e")
+    assert uvs.tolist() == [[1, 2], [3, 4]]
+    assert np.shares_memory(uvs, np.frombuffer(halfs, np.uint8))
+    snorm = np.array([-128, -127, 0, 127], dtype=np.int8).tobytes()
+    assert mesh_arrays.read_channel(snorm, 4, 0, 1, 1, "b", True).ravel().tolist() == [
+        -1,
+        -1,
+        0,
+        1,
+    ]
+    indices = np.array([0, 1, 2, 3, 4, 5], dtype="<u4").tobytes()
+    assert mesh_arrays.read_indices(indices, False).tolist() == [0, 1, 2, 3, 4, 5]
+    assert len(mesh_arrays.read_indices(indices, True)) == 12
+
+
+def test_loop_uvs():
+    arrays = mesh_arrays.MeshArrays(3)
+    arrays.uv0 = np.array([[0, 1], [2, 3], [4, 5]], dtype="<f2")
+    arrays.uv1 = np.zeros((3, 2), dtype=np.float32)
+    arrays.uv2 = np.array([[0, 1, 9], [2, 3, 9], [4, 5, 9]], dtype=np.float32)
+    loops = np.array([2, 1, 0, 0, 1, 2])
+    uvs = arrays.loop_uvs(loops)
+    # All zero UV maps are skipped
+    assert list(uvs) == [0, 2]
+    for uv in uvs.values():
+        assert uv.dtype == np.float32 and uv.flags.c_contiguous
+        assert uv.tolist() == [[4, 5], [2, 3], [0, 1], [0, 1], [2, 3], [4, 5]]
+
+
+def test_normalize_vectors():
+    normals = mesh_arrays.normalize_vectors(
+        np.array([[3, 0, 4], [0, 0, 0], [0, -2, 0]], dtype="<f2")
+    )
+    assert normals.dtype == np.float32
+    assert np.allclose(normals, [[0.6, 0, 0.8], [0, 0, 0], [0, -1, 0]])
+
+
+def reference_skin_weights(bone_indices, bone_weights, group_count):
+    # What was added to the vertex groups one vertex at a time
+    result = dict()
+    for vtx, (indices, weights) in enumerate(zip(bone_indices, bone_weights)):
+        merged = dict()
+        for index, weight in zip(indices, weights):
+            merged[index] = max(merged.get(index, weight), weight)
+        for index, weight in merged.items():
+            if index < group_count and weight > 0:
+                result[(vtx, index)] = weight
+    return result
+
+
+def batched_skin_weights(*args, **kwargs):
+    result = dict()
+    for group, weight, vertices in mesh_arrays.weight_batches(
+        *mesh_arrays.skin_weights(*args, **kwargs)
+    ):
+        for vtx in vertices:
+            assert not (vtx, group) in result
+            result[(vtx, group)] = weight
+    return result
+
+
+def test_skin_weights():
+    indices = np.array([[0, 1, 1, 5], [2, 2, 2, 2], [0, 1, 2, 3]])
+    weights = np.array([[0.5, 0.2, 0.3, 0], [0.25] * 4, [0.4, 0.3, 0.2, 0.1]])
+    expected = reference_skin_weights(indices, weights, 4)
+    result = batched_skin_weights(indices, weights, 4)
+    assert result.keys() == expected.keys()
+    assert np.allclose([result[k] for k in expected], list(expected.values()))
+    # Defaults to even weights
+    assert batched_skin_weights(indices[:1], None, 2) == {(0, 0): 0.25, (0, 1): 0.25}
+    pruned = batched_skin_weights(indices, weights, 4, max_influences=2, normalize=True)
+    assert sorted(pruned) == [(0, 0), (0, 1), (1, 2), (2, 0), (2, 1)]
+    assert np.allclose([pruned[(0, 0)], pruned[(0, 1)]], [0.625, 0.375])
+    assert np.isclose(pruned[(1, 2)], 1)
+    assert batched_skin_weights(np.empty((0, 4)), None, 4) == {}
+    with open(sample_file_path("mesh", "ladies_s_31_0001"), "rb") as f:
+        env = load_assetbundle(f)
+        for obj in filter(lambda obj: obj.type == ClassIDType.Mesh, env.objects):
+            arrays = mesh_arrays.MeshArrays.from_mesh(obj.read())
+            expected = reference_skin_weights(
+                arrays.bone_indices.tolist(), arrays.bone_weights.tolist(), 256
+            )
+            result = batched_skin_weights(arrays.bone_indices, arrays.bone_weights, 256)
+            assert result == expected
+            logger.info("ok. %s: %d weights" % (obj.peek_name(), len(result)))
+
+
+def test_topology_triangles():
+    version = (2022, 3, 0, 0)
+    indices = np.array([0, 1, 2, 3, 4, 5, 6])
+    topology = lambda topology: mesh_arrays.topology_triangles(
+        indices, topology, version
+    ).tolist()
+    assert topology(0) == [[0, 1, 2], [3, 4, 5]]
+    assert topology(2) == [[0, 1, 2], [0, 2, 3]]
+    # See `MeshHandler.get_triangles`
+    strip = [0, 1, 2, 2, 3, 4, 5]
+    expected = []
+    for i in range(len(strip) - 2):
+        a, b, c = strip[i : i + 3]
+        if a == b or a == c or b == c:
+            continue
+        expected.append([b, a, c] if i & 1 else [a, b, c])
+    assert (
+        mesh_arrays.topology_triangles(np.array(strip), 1, version).tolist() == expected
+    )
+
+
 if __name__ == "__main__":
     test_mesh()
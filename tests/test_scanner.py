@@ -0,0 +1,60 @@
+from tests import *
+
+import json, glob
+from sssekai.unity import sssekai_get_unity_version
+from UnityPy.enums import ClassIDType
+
+scanner = load_module("scanner")
+
+
+def test_scanner():
+    PATH = sample_file_path("mesh")
+    files = scanner.list_files(PATH)
+    results = scanner.run_scanner(files, PATH, sssekai_get_unity_version())
+    assert [r["path"] for r in results] == files
+    for result in results:
+        assert not "error" in result, result["error"]
+        assert result["cabs"]
+        serial = scanner.scan_file(result["path"], PATH, sssekai_get_unity_version())
+        assert json.loads(json.dumps(serial)) == result
+        # Every entry names the CAB it's in
+        for key in ("hierarchies", "animators", "animations"):
+            for entry in result[key]:
+                assert entry[-1].lower() in result["cabs"]
+        logger.info(
+            "ok. %s: %d hierarchies, %d animators, %d animations"
+            % (
+                result["path"],
+                len(result["hierarchies"]),
+                len(result["animators"]),
+                len(result["animations"]),
+            )
+        )
+
+
+def test_peek_transform():
+    for PATH in sorted(glob.glob(sample_file_path("*", "*"))):
+        if os.path.basename(os.path.dirname(PATH)).startswith("__"):
+            continue
+        env = load_assetbundle(open(PATH, "rb"))
+        peeked = 0
+        for obj in env.objects:
+            if obj.type in {ClassIDType.Transform, ClassIDType.RectTransform}:
+                links = scanner.peek_transform(obj)
+                if not links:
+                    # RectTransforms may be laid out differently. Transforms may not
+                    assert obj.type == ClassIDType.RectTransform
+                    continue
+                data = obj.read()
+                assert links == (
+                    data.m_GameObject.path_id,
+                    data.m_Father.path_id,
+                    [child.path_id for child in data.m_Children],
+                )
+                peeked += 1
+        logger.info("ok. %s: %d transforms" % (PATH, peeked))
+
+
+if __name__ == "__main__":
+    test_scanner()
+    test_peek_transform()
@@ -0,0 +1,41 @@
+from tests import *
+
+import json, pytest
+from dataclasses import asdict
+
+try:
+    # `types` needs Blender's `mathutils`
+    from mathutils import Matrix
+except ImportError:
+    pytest.skip("mathutils is not available", allow_module_level=True)
+snapshot = load_module("snapshot")
+types = load_module("types")
+utils = load_module("utils")
+
+
+def test_snapshot_hierarchy():
+    hierarchy = types.Hierarchy("body")
+    nodes = dict()
+    for path_id, parent in ((1, None), (2, 1), (3, 2), (4, 1)):
+        nodes[path_id] = types.HierarchyNode(
+            "bone_%d" % path_id,
+            path_id,
+            types.uVector3(0, path_id, 0),
+            types.uQuaternion(0, 0, 0, 1),
+            types.uVector3(1, 1, 1),
+            game_object_path_id=path_id + 100,
+        )
+        hierarchy.add_node(nodes[path_id], nodes.get(parent, None))
+    assert not hierarchy.is_stub and len(hierarchy.nodes) == 4
+    data = json.loads(json.dumps(asdict(snapshot.snapshot_hierarchy(hierarchy))))
+    restored = snapshot.restore_hierarchy(
+        utils.dataclass_from_dict(snapshot.HierarchySnapshot, data)
+    )
+    # Restored as a stub of the same root
+    assert restored.is_stub
+    assert restored.name == "body"
+    assert restored.path_id == restored.root_path_id == 1
+    assert restored.root_game_object_path_id == 101
+    # ...and the same again from the stub
+    stub = snapshot.restore_hierarchy(snapshot.snapshot_hierarchy(restored))
+    assert (stub.path_id, stub.root_game_object_path_id) == (1, 101)
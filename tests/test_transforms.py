@@ -0,0 +1,188 @@
+from tests import *
+
+import random
+import numpy as np
+from types import SimpleNamespace
+
+transforms = load_module("transforms")
+
+
+def make_tree(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    nodes = []
+    for i in range(count):
+        q = np.array([rng.gauss(0, 1) for _ in range(4)])
+        q /= np.linalg.norm(q)
+        node = SimpleNamespace(
+            path_id=1000 + i,
+            position=SimpleNamespace(
+                x=rng.uniform(-1, 1), y=rng.uniform(-1, 1), z=rng.uniform(-1, 1)
+            ),
+            rotation=SimpleNamespace(x=q[0], y=q[1], z=q[2], w=q[3]),
+            scale=SimpleNamespace(
+                x=rng.uniform(0.5, 2), y=rng.uniform(0.5, 2), z=rng.uniform(0.5, 2)
+            ),
+            children=[],
+            parent=None,
+        )
+        if nodes:
+            node.parent = rng.choice(nodes)
+            node.parent.children.append(node)
+        nodes.append(node)
+    return nodes
+
+
+def rotate(q, v):
+    """Rotates `v` by the WXYZ quaternion `q` as q * v * q^-1"""
+    w, u = q[0], np.array(q[1:])
+    return 2 * np.dot(u, v) * u + (w * w - np.dot(u, u)) * v + 2 * w * np.cross(u, v)
+
+
+# Unity (left-handed, Y up) to Blender (right-handed, Z up) coordinates, i.e. (X, Y, Z) -> (-X, -Z, Y).
+# See `swizzle_vector3` in `blender/core/math.py`
+UNITY_TO_BLENDER = np.array([[-1, 0, 0], [0, 0, -1], [0, 1, 0]])
+
+
+def reference_transform(node, scale: bool):
+    """Maps a local point of `node` into the root's parent space, one node at a time.
+
+    Done in Unity's own coordinates, without any of the swizzles"""
+    q = [node.rotation.w, node.rotation.x, node.rotation.y, node.rotation.z]
+    t = np.array([node.position.x, node.position.y, node.position.z])
+    s = np.array([node.scale.x, node.scale.y, node.scale.z])
+
+    def apply(v):
+        v = rotate(q, v * s if scale else v) + t
+        return reference_transform(node.parent, scale)(v) if node.parent else v
+
+    return apply
+
+
+def test_global_transforms():
+    nodes = make_tree(200)
+    arrays = transforms.HierarchyArrays.from_root(nodes[0])
+    assert len(arrays) == len(nodes)
+    assert sorted(arrays.path_ids.tolist()) == [node.path_id for node in nodes]
+    # Parents come before their children, in depth first pre-order
+    for index, node in enumerate(arrays.nodes):
+        parent = arrays.parents[index]
+        if node.parent:
+            assert 0 <= parent < index and arrays.nodes[parent] is node.parent
+            assert arrays.depths[index] == arrays.depths[parent] + 1
+        else:
+            assert parent == -1 and arrays.depths[index] == 0
+        assert arrays.index[node.path_id] == index
+    for scale in (False, True):
+        result = arrays.global_transforms(scale)
+        for index, node in enumerate(arrays.nodes):
+            apply = reference_transform(node, scale)
+            for v in np.eye(3).tolist() + [[0, 0, 0]]:
+                expected = UNITY_TO_BLENDER @ apply(UNITY_TO_BLENDER.T @ np.array(v))
+                assert np.allclose(result[index] @ np.array(v + [1]), [*expected, 1])
+    logger.info("ok. %d nodes, %d levels" % (len(arrays), len(arrays.levels)))
+
+
+def test_bindpose_transforms():
+    rng = np.random.default_rng(0)
+    root = np.eye(4)
+    root[:3, 3] = rng.uniform(-1, 1, 3)
+    bindposes = np.tile(np.eye(4), (8, 1, 1))
+    bindposes[:, :3, 3] = rng.uniform(-1, 1, (8, 3))
+    result = transforms.bindpose_transforms(root, bindposes)
+    for bindpose, edit in zip(bindposes, result):
+        expected = (
+            root
+            @ transforms.UNITY_TO_BLENDER_BASIS
+            @ np.linalg.inv(bindpose)
+            @ transforms.BLENDER_TO_UNITY_BASIS
+        )
+        assert np.allclose(edit, expected)
+
+
+def reference_walk(node, parent=None, depth=0):
+    yield parent, node, depth
+    for child in node.children:
+        yield from reference_walk(child, node, depth + 1)
+
+
+def test_walk():
+    nodes = make_tree(300, seed=1)
+    arrays = transforms.HierarchyArrays.from_root(nodes[0])
+    for root in nodes[:20]:
+        index = arrays.index[root.path_id]
+        assert list(arrays.walk(index)) == list(reference_walk(root))
+        assert arrays.ends[index] - index == len(list(reference_walk(root)))
+    skip = {nodes[5].path_id, nodes[9].path_id}
+    assert [node.path_id for _, node, _ in arrays.walk(skip=skip)] == [
+        node.path_id
+        for _, node, _ in reference_walk(nodes[0])
+        if not any(n.path_id in skip for n in reference_walk_parents(node))
+    ]
+    # Subtrees, and the nodes leading to them
+    bone_ids = {nodes[42].path_id, nodes[77].path_id}
+    subtree = {
+        node.path_id
+        for path_id in bone_ids
+        for _, node, _ in reference_walk(nodes[path_id - 1000])
+    }
+    assert set(arrays.path_ids[arrays.subtree_mask(bone_ids)].tolist()) == subtree
+    ancestors = {
+        parent.path_id
+        for node in nodes
+        if node.path_id in bone_ids
+        for parent in reference_walk_parents(node)
+    }
+    assert set(arrays.path_ids[arrays.ancestor_mask(bone_ids)].tolist()) == ancestors
+
+
+def reference_walk_parents(node):
+    while node:
+        yield node
+        node = node.parent
+
+
+def test_deep_chain():
+    # Deeper than the recursion limit
+    depth = sys.getrecursionlimit() * 2
+    nodes = make_tree(1)
+    for i in range(1, depth):
+        node = make_tree(1)[0]
+        node.path_id += i
+        node.parent = nodes[-1]
+        nodes[-1].children.append(node)
+        nodes.append(node)
+    arrays = transforms.HierarchyArrays.from_root(nodes[0])
+    assert arrays.depths.tolist() == list(range(depth))
+    assert arrays.ends.tolist() == [depth] * depth
+    assert [depth for _, _, depth in arrays.walk()] == list(range(depth))
+    assert arrays.global_transforms().shape == (depth, 4, 4)
+
+
+def test_paths():
+    nodes = make_tree(100, seed=2)
+    for node in nodes:
+        node.name = "Bone%d" % node.path_id
+    arrays = transforms.HierarchyArrays.from_root(nodes[0])
+    for node, path in zip(arrays.nodes, arrays.paths()):
+        names = [n.name for n in reference_walk_parents(node)][::-1]
+        # Relative to the root
+        assert path == "/".join(names[1:])
+
+
+def test_pose_basis_matrices():
+    nodes = make_tree(50, seed=3)
+    arrays = transforms.HierarchyArrays.from_root(nodes[0])
+    final = arrays.global_transforms()
+    # Rest pose of a differently posed copy of the tree
+    arrays.rotations = np.roll(arrays.rotations, 1, axis=0)
+    edit = arrays.global_transforms()
+    bases = transforms.pose_basis_matrices(edit, final, arrays.parents)
+    # Pose = ParentPose @ (ParentEdit^-1 @ Edit) @ Basis, from the root down
+    pose = np.empty_like(final)
+    for index, parent in enumerate(arrays.parents.tolist()):
+        if parent < 0:
+            pose[index] = edit[index] @ bases[index]
+        else:
+            local = np.linalg.inv(edit[parent]) @ edit[index]
+            pose[index] = pose[parent] @ local @ bases[index]
+    assert np.allclose(pose, final)
@@ -0,0 +1,69 @@
+from tests import *
+
+import glob, io
+
+unityfs = load_module("unityfs")
+
+
+def test_unityfs():
+    for PATH in sorted(glob.glob(sample_file_path("*", "*"))):
+        if os.path.basename(os.path.dirname(PATH)).startswith("__"):
+            continue
+        with open(PATH, "rb") as f:
+            header = unityfs.read_unityfs_header(f)
+            f.seek(0)
+            env = load_assetbundle(f)
+        bundle = list(env.files.values())[0]
+        assert [node.path for node in header.nodes] == list(bundle.files.keys())
+        assert max(node.offset + node.size for node in header.nodes) <= sum(
+            block.uncompressed_size for block in header.blocks
+        )
+        assert unityfs.read_bundle_cabs(PATH) == [node.path for node in header.nodes]
+        # Nodes of uncompressed bundles are read from the file as-is
+        data = bundle.save(packer="none")
+        header = unityfs.read_unityfs_header(io.BytesIO(data))
+        assert header.is_uncompressed and not header.is_encrypted
+        bundle = list(load_assetbundle(io.BytesIO(data)).files.values())[0]
+        for node in header.nodes:
+            offset = header.data_offset + node.offset
+            file = bundle.files[node.path]
+            file = getattr(file, "reader", file)
+            assert data[offset : offset + node.size] == file.bytes
+        logger.info("ok. %s: %s" % (PATH, unityfs.read_bundle_cabs(PATH)))
+
+
+def test_unpack_unityfs():
+    for PATH in sorted(glob.glob(sample_file_path("*", "*"))):
+        if os.path.basename(os.path.dirname(PATH)).startswith("__"):
+            continue
+        stream = io.BytesIO()
+        with open(PATH, "rb") as f:
+            header = unityfs.unpack_unityfs(f, stream)
+            f.seek(0)
+            bundle = list(load_assetbundle(f).files.values())[0]
+        data = stream.getvalue()
+        assert header.size == len(data)
+        # Blocks decompressed concurrently come out the same
+        with open(PATH, "rb") as f:
+            parallel = io.BytesIO()
+            assert unityfs.unpack_unityfs(f, parallel, max_workers=4) == header
+            assert parallel.getvalue() == data
+            f.seek(0)
+            source = unityfs.read_unityfs_header(f)
+            buffer = unityfs.read_unityfs_data(f, source, max_workers=4)
+            assert buffer == data[header.data_offset :]
+        assert unityfs.read_unityfs_header(io.BytesIO(data)) == header
+        assert header.is_uncompressed
+        for node in header.nodes:
+            offset = header.data_offset + node.offset
+            file = bundle.files[node.path]
+            file = getattr(file, "reader", file)
+            assert data[offset : offset + node.size] == file.bytes
+        unpacked = list(load_assetbundle(io.BytesIO(data)).files.values())[0]
+        assert list(unpacked.files.keys()) == list(bundle.files.keys())
+        logger.info("ok. %s: %d bytes unpacked" % (PATH, len(data)))
+
+
+if __name__ == "__main__":
+    test_unityfs()
+    test_unpack_unityfs()